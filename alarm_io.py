@@ -0,0 +1,302 @@
+import contextlib
+import csv
+import datetime
+import itertools
+import json
+import os
+
+from recurrence import CronRule, DaysRule, EveryRule, parse_rule, rule_from_dict
+
+FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".ics": "ical", ".ical": "ical"}
+ICAL_DAYS = ["MO", "TU", "WE", "TH", "FR", "SA", "SU"]
+# Errors kept for display; the rest are only counted
+MAX_REPORTED_ERRORS = 100
+
+
+class ImportResult:
+    def __init__(self):
+        self.added = 0
+        self.duplicates = 0
+        self.errors = []  # (line number, message), first MAX_REPORTED_ERRORS only
+        self.error_count = 0
+
+    def error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+    def __repr__(self):
+        return f"ImportResult(added={self.added}, duplicates={self.duplicates}, errors={self.error_count})"
+
+
+def detect_format(path):
+    fmt = FORMATS.get(os.path.splitext(path)[1].lower())
+    if fmt is None:
+        raise ValueError(f"Unknown file type for {path!r}; use .csv, .jsonl or .ics")
+    return fmt
+
+
+@contextlib.contextmanager
+def _opened(source, mode):
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, mode, newline='', encoding='utf-8') as f:
+            yield f
+    else:
+        yield source
+
+
+def parse_datetime(text):
+    """ISO 8601 or "YYYY-MM-DD HH:MM"; aware times are converted to local time."""
+    value = datetime.datetime.fromisoformat(text.strip())
+    if value.tzinfo is not None:
+        value = value.astimezone().replace(tzinfo=None)
+    return value
+
+
+def next_due(target, rule, now):
+    """
+    The time to schedule an alarm for: `target` itself if it is still ahead,
+    otherwise the next occurrence of a recurring alarm. Raises ValueError
+    for a one-shot alarm in the past.
+    """
+    if target > now:
+        return target
+    if rule is None:
+        raise ValueError(f"{target:%Y-%m-%d %H:%M} is in the past")
+    return rule.next_after(now)
+
+
+def rule_text(rule):
+    """The Repeat box text for a rule; parse_rule() reads it back."""
+    return rule.describe() if rule is not None else "Once"
+
+
+# Readers yield (line number, target, rule), or (line number, None, error) for
+# a bad row. They are generators, so a file is never held in memory as a whole.
+
+def read_csv(f):
+    """Columns: target (required), repeat (optional Repeat box text)."""
+    reader = csv.DictReader(f)
+    if not reader.fieldnames or "target" not in reader.fieldnames:
+        raise ValueError("CSV needs a 'target' column")
+    for row in reader:
+        line = reader.line_num
+        try:
+            target = parse_datetime(row["target"])
+            rule = parse_rule(row.get("repeat") or "", target.time(), now=target)
+        except (TypeError, ValueError) as e:
+            yield line, None, e
+            continue
+        yield line, target, rule
+
+
+def read_jsonl(f):
+    """One object per line with "target" and optionally "rule" (as saved) or "repeat" text."""
+    for line, text in enumerate(f, 1):
+        if not text.strip():
+            continue
+        try:
+            data = json.loads(text)
+            target = parse_datetime(data["target"])
+            if data.get("rule"):
+                rule = rule_from_dict(data["rule"])
+            else:
+                rule = parse_rule(data.get("repeat") or "", target.time(), now=target)
+        except (KeyError, TypeError, ValueError) as e:
+            yield line, None, e
+            continue
+        yield line, target, rule
+
+
+def _unfold(f):
+    # RFC 5545 folds long lines; a leading space or tab continues the last one
+    current, start = None, 0
+    for line_no, raw in enumerate(f, 1):
+        raw = raw.rstrip("\r\n")
+        if raw[:1] in (" ", "\t") and current is not None:
+            current += raw[1:]
+            continue
+        if current is not None:
+            yield start, current
+        current, start = raw, line_no
+    if current is not None:
+        yield start, current
+
+
+def _ical_datetime(params, value):
+    if "VALUE=DATE" in params or len(value) == 8:
+        return datetime.datetime.strptime(value[:8], "%Y%m%d")
+    if value.endswith("Z"):
+        utc = datetime.datetime.strptime(value[:-1], "%Y%m%dT%H%M%S").replace(tzinfo=datetime.timezone.utc)
+        return utc.astimezone().replace(tzinfo=None)
+    # Floating or TZID times are taken as local time
+    return datetime.datetime.strptime(value, "%Y%m%dT%H%M%S")
+
+
+def _ical_rule(rrule, start):
+    parts = dict(p.split("=", 1) for p in rrule.split(";") if "=" in p)
+    freq = parts.get("FREQ")
+    interval = int(parts.get("INTERVAL", 1))
+    if freq == "MINUTELY":
+        return EveryRule(interval, start)
+    if freq == "HOURLY":
+        return EveryRule(60 * interval, start)
+    if freq == "DAILY" and interval == 1:
+        return DaysRule(start.time())
+    if freq == "WEEKLY" and interval == 1:
+        days = [ICAL_DAYS.index(d[-2:]) for d in parts["BYDAY"].split(",")] if "BYDAY" in parts else [start.weekday()]
+        return DaysRule(start.time(), days)
+    raise ValueError(f"Unsupported RRULE {rrule!r}")
+
+
+def read_ical(f):
+    """VEVENTs with DTSTART and optionally a simple RRULE."""
+    event, depth = None, 0
+    for line, text in _unfold(f):
+        name, _, value = text.partition(":")
+        name, _, params = name.partition(";")
+        name = name.upper()
+        if name == "BEGIN":
+            if value.upper() == "VEVENT":
+                event, start_line = {}, line
+            elif event is not None:
+                depth += 1  # e.g. VALARM inside the event
+        elif name == "END":
+            if value.upper() == "VEVENT" and event is not None:
+                try:
+                    if "DTSTART" not in event:
+                        raise ValueError("VEVENT without DTSTART")
+                    target = _ical_datetime(*event["DTSTART"])
+                    if "X-TIMERALARM-CRON" in event:
+                        rule = CronRule(event["X-TIMERALARM-CRON"][1])
+                    elif "RRULE" in event:
+                        rule = _ical_rule(event["RRULE"][1], target)
+                    else:
+                        rule = None
+                except (KeyError, ValueError) as e:
+                    yield start_line, None, e
+                else:
+                    yield start_line, target, rule
+                event = None
+            elif event is not None:
+                depth -= 1
+        elif event is not None and depth == 0:
+            event[name] = (params.upper(), value.strip())
+
+
+READERS = {"csv": read_csv, "jsonl": read_jsonl, "ical": read_ical}
+
+
+def import_alarms(scheduler, source, fmt=None, batch_size=5000, now=None):
+    """
+    Stream alarms from a CSV, JSON Lines or iCalendar file into `scheduler`.
+
+    Rows are parsed lazily and validated batch by batch. Everything valid is
+    added with one Scheduler.add_many() call, so the UI and the config
+    journal each see a single change. One-shot alarms in the past are
+    rejected, and recurring ones start at their next occurrence. Times that
+    are already set count as duplicates.
+    """
+    if fmt is None:
+        fmt = detect_format(source)
+    if now is None:
+        now = datetime.datetime.now()
+    result = ImportResult()
+    entries = []
+    with _opened(source, 'r') as f:
+        rows = READERS[fmt](f)
+        while True:
+            batch = list(itertools.islice(rows, batch_size))
+            if not batch:
+                break
+            for line, target, rule in batch:
+                if target is None:
+                    result.error(line, str(rule))  # bad row: `rule` is the error
+                    continue
+                try:
+                    target = next_due(target, rule, now)
+                except ValueError as e:
+                    result.error(line, str(e))
+                    continue
+                entries.append((target, rule) if rule is not None else target)
+    added = scheduler.add_many(entries)
+    result.added = len(added)
+    result.duplicates = len(entries) - len(added)
+    return result
+
+
+def _ical_lines(alarm):
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:alarm-{alarm.alarm_id}@timer-alarm",
+        f"DTSTART:{alarm.target:%Y%m%dT%H%M%S}",
+        "SUMMARY:Alarm",
+    ]
+    rule = alarm.rule
+    if isinstance(rule, DaysRule):
+        if len(rule.days) == 7:
+            lines.append("RRULE:FREQ=DAILY")
+        else:
+            lines.append("RRULE:FREQ=WEEKLY;BYDAY=" + ",".join(ICAL_DAYS[d] for d in sorted(rule.days)))
+    elif isinstance(rule, EveryRule):
+        lines.append(f"RRULE:FREQ=MINUTELY;INTERVAL={rule.minutes}")
+    elif isinstance(rule, CronRule):
+        lines.append(f"X-TIMERALARM-CRON:{rule.expression}")
+    lines.append("END:VEVENT")
+    return lines
+
+
+def iter_alarms(scheduler, chunk=1000):
+    """
+    Walk the schedule in fire-time order, one window at a time.
+
+    Each window resumes after the (target, alarm_id) key of the last alarm
+    read, so alarms removed meanwhile never shift later ones out of the
+    walk, and an alarm moved later (a recurring one firing) is not yielded
+    a second time.
+    """
+    key = None
+    seen = set()
+    while True:
+        alarms, key = scheduler.window_after(key, chunk)
+        if not alarms:
+            return
+        for alarm in alarms:
+            if alarm.alarm_id not in seen:
+                seen.add(alarm.alarm_id)
+                yield alarm
+
+
+def export_alarms(scheduler, dest, fmt=None):
+    """
+    Stream the schedule to a CSV, JSON Lines or iCalendar file. Alarms are
+    read in windows, so the scheduler is never locked for the whole export.
+    Every alarm scheduled for the whole export is written exactly once;
+    alarms added or removed meanwhile may or may not appear. Returns the
+    number of alarms written.
+    """
+    if fmt is None:
+        fmt = detect_format(dest)
+    count = 0
+    with _opened(dest, 'w') as f:
+        if fmt == "csv":
+            writer = csv.writer(f)
+            writer.writerow(["target", "repeat"])
+            for alarm in iter_alarms(scheduler):
+                writer.writerow([alarm.target.isoformat(), rule_text(alarm.rule)])
+                count += 1
+        elif fmt == "jsonl":
+            for alarm in iter_alarms(scheduler):
+                data = alarm.to_dict()
+                del data["id"]  # IDs are assigned again on import
+                f.write(json.dumps(data) + "\n")
+                count += 1
+        elif fmt == "ical":
+            f.write("BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//Timer Alarm//EN\r\n")
+            for alarm in iter_alarms(scheduler):
+                f.write("\r\n".join(_ical_lines(alarm)) + "\r\n")
+                count += 1
+            f.write("END:VCALENDAR\r\n")
+        else:
+            raise ValueError(f"Unknown format {fmt!r}")
+    return count
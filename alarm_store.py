@@ -0,0 +1,177 @@
+import bisect
+import datetime
+import itertools
+
+from recurrence import rule_from_dict
+
+
+def format_alarm_time(target):
+    return target.strftime("%I:%M %p")
+
+
+class Alarm:
+    __slots__ = ("alarm_id", "target", "snoozed", "rule")
+
+    def __init__(self, alarm_id, target, snoozed=False, rule=None):
+        self.alarm_id = alarm_id
+        self.target = target  # next fire time
+        self.snoozed = snoozed
+        self.rule = rule  # recurrence rule, None for one-shot alarms
+
+    @property
+    def label(self):
+        """Display text; includes the date so alarms on different days differ."""
+        label = f"{format_alarm_time(self.target)}  {self.target:%a %d %b}"
+        if self.rule is not None:
+            label += f"  ({self.rule.describe()})"
+        return label
+
+    def to_dict(self):
+        data = {"id": self.alarm_id, "target": self.target.isoformat(), "snoozed": self.snoozed}
+        if self.rule is not None:
+            data["rule"] = self.rule.to_dict()
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        rule = rule_from_dict(data["rule"]) if data.get("rule") else None
+        return cls(data["id"], datetime.datetime.fromisoformat(data["target"]), data.get("snoozed", False), rule)
+
+    def __repr__(self):
+        return f"Alarm({self.alarm_id!r}, {self.target.isoformat()})"
+
+
+class AlarmStore:
+    """
+    In-memory alarm records.
+
+    Alarms get stable integer IDs and are indexed two ways: a dict for O(1)
+    lookup by ID, and a list of (target, alarm_id) keys kept sorted with
+    bisect for ordered listing and lookup by fire time. Not thread-safe on
+    its own; the owning scheduler serializes access.
+    """
+    def __init__(self):
+        self._by_id = {}  # alarm_id -> Alarm
+        self._order = []  # sorted (target, alarm_id)
+        self._ids = itertools.count(1)
+
+    def __contains__(self, alarm_id):
+        return alarm_id in self._by_id
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __iter__(self):
+        by_id = self._by_id
+        return (by_id[alarm_id] for _, alarm_id in self._order)
+
+    def get(self, alarm_id):
+        return self._by_id.get(alarm_id)
+
+    def list(self):
+        """Alarms ordered by fire time."""
+        return list(self)
+
+    def at(self, index):
+        """The alarm at `index` in fire-time order."""
+        return self._by_id[self._order[index][1]]
+
+    def slice(self, start, stop):
+        """Alarms start..stop-1 in fire-time order, without copying the rest."""
+        by_id = self._by_id
+        return [by_id[alarm_id] for _, alarm_id in self._order[start:stop]]
+
+    def slice_after(self, key, count):
+        """
+        Up to `count` alarms ordered after the (target, alarm_id) `key`
+        (None for the start), and the key of the last one returned.
+        """
+        start = 0 if key is None else bisect.bisect_right(self._order, key)
+        keys = self._order[start:start + count]
+        by_id = self._by_id
+        return [by_id[alarm_id] for _, alarm_id in keys], (keys[-1] if keys else key)
+
+    def index_of(self, alarm_id):
+        alarm = self._by_id[alarm_id]
+        return bisect.bisect_left(self._order, (alarm.target, alarm_id))
+
+    def find(self, target):
+        """The first alarm set for exactly `target`, or None."""
+        i = bisect.bisect_left(self._order, (target,))
+        if i < len(self._order) and self._order[i][0] == target:
+            return self._by_id[self._order[i][1]]
+        return None
+
+    def next_id(self):
+        return next(self._ids)
+
+    def add(self, target, snoozed=False, alarm_id=None, rule=None):
+        if alarm_id is None:
+            alarm_id = self.next_id()
+        elif alarm_id in self._by_id:
+            raise ValueError(f"Alarm id {alarm_id} already in use")
+        else:
+            self._reserve(alarm_id)
+        alarm = Alarm(alarm_id, target, snoozed, rule)
+        self._by_id[alarm_id] = alarm
+        bisect.insort(self._order, (target, alarm_id))
+        return alarm
+
+    def add_many(self, items):
+        """Add (target, snoozed, rule) triples in one pass; returns the new alarms."""
+        alarms = [Alarm(self.next_id(), target, snoozed, rule) for target, snoozed, rule in items]
+        for alarm in alarms:
+            self._by_id[alarm.alarm_id] = alarm
+        keys = [(alarm.target, alarm.alarm_id) for alarm in alarms]
+        if len(keys) > 32:
+            self._order.extend(keys)
+            self._order.sort()
+        else:
+            for key in keys:
+                bisect.insort(self._order, key)
+        return alarms
+
+    def restore(self, alarms):
+        """Re-insert previously saved Alarm records, keeping their IDs."""
+        for alarm in alarms:
+            if alarm.alarm_id in self._by_id:
+                raise ValueError(f"Alarm id {alarm.alarm_id} already in use")
+            self._reserve(alarm.alarm_id)
+            self._by_id[alarm.alarm_id] = alarm
+            self._order.append((alarm.target, alarm.alarm_id))
+        self._order.sort()
+
+    def remove(self, alarm_id):
+        alarm = self._by_id.pop(alarm_id, None)
+        if alarm is not None:
+            del self._order[bisect.bisect_left(self._order, (alarm.target, alarm_id))]
+        return alarm
+
+    def remove_many(self, alarm_ids):
+        """Remove several alarms; returns the ones that existed."""
+        removed = [a for a in (self._by_id.pop(i, None) for i in alarm_ids) if a is not None]
+        if len(removed) > 32:
+            # One filtering pass beats many list deletions
+            self._order = [key for key in self._order if key[1] in self._by_id]
+        else:
+            for alarm in removed:
+                del self._order[bisect.bisect_left(self._order, (alarm.target, alarm.alarm_id))]
+        return removed
+
+    def move(self, alarm_id, target):
+        """Change an alarm's fire time, keeping its ID."""
+        alarm = self._by_id[alarm_id]
+        del self._order[bisect.bisect_left(self._order, (alarm.target, alarm_id))]
+        alarm.target = target
+        bisect.insort(self._order, (target, alarm_id))
+        return alarm
+
+    def clear(self):
+        self._by_id.clear()
+        self._order.clear()
+
+    def _reserve(self, alarm_id):
+        # Keep generated IDs ahead of any ID restored from outside
+        if isinstance(alarm_id, int):
+            current = next(self._ids)
+            self._ids = itertools.count(max(current, alarm_id + 1))
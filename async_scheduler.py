@@ -0,0 +1,203 @@
+import asyncio
+import datetime
+
+from scheduler import Scheduler
+
+
+class AsyncScheduler:
+    """
+    asyncio front end to the alarm engine.
+
+    Alarms are kept and timed by a Scheduler (its AlarmStore and
+    AlarmScheduler worker), so rules, the clock and metrics work as they do
+    for the other front ends. Fired and cancelled alarms are handed to the
+    event loop with call_soon_threadsafe(); the loop is taken from `loop`
+    or from the first coroutine that waits, so alarms can be added from any
+    thread, before the loop runs.
+
+        scheduler = AsyncScheduler()
+        alarm = scheduler.add(target)
+        await scheduler.sleep_until(alarm)
+        async for alarm in scheduler.fired():
+            ...
+
+    Pass `scheduler` to front one that is already set up (and started), or
+    `clock` for a new one; a new one is started here and stopped by close().
+    """
+    def __init__(self, scheduler=None, loop=None, clock=None):
+        self._owned = scheduler is None
+        self.scheduler = scheduler or Scheduler(clock=clock)
+        self.clock = self.scheduler.clock
+        self._loop = loop
+        self._waiters = {}  # alarm_id -> [Future], loop thread only
+        self._queues = []  # one per fired() iterator, loop thread only
+        self.scheduler.subscribe(self._on_event)
+        if self._owned:
+            self.scheduler.start()
+
+    @property
+    def loop(self):
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        return self._loop
+
+    def close(self):
+        self.scheduler.unsubscribe(self._on_event)
+        if self._owned:
+            self.scheduler.stop()
+
+    def __contains__(self, alarm_id):
+        return alarm_id in self.scheduler
+
+    def __len__(self):
+        return len(self.scheduler)
+
+    def get(self, alarm_id):
+        return self.scheduler.get(alarm_id)
+
+    def find(self, target):
+        return self.scheduler.find(target)
+
+    def list(self):
+        """Scheduled alarms ordered by fire time."""
+        return self.scheduler.list()
+
+    def add(self, target, snoozed=False, alarm_id=None, rule=None):
+        """Schedule an alarm; raises ValueError if one is already set for `target`."""
+        return self.scheduler.add(target, snoozed, alarm_id, rule)
+
+    def add_many(self, targets, snoozed=False):
+        return self.scheduler.add_many(targets, snoozed)
+
+    def cancel(self, alarm_id):
+        return self.scheduler.cancel(alarm_id)
+
+    def clear(self):
+        self.scheduler.clear()
+
+    def snooze(self, minutes=5, now=None):
+        return self.scheduler.snooze(minutes, now)
+
+    async def sleep_until(self, alarm):
+        """
+        Wait until an alarm fires and return it (for a recurring alarm, the
+        occurrence that fired).
+
+        `alarm` may be an Alarm, an alarm_id or a datetime; for a datetime
+        the alarm set for that time is used, or one is scheduled here and
+        cancelled again if the waiting task is cancelled.
+        """
+        loop = self.loop  # known before the alarm can fire, so the event reaches us
+        owned = False
+        if isinstance(alarm, datetime.datetime):
+            target = alarm
+            alarm = self.scheduler.find(target)
+            if alarm is None:
+                try:
+                    alarm = self.scheduler.add(target)
+                    owned = True
+                except ValueError:
+                    alarm = self.scheduler.find(target)  # added meanwhile by another thread
+        alarm_id = getattr(alarm, "alarm_id", alarm)
+        waiter = loop.create_future()
+        self._waiters.setdefault(alarm_id, []).append(waiter)
+        if alarm_id not in self.scheduler:
+            self._drop_waiter(alarm_id, waiter)
+            raise KeyError(f"No alarm {alarm_id!r} scheduled")
+        try:
+            return await waiter
+        except asyncio.CancelledError:
+            self._drop_waiter(alarm_id, waiter)
+            if owned:
+                self.scheduler.cancel(alarm_id)
+            raise
+
+    async def fired(self):
+        """Async iterator over alarms as they fire."""
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        self._queues.append(queue)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._queues.remove(queue)
+
+    def _drop_waiter(self, alarm_id, waiter):
+        waiters = self._waiters.get(alarm_id)
+        if waiters and waiter in waiters:
+            waiters.remove(waiter)
+            if not waiters:
+                del self._waiters[alarm_id]
+
+    def _on_event(self, event, alarm):
+        # Scheduler thread (or whichever thread changed it); only the loop
+        # touches waiters and queues. Without a loop nobody is waiting yet.
+        loop = self._loop
+        if loop is None or loop.is_closed() or event not in ("fired", "cancelled", "cancelled_many", "cleared"):
+            return
+        loop.call_soon_threadsafe(self._deliver, event, alarm)
+
+    def _deliver(self, event, alarm):
+        if event == "fired":
+            for waiter in self._waiters.pop(alarm.alarm_id, ()):
+                if not waiter.done():
+                    waiter.set_result(alarm)
+            for queue in self._queues:
+                queue.put_nowait(alarm)
+            return
+        if event == "cleared":
+            alarm_ids = list(self._waiters)
+        elif event == "cancelled_many":
+            alarm_ids = [a.alarm_id for a in alarm]
+        else:
+            alarm_ids = [alarm.alarm_id]
+        for alarm_id in alarm_ids:
+            for waiter in self._waiters.pop(alarm_id, ()):
+                if not waiter.done():
+                    waiter.cancel()
+
+
+async def countdown(seconds, on_tick=None, tick_interval=1.0):
+    """
+    Wait `seconds` against an absolute loop.time() deadline.
+
+    on_tick(remaining) is called every tick_interval, aligned back from the
+    deadline like CountdownTimer, so time spent in it never adds drift.
+    Cancel the awaiting task to stop the countdown. Returns the lateness in
+    seconds.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + seconds
+    while True:
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            return -remaining
+        if on_tick is not None:
+            on_tick(remaining)
+        if tick_interval:
+            step = remaining % tick_interval or tick_interval
+            await asyncio.sleep(min(step, deadline - loop.time()))
+        else:
+            await asyncio.sleep(remaining)
+
+
+def pump_tk(root, loop=None, interval_ms=10):
+    """
+    Drive an asyncio loop from a Tk mainloop via after() instead of a thread.
+
+    Every interval_ms the loop runs whatever callbacks are ready, then
+    control goes back to Tk.
+    """
+    if loop is None:
+        loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    def pump():
+        loop.call_soon(loop.stop)
+        loop.run_forever()
+        root.after(interval_ms, pump)
+
+    root.after(interval_ms, pump)
+    return loop
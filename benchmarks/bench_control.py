@@ -0,0 +1,138 @@
+"""
+Measure control API throughput over its Unix socket (or localhost TCP).
+
+    python benchmarks/bench_control.py [--requests 20000] [--clients 4] [--batch 100]
+
+Runs a headless Scheduler with a ControlServer in this process and reports
+requests per second for:
+  round_trip   one client, each request waits for its reply
+  pipelined    --clients clients streaming add/cancel requests
+  batched      the same requests sent as arrays of --batch
+plus how many fire events a subscriber received for a burst of alarms.
+"""
+import argparse
+import datetime
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import control_api  # noqa: E402
+from scheduler import Scheduler  # noqa: E402
+
+
+def add_requests(count, offset):
+    base = datetime.datetime.now() + datetime.timedelta(days=1)
+    return [{"id": i, "op": "add", "target": (base + datetime.timedelta(seconds=offset + i)).isoformat()}
+            for i in range(count)]
+
+
+def round_trip(address, count):
+    with control_api.connect(address) as sock:
+        reader = sock.makefile('rb')
+        start = time.perf_counter()
+        for i in range(count):
+            sock.sendall(b'{"id": %d, "op": "ping"}\n' % i)
+            reader.readline()
+        return count / (time.perf_counter() - start)
+
+
+def pipelined_client(address, requests, batch, out):
+    if batch > 1:
+        lines = [json.dumps(requests[i:i + batch]) for i in range(0, len(requests), batch)]
+    else:
+        lines = [json.dumps(r) for r in requests]
+    payload = ("\n".join(lines) + "\n").encode()
+    with control_api.connect(address) as sock:
+        reader = sock.makefile('rb')
+        # Send from a second thread so neither side's buffers fill up
+        sender = threading.Thread(target=sock.sendall, args=(payload,))
+        sender.start()
+        ok = 0
+        for _ in lines:
+            reply = json.loads(reader.readline())
+            ok += sum(r["ok"] for r in reply) if isinstance(reply, list) else reply["ok"]
+        sender.join()
+    out.append(ok)
+
+
+def pipelined(address, total, clients, batch, offset):
+    per_client = total // clients
+    threads, out = [], []
+    for c in range(clients):
+        requests = add_requests(per_client, offset + c * per_client)
+        threads.append(threading.Thread(target=pipelined_client, args=(address, requests, batch, out)))
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return {"requests_per_s": per_client * clients / elapsed, "ok": sum(out)}
+
+
+def event_stream(address, scheduler, count):
+    received = []
+    done = threading.Event()
+
+    def watch():
+        with control_api.connect(address) as sock:
+            sock.sendall(b'{"op": "subscribe"}\n')
+            for line in sock.makefile('rb'):
+                message = json.loads(line)
+                if message.get("event") == "fired":
+                    received.append(message)
+                    if len(received) == count:
+                        done.set()
+                        return
+
+    watcher = threading.Thread(target=watch, daemon=True)
+    watcher.start()
+    time.sleep(0.2)
+    base = datetime.datetime.now() + datetime.timedelta(seconds=0.5)
+    scheduler.add_many([base + datetime.timedelta(microseconds=i) for i in range(count)])
+    start = time.perf_counter()
+    done.wait(30)
+    return {"fired": count, "received": len(received), "seconds": time.perf_counter() - start}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--batch", type=int, default=100)
+    parser.add_argument("--events", type=int, default=10000)
+    parser.add_argument("--json", action="store_true", help="print raw JSON results")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        address = os.path.join(scratch, "control.sock") if control_api.DEFAULT_ADDRESS.endswith(".sock") else "127.0.0.1:8799"
+        scheduler = Scheduler()
+        server = control_api.ControlServer(scheduler, address)
+        scheduler.start()
+        server.start()
+        results = {
+            "round_trip_per_s": round_trip(address, min(args.requests, 5000)),
+            "pipelined": pipelined(address, args.requests, args.clients, 1, 0),
+            "batched": pipelined(address, args.requests, args.clients, args.batch, args.requests),
+            "events": event_stream(address, scheduler, args.events),
+        }
+        server.stop()
+        scheduler.stop()
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"round trip   {results['round_trip_per_s']:>10.0f} req/s")
+    print(f"pipelined    {results['pipelined']['requests_per_s']:>10.0f} req/s ({args.clients} clients)")
+    print(f"batched      {results['batched']['requests_per_s']:>10.0f} req/s (batches of {args.batch})")
+    events = results["events"]
+    print(f"events       {events['received']}/{events['fired']} fire events streamed in {events['seconds']:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Compare per-alarm alerts with coalesced dispatch during an alarm storm.
+
+    python benchmarks/bench_dispatch.py [--alarms 1000] [--spread 2.0] [--ui-cost 0.02]
+
+--alarms alarms come due within --spread seconds on a headless Scheduler.
+A stand-in for the Tk thread spends --ui-cost seconds per notification it
+shows (dialog, sound, blink). Reported per mode:
+  notifications  how many times the UI thread had to alert
+  sounds         how many of those played the sound
+  alert_lag      seconds from an alarm firing to it being on screen
+  fire_lateness  how late the scheduler fired (should not depend on the UI)
+"""
+import argparse
+import datetime
+import json
+import os
+import queue
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from dispatch import DEFAULT_MIN_INTERVAL, DEFAULT_WINDOW, FireDispatcher  # noqa: E402
+from scheduler import Scheduler  # noqa: E402
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else None
+
+
+def run(mode, alarms, spread, ui_cost, window, interval):
+    ui = queue.Queue()
+    lags, lateness = [], []
+    shown = threading.Event()
+    notifications = 0
+
+    def ui_thread():
+        nonlocal notifications
+        seen = 0
+        while seen < alarms:
+            batch = ui.get()
+            time.sleep(ui_cost)
+            notifications += 1
+            now = time.monotonic()
+            lags.extend(now - fired_at for fired_at in batch)
+            seen += len(batch)
+        shown.set()
+
+    audible = 0
+
+    def notify(alerts, loud):
+        nonlocal audible
+        audible += loud
+        ui.put(alerts)
+
+    dispatcher = FireDispatcher(on_notify=notify, window=window, min_interval=interval)
+    scheduler = Scheduler()
+
+    def on_event(event, alarm):
+        if event != "fired":
+            return
+        lateness.append((datetime.datetime.now() - alarm.target).total_seconds())
+        fired_at = time.monotonic()
+        if mode == "coalesced":
+            dispatcher.submit(fired_at)
+        else:
+            ui.put([fired_at])
+
+    scheduler.subscribe(on_event)
+    threading.Thread(target=ui_thread, daemon=True).start()
+    dispatcher.start()
+    scheduler.start()
+    base = datetime.datetime.now() + datetime.timedelta(seconds=0.5)
+    step = spread / alarms
+    scheduler.add_many([base + datetime.timedelta(seconds=i * step) for i in range(alarms)])
+    finished = shown.wait(0.5 + spread + alarms * ui_cost + interval + 30)
+    scheduler.stop()
+    dispatcher.stop()
+    return {
+        "complete": finished,
+        "notifications": notifications,
+        "sounds": audible if mode == "coalesced" else notifications,
+        "alert_lag_p50_s": percentile(lags, 0.5),
+        "alert_lag_max_s": max(lags, default=None),
+        "fire_lateness_p99_s": percentile(lateness, 0.99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--alarms", type=int, default=1000)
+    parser.add_argument("--spread", type=float, default=2.0, help="seconds over which the alarms come due")
+    parser.add_argument("--ui-cost", type=float, default=0.02, help="seconds the UI spends per notification")
+    parser.add_argument("--window", type=float, default=DEFAULT_WINDOW)
+    parser.add_argument("--interval", type=float, default=DEFAULT_MIN_INTERVAL)
+    parser.add_argument("--json", action="store_true", help="print raw JSON results")
+    args = parser.parse_args()
+
+    results = {mode: run(mode, args.alarms, args.spread, args.ui_cost, args.window, args.interval)
+               for mode in ("per_alarm", "coalesced")}
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for mode, r in results.items():
+        print(f"{mode:<10} notifications {r['notifications']:>6}  sounds {r['sounds']:>6}  "
+              f"alert lag p50 {r['alert_lag_p50_s']:.3f} s max {r['alert_lag_max_s']:.3f} s  "
+              f"fire lateness p99 {r['fire_lateness_p99_s'] * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+"""
+Load-test the alarm and countdown engines headless.
+
+    python benchmarks/bench_engine.py [--counts 1 100 10000 100000] [--output results.json]
+
+Sections, all reported as one JSON document:
+  fire_accuracy   lateness percentiles (ms) as the number of alarms grows,
+                  for the heap Scheduler and, up to --thread-limit, the old
+                  one-polling-thread-per-alarm model
+  countdown_drift how far ticks and the finish land from the deadline for
+                  CountdownTimer and the old sleep(1)-and-decrement loop
+  idle            CPU used and RSS per alarm while alarms wait
+  countdown_group CPU used by N named countdowns on one shared tick source,
+                  with --visible of them on screen
+  ops             add / cancel / snooze latency (us) with N alarms scheduled
+  simulation      wall time to run --simulate-days of the largest count
+                  (plus a daily recurring alarm) and a 24 h countdown on a
+                  VirtualClock, which jumps straight to each deadline
+
+Apart from the simulation, time is real but compressed so a run takes
+about a minute: alarms are spread over
+--spread seconds and countdown ticks are --tick seconds, with
+--tick-work seconds of simulated display work per tick.
+"""
+import argparse
+import datetime
+import json
+import os
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_timing_wheel import rss_bytes  # noqa: E402
+from clock import VirtualClock  # noqa: E402
+from countdown import CountdownGroup, CountdownTimer  # noqa: E402
+from recurrence import DaysRule  # noqa: E402
+from scheduler import Scheduler  # noqa: E402
+
+
+def percentiles(values):
+    if not values:
+        return None
+    values = sorted(values)
+
+    def at(p):
+        return values[min(len(values) - 1, int(p / 100 * len(values)))]
+    return {"p50": at(50), "p90": at(90), "p99": at(99), "max": values[-1], "n": len(values)}
+
+
+def spread_targets(count, lead, spread):
+    base = datetime.datetime.now() + datetime.timedelta(seconds=lead)
+    step = spread / count
+    return [base + datetime.timedelta(seconds=i * step) for i in range(count)]
+
+
+def fire_accuracy_heap(count, spread):
+    scheduler = Scheduler()
+    lateness = []
+    done = threading.Event()
+
+    def on_event(event, alarm):
+        if event == "fired":
+            lateness.append((datetime.datetime.now() - alarm.target).total_seconds() * 1000)
+            if len(lateness) == count:
+                done.set()
+
+    scheduler.subscribe(on_event)
+    # Lead time covers the bulk insert so no alarm is already overdue when added
+    scheduler.add_many(spread_targets(count, 0.5 + count * 2e-6, spread))
+    scheduler.start()
+    done.wait(spread + 30)
+    scheduler.stop()
+    return percentiles(lateness)
+
+
+def fire_accuracy_threads(count, spread):
+    # The pre-scheduler model: one thread per alarm polling the clock every second
+    lateness = []
+    lock = threading.Lock()
+
+    def alarm_thread(target):
+        while True:
+            if datetime.datetime.now() >= target:
+                with lock:
+                    lateness.append((datetime.datetime.now() - target).total_seconds() * 1000)
+                return
+            time.sleep(1)
+
+    threads = [threading.Thread(target=alarm_thread, args=(t,), daemon=True)
+               for t in spread_targets(count, 0.5, spread)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(spread + 30)
+    return percentiles(lateness)
+
+
+def countdown_drift_engine(ticks, tick, work):
+    errors = []
+    finished = threading.Event()
+    result = {}
+
+    def on_tick(remaining):
+        # Offset of this tick from its boundary, a whole number of ticks before the deadline
+        errors.append((round(remaining / tick) * tick - remaining) * 1000)
+        time.sleep(work)
+
+    def on_finish(lateness):
+        result["finish_late_ms"] = lateness * 1000
+        finished.set()
+
+    timer = CountdownTimer(ticks * tick, on_tick=on_tick, on_finish=on_finish, tick_interval=tick)
+    timer.start()
+    finished.wait(ticks * tick * 2 + 5)
+    result["tick_error_ms"] = percentiles([abs(e) for e in errors])
+    return result
+
+
+def countdown_drift_legacy(ticks, tick, work):
+    # The old run_timer loop: sleep one interval, then decrement
+    start = time.monotonic()
+    deadline = start + ticks * tick
+    errors = []
+    remaining = ticks
+    while remaining >= 0:
+        errors.append(abs(time.monotonic() - (deadline - remaining * tick)) * 1000)
+        time.sleep(work)
+        if remaining == 0:
+            break
+        time.sleep(tick)
+        remaining -= 1
+    return {"finish_late_ms": (time.monotonic() - deadline) * 1000, "tick_error_ms": percentiles(errors)}
+
+
+def idle_heap(count, seconds):
+    scheduler = Scheduler()
+    rss_before = rss_bytes()
+    targets = spread_targets(count, 3600, 3600)
+    scheduler.add_many(targets)
+    rss_after = rss_bytes()
+    scheduler.start()
+    time.sleep(0.2)  # let the worker settle into its wait
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    time.sleep(seconds)
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+    scheduler.stop()
+    return {"cpu_pct": cpu / wall * 100, "rss_per_alarm_b": (rss_after - rss_before) / count,
+            "threads": 1}
+
+
+def idle_threads(count, seconds):
+    stop = threading.Event()
+
+    def alarm_thread():
+        while not stop.is_set():
+            time.sleep(1)
+
+    rss_before = rss_bytes()
+    threads = [threading.Thread(target=alarm_thread, daemon=True) for _ in range(count)]
+    for t in threads:
+        t.start()
+    rss_after = rss_bytes()
+    time.sleep(0.2)
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    time.sleep(seconds)
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+    stop.set()
+    for t in threads:
+        t.join()
+    return {"cpu_pct": cpu / wall * 100, "rss_per_alarm_b": (rss_after - rss_before) / count,
+            "threads": count}
+
+
+def countdown_group(count, visible, seconds):
+    ticks = []
+    group = CountdownGroup(on_tick=lambda remaining: ticks.append(len(remaining)))
+    for i in range(count):
+        group.start(i, 3600 + i, visible=False)
+    group.set_visible(range(visible))
+    time.sleep(0.2)
+    ticks.clear()
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    time.sleep(seconds)
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+    group.close()
+    return {"timers": count, "visible": visible, "cpu_pct": cpu / wall * 100,
+            "ticks_per_s": len(ticks) / wall, "timers_per_tick": max(ticks, default=0)}
+
+
+def op_latency(count, samples):
+    scheduler = Scheduler()
+    scheduler.add_many(spread_targets(count, 3600, 3600))
+    scheduler.start()
+    far = datetime.datetime.now() + datetime.timedelta(days=2)
+
+    def timed(fn, n):
+        out = []
+        for i in range(n):
+            start = time.perf_counter()
+            fn(i)
+            out.append((time.perf_counter() - start) * 1e6)
+        return percentiles(out)
+
+    added = []
+    add = timed(lambda i: added.append(scheduler.add(far + datetime.timedelta(seconds=i))), samples)
+    cancel = timed(lambda i: scheduler.cancel(added[i].alarm_id), samples)
+    snooze = timed(lambda i: scheduler.snooze(5, now=far + datetime.timedelta(microseconds=i)), samples)
+    scheduler.stop()
+    return {"add_us": add, "cancel_us": cancel, "snooze_us": snooze}
+
+
+def simulate_schedule(count, days):
+    clock = VirtualClock(datetime.datetime(2030, 1, 1))
+    scheduler = Scheduler(clock=clock)
+    lateness = []
+
+    def on_event(event, alarm):
+        if event == "fired":
+            lateness.append((clock.now() - alarm.target).total_seconds() * 1000)
+
+    scheduler.subscribe(on_event)
+    start = clock.now()
+    step = days * 86400 / count
+    targets = [start + datetime.timedelta(seconds=i * step) for i in range(1, count + 1)]
+    targets.append((start + datetime.timedelta(hours=7, seconds=0.5), DaysRule(datetime.time(7, 0, 0, 500000))))
+    scheduler.add_many(targets)
+    scheduler.start()
+    begin = time.perf_counter()
+    jumps = clock.run_until(start + datetime.timedelta(days=days))
+    wall = time.perf_counter() - begin
+    scheduler.stop()
+    return {"alarms": count, "days": days, "wall_s": wall, "jumps": jumps, "fired": len(lateness),
+            "virtual_lateness_ms": percentiles(lateness)}
+
+
+def simulate_countdown(seconds):
+    clock = VirtualClock()
+    ticks = []
+    result = {}
+    timer = CountdownTimer(seconds, on_tick=ticks.append, clock=clock,
+                           on_finish=lambda lateness: result.setdefault("finish_late_ms", lateness * 1000))
+    begin = time.perf_counter()
+    timer.start()
+    clock.run_until(clock.now() + datetime.timedelta(seconds=seconds + 1))
+    result.update({"seconds": seconds, "ticks": len(ticks), "wall_s": time.perf_counter() - begin})
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--counts", type=int, nargs="+", default=[1, 10, 100, 1000, 10_000, 100_000])
+    parser.add_argument("--thread-limit", type=int, default=1000)
+    parser.add_argument("--spread", type=float, default=2.0, help="seconds alarms are spread over")
+    parser.add_argument("--ticks", type=int, default=500)
+    parser.add_argument("--tick", type=float, default=0.01, help="countdown tick in seconds")
+    parser.add_argument("--tick-work", type=float, default=0.002, help="simulated work per tick")
+    parser.add_argument("--idle", type=float, default=2.0, help="seconds to sample idle CPU")
+    parser.add_argument("--samples", type=int, default=2000, help="operations timed per op")
+    parser.add_argument("--simulate-days", type=float, default=7.0)
+    parser.add_argument("--visible", type=int, default=10, help="countdowns on screen")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    results = {
+        "python": sys.version.split()[0],
+        "platform": sys.platform,
+        "args": vars(args),
+        "fire_accuracy": [],
+        "countdown_drift": {},
+        "idle": [],
+        "ops": [],
+        "countdown_group": [],
+        "simulation": {},
+    }
+    for count in args.counts:
+        row = {"alarms": count, "heap": fire_accuracy_heap(count, args.spread), "threads": None}
+        if count <= args.thread_limit:
+            row["threads"] = fire_accuracy_threads(count, args.spread)
+        results["fire_accuracy"].append(row)
+        print(f"fire_accuracy {count} done", file=sys.stderr)
+
+    results["countdown_drift"] = {
+        "ticks": args.ticks,
+        "engine": countdown_drift_engine(args.ticks, args.tick, args.tick_work),
+        "legacy": countdown_drift_legacy(args.ticks, args.tick, args.tick_work),
+    }
+    print("countdown_drift done", file=sys.stderr)
+
+    for count in args.counts:
+        row = {"alarms": count, "heap": idle_heap(count, args.idle), "threads": None}
+        if count <= args.thread_limit:
+            row["threads"] = idle_threads(count, args.idle)
+        results["idle"].append(row)
+        results["ops"].append({"alarms": count, **op_latency(count, args.samples)})
+        results["countdown_group"].append(countdown_group(count, min(count, args.visible), args.idle))
+    print("idle/ops done", file=sys.stderr)
+
+    results["simulation"] = {
+        "schedule": simulate_schedule(max(args.counts), args.simulate_days),
+        "countdown": simulate_countdown(86400),
+    }
+    print("simulation done", file=sys.stderr)
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
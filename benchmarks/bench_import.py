@@ -0,0 +1,97 @@
+"""
+Measure bulk alarm import and export throughput.
+
+    python benchmarks/bench_import.py [--count 100000] [--json]
+
+For each format a file of `count` alarms is generated in a scratch
+directory, imported into a headless Scheduler with a ConfigStore
+subscribed, and exported again. Reports rows per second for both
+directions and how many journal records the import produced.
+"""
+import argparse
+import datetime
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import alarm_io  # noqa: E402
+from persistence import ConfigStore  # noqa: E402
+from recurrence import parse_rule  # noqa: E402
+from scheduler import Scheduler  # noqa: E402
+
+REPEATS = ["Once", "Once", "Once", "Daily", "Weekdays", "Every 15 min", "cron: */5 * * * *"]
+
+
+def make_source(path, fmt, count, start):
+    # Export from a scratch scheduler, so the files match what the app writes
+    scheduler = Scheduler()
+    entries = []
+    for i in range(count):
+        target = start + datetime.timedelta(minutes=i)
+        rule = parse_rule(REPEATS[i % len(REPEATS)], target.time(), now=target)
+        entries.append((target, rule) if rule is not None else target)
+    scheduler.add_many(entries)
+    alarm_io.export_alarms(scheduler, path, fmt)
+
+
+def run(fmt, count, scratch):
+    ext = {"csv": ".csv", "jsonl": ".jsonl", "ical": ".ics"}[fmt]
+    source = os.path.join(scratch, "source" + ext)
+    start = datetime.datetime.now().replace(second=0, microsecond=0) + datetime.timedelta(days=1)
+    make_source(source, fmt, count, start)
+
+    scheduler = Scheduler()
+    store = ConfigStore(os.path.join(scratch, f"config_{fmt}.json"), scheduler.list)
+    scheduler.subscribe(store.record)
+    begin = time.perf_counter()
+    result = alarm_io.import_alarms(scheduler, source, fmt)
+    import_time = time.perf_counter() - begin
+    records = len(store._pending)
+    begin = time.perf_counter()
+    store.flush()
+    flush_time = time.perf_counter() - begin
+
+    begin = time.perf_counter()
+    exported = alarm_io.export_alarms(scheduler, os.path.join(scratch, "export" + ext), fmt)
+    export_time = time.perf_counter() - begin
+    return {
+        "format": fmt,
+        "rows": count,
+        "added": result.added,
+        "errors": result.error_count,
+        "import_s": import_time,
+        "import_rows_per_s": count / import_time,
+        "journal_records": records,
+        "journal_write_s": flush_time,
+        "export_s": export_time,
+        "export_rows_per_s": exported / export_time,
+        "file_mb": os.path.getsize(source) / 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=100000)
+    parser.add_argument("--json", action="store_true", help="print raw JSON results")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as scratch:
+        for fmt in ("csv", "jsonl", "ical"):
+            results.append(run(fmt, args.count, scratch))
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'format':<7}{'rows':>8}{'import/s':>11}{'export/s':>11}{'journal':>9}{'write':>10}")
+    for r in results:
+        print(f"{r['format']:<7}{r['rows']:>8}{r['import_rows_per_s']:>11.0f}{r['export_rows_per_s']:>11.0f}"
+              f"{r['journal_records']:>9}{r['journal_write_s'] * 1000:>8.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
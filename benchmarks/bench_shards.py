@@ -0,0 +1,100 @@
+"""
+Measure fire throughput of the sharded scheduler against the single-process one.
+
+    python benchmarks/bench_shards.py [--alarms 20000] [--work 200] [--shards 1,2,4]
+
+--alarms alarms all come due at once and each fired alarm runs a callback
+that burns --work microseconds of CPU in pure Python. The baseline runs it
+as a Scheduler subscriber in one process; ShardedScheduler runs it in the
+shard that owns the alarm. Reported per configuration: seconds from the
+due time until the coordinator has seen every fire event, alarms fired
+per second, and speedup over the baseline. Speedup is bounded by the
+number of cores (os.cpu_count() is printed).
+"""
+import argparse
+import datetime
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from scheduler import Scheduler  # noqa: E402
+from shards import ShardedScheduler  # noqa: E402
+
+
+def burn(work_us, alarm):
+    deadline = time.perf_counter() + work_us / 1e6
+    while time.perf_counter() < deadline:
+        pass
+
+
+def run(shards, alarms, work_us):
+    if shards:
+        scheduler = ShardedScheduler(shards, shard_callback=functools.partial(burn, work_us))
+    else:
+        scheduler = Scheduler()
+    done = threading.Event()
+    fired = 0
+
+    def on_event(event, alarm):
+        nonlocal fired
+        if event != "fired":
+            return
+        if not shards:
+            burn(work_us, alarm)
+        fired += 1
+        if fired == alarms:
+            done.set()
+
+    scheduler.subscribe(on_event)
+    scheduler.start()
+    if shards:
+        scheduler.wait_ready(30)
+    due = datetime.datetime.now() + datetime.timedelta(seconds=0.5)
+    # Distinct times a microsecond apart, since one time holds one alarm
+    scheduler.add_many([due + datetime.timedelta(microseconds=i) for i in range(alarms)])
+    wait = max(0.0, (due - datetime.datetime.now()).total_seconds())
+    time.sleep(wait)
+    start = time.perf_counter()
+    finished = done.wait(60 + alarms * work_us / 1e6 * 2)
+    elapsed = time.perf_counter() - start
+    scheduler.stop()
+    return {"shards": shards, "complete": finished, "fired": fired, "seconds": elapsed,
+            "alarms_per_s": fired / elapsed if elapsed else None}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--alarms", type=int, default=20000)
+    parser.add_argument("--work", type=float, default=200, help="CPU microseconds per fired-alarm callback")
+    parser.add_argument("--shards", default=None,
+                        help="comma-separated shard counts (default: 1, 2, 4, ... up to the CPU count)")
+    parser.add_argument("--json", action="store_true", help="print raw JSON results")
+    args = parser.parse_args()
+
+    cpus = os.cpu_count() or 1
+    if args.shards:
+        counts = [int(n) for n in args.shards.split(",")]
+    else:
+        counts = [1]
+        while counts[-1] * 2 <= cpus:
+            counts.append(counts[-1] * 2)
+    results = [run(0, args.alarms, args.work)] + [run(n, args.alarms, args.work) for n in counts]
+    if args.json:
+        print(json.dumps({"cpus": cpus, "results": results}, indent=2))
+        return
+    baseline = results[0]["alarms_per_s"]
+    print(f"{cpus} CPU(s), {args.alarms} alarms, {args.work:g} us per callback")
+    for r in results:
+        name = "1 process" if not r["shards"] else f"{r['shards']} shard(s)"
+        print(f"{name:<12} {r['seconds']:>7.2f} s  {r['alarms_per_s']:>9.0f} alarms/s  "
+              f"x{r['alarms_per_s'] / baseline:.2f}" + ("" if r["complete"] else "  (incomplete)"))
+
+
+if __name__ == "__main__":
+    main()
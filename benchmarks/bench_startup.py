@@ -0,0 +1,88 @@
+"""
+Measure cold start of timer-alarm.py.
+
+    python benchmarks/bench_startup.py [--runs 5] [--json]
+
+Each run is a fresh interpreter that reports:
+  import        seconds to import the app module
+  first_frame   seconds from process start until the window is drawn
+                (needs a display; reported as null without one)
+  audio_init    seconds pygame import + mixer start take when they finally
+                run, i.e. the cost moved off the startup path
+"""
+import argparse
+import importlib.util
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(ROOT, "timer-alarm.py")
+
+
+def child():
+    start = time.perf_counter()
+    sys.path.insert(0, ROOT)
+    spec = importlib.util.spec_from_file_location("timer_alarm", APP_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    result = {"import": time.perf_counter() - start, "first_frame": None, "audio_init": None}
+
+    try:
+        app = module.TimerAlarmApp(lazy_audio=True)
+    except Exception as e:  # no display
+        result["error"] = str(e)
+    else:
+        app.update()
+        result["first_frame"] = time.perf_counter() - start
+        app.on_close()
+
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    audio_start = time.perf_counter()
+    try:
+        module.load_audio()
+        result["audio_init"] = time.perf_counter() - audio_start
+    except Exception as e:
+        result["audio_error"] = str(e)
+    print(json.dumps(result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print raw JSON results")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child()
+        return
+
+    runs = []
+    for _ in range(args.runs):
+        # Run from a scratch directory so a real config file is never touched
+        with tempfile.TemporaryDirectory() as scratch:
+            out = subprocess.run([sys.executable, os.path.abspath(__file__), "--child"],
+                capture_output=True, text=True, check=True, cwd=scratch)
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+    summary = {}
+    for key in ("import", "first_frame", "audio_init"):
+        values = [r[key] for r in runs if r.get(key) is not None]
+        summary[key] = statistics.median(values) if values else None
+    if args.json:
+        print(json.dumps({"runs": runs, "median": summary}, indent=2))
+        return
+    for key, value in summary.items():
+        shown = f"{value * 1000:8.1f} ms" if value is not None else "     n/a"
+        print(f"{key:<12}{shown}")
+    errors = {r["error"] for r in runs if "error" in r}
+    if errors:
+        print(f"first_frame unavailable: {errors.pop()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Compare the timing wheel against one thread per timer.
+
+    python benchmarks/bench_timing_wheel.py [--counts 10000 100000 1000000] [--thread-limit 10000]
+
+The wheel is driven by a fake clock so draining a full population takes as
+long as the bookkeeping, not the timeouts. The thread model uses the same
+wait-until-deadline loop the app used per alarm, and is only run up to
+--thread-limit timers because most systems cannot start a million threads.
+Memory per timer is traced Python allocations for the wheel and RSS growth
+for threads, whose stacks live outside the Python heap.
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from clock import VirtualClock
+from timing_wheel import TimingWheel
+
+
+def rss_bytes():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def bench_wheel(count, delays):
+    clock = VirtualClock()
+    wheel = TimingWheel(tick=0.01, clock=clock)
+    fired = [0]
+
+    def on_expire():
+        fired[0] += 1
+
+    start = time.perf_counter()
+    handles = [wheel.schedule(d, on_expire) for d in delays]
+    insert_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for handle in handles[::2]:
+        handle.cancel()
+    cancel_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    horizon = max(delays) + 1
+    while clock.monotonic() < horizon:
+        clock.advance(0.1)
+        wheel.advance()
+    drain_s = time.perf_counter() - start
+    assert fired[0] == count - len(handles[::2])
+    del handles
+
+    # Separate pass so tracing does not skew the timings above
+    tracemalloc.start()
+    wheel = TimingWheel(tick=0.01, clock=clock)
+    before = tracemalloc.get_traced_memory()[0]
+    handles = [wheel.schedule(d, on_expire) for d in delays]
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return {
+        "insert_us": insert_s / count * 1e6,
+        "cancel_us": cancel_s / (count - count // 2) * 1e6,
+        "drain_s": drain_s,
+        "mem_per_timer_b": used / count,
+        "threads": 1,
+    }
+
+
+def bench_threads(count, delays):
+    stops = [threading.Event() for _ in range(count)]
+
+    def timer_thread(stop, deadline):
+        while not stop.is_set():
+            if time.monotonic() >= deadline:
+                break
+            stop.wait(1)
+
+    rss_before = rss_bytes()
+    start = time.perf_counter()
+    threads = []
+    base = time.monotonic()
+    for stop, delay in zip(stops, delays):
+        t = threading.Thread(target=timer_thread, args=(stop, base + delay + 3600), daemon=True)
+        t.start()
+        threads.append(t)
+    insert_s = time.perf_counter() - start
+    rss_after = rss_bytes()
+    alive = threading.active_count()
+
+    start = time.perf_counter()
+    for stop in stops:
+        stop.set()
+    for t in threads:
+        t.join()
+    cancel_s = time.perf_counter() - start
+    return {
+        "insert_us": insert_s / count * 1e6,
+        "cancel_us": cancel_s / count * 1e6,
+        "drain_s": None,
+        "mem_per_timer_b": (rss_after - rss_before) / count,
+        "threads": alive,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--counts", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--thread-limit", type=int, default=10_000)
+    parser.add_argument("--max-delay", type=float, default=60.0)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    print(f"{'model':<8}{'timers':>10}{'insert us':>12}{'cancel us':>12}{'drain s':>10}{'mem B/timer':>13}{'threads':>9}")
+    for count in args.counts:
+        delays = [rng.uniform(0.01, args.max_delay) for _ in range(count)]
+        rows = [("wheel", bench_wheel(count, delays))]
+        if count <= args.thread_limit:
+            rows.append(("thread", bench_threads(count, delays)))
+        for model, r in rows:
+            drain = f"{r['drain_s']:.3f}" if r["drain_s"] is not None else "-"
+            print(f"{model:<8}{count:>10}{r['insert_us']:>12.2f}{r['cancel_us']:>12.2f}{drain:>10}"
+                  f"{r['mem_per_timer_b']:>13.0f}{r['threads']:>9}")
+        if count > args.thread_limit:
+            print(f"{'thread':<8}{count:>10}  skipped (above --thread-limit {args.thread_limit})")
+
+
+if __name__ == "__main__":
+    main()
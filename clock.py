@@ -0,0 +1,168 @@
+import datetime
+import math
+import threading
+import time
+
+
+class RealClock:
+    """The system clock. Engines default to this."""
+    def now(self):
+        return datetime.datetime.now()
+
+    def monotonic(self):
+        return time.monotonic()
+
+    def wait(self, cond, timeout=None):
+        """Wait on `cond` (held by the caller) for a notify or `timeout` seconds."""
+        return cond.wait(timeout)
+
+    def notify(self, cond):
+        """Wake the thread waiting on `cond`; the caller holds it."""
+        cond.notify()
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+    def start_thread(self, target, name=None):
+        thread = threading.Thread(target=target, name=name, daemon=True)
+        thread.start()
+        return thread
+
+
+REAL_CLOCK = RealClock()
+
+
+class VirtualClock:
+    """
+    Simulated clock for tests and capacity planning.
+
+    Time stands still until advance(), advance_to(), jump() or run_until()
+    moves it. Engine threads wait through wait()/sleep(), so the clock knows
+    every deadline they sleep towards: jump() goes straight to the earliest
+    one, wakes whoever waits for it and, with settle(), blocks until those
+    threads are parked again. A week of alarms therefore takes as long as
+    the work done when they fire, not a week.
+
+    Threads must be started with start_thread(), and woken with notify()
+    rather than cond.notify(), so the clock can tell a thread that is still
+    working from one that is idle.
+    """
+    def __init__(self, start=None):
+        self.start = start if start is not None else datetime.datetime.now().replace(microsecond=0)
+        self._elapsed = 0.0
+        self._lock = threading.Condition()
+        self._waiters = {}  # thread -> (deadline, cond) while parked in wait()
+        self._busy = set()  # clock threads currently running
+        self._woken = {}  # thread -> True if notify() rather than a deadline woke it
+
+    def now(self):
+        with self._lock:
+            return self.start + datetime.timedelta(seconds=self._elapsed)
+
+    def monotonic(self):
+        with self._lock:
+            return self._elapsed
+
+    def wait(self, cond, timeout=None):
+        me = threading.current_thread()
+        with self._lock:
+            if timeout is not None and timeout <= 0:
+                return False
+            deadline = math.inf if timeout is None else self._elapsed + timeout
+            self._waiters[me] = (deadline, cond)
+            self._busy.discard(me)
+            self._lock.notify_all()
+        # The caller still holds `cond`, so an advance() cannot notify it
+        # before this thread is actually waiting.
+        cond.wait()
+        with self._lock:
+            # Still registered means a plain cond.notify() woke us
+            notified = self._waiters.pop(me, None) is not None or self._woken.pop(me, False)
+            self._busy.add(me)
+        return notified
+
+    def notify(self, cond):
+        with self._lock:
+            # Mark the woken threads busy now, so settle() waits for them
+            for thread, (_, waited_on) in list(self._waiters.items()):
+                if waited_on is cond:
+                    del self._waiters[thread]
+                    self._busy.add(thread)
+                    self._woken[thread] = True
+        cond.notify_all()
+
+    def sleep(self, seconds):
+        cond = threading.Condition()
+        with cond:
+            deadline = self.monotonic() + seconds
+            while self.monotonic() < deadline:
+                self.wait(cond, deadline - self.monotonic())
+
+    def start_thread(self, target, name=None):
+        def run():
+            try:
+                target()
+            finally:
+                with self._lock:
+                    self._busy.discard(thread)
+                    self._lock.notify_all()
+
+        thread = threading.Thread(target=run, name=name, daemon=True)
+        with self._lock:
+            self._busy.add(thread)
+        thread.start()
+        return thread
+
+    def next_deadline(self):
+        """Seconds from now to the earliest timed wait, or None if nothing is timed."""
+        with self._lock:
+            deadline = min((d for d, _ in self._waiters.values()), default=math.inf)
+            return None if deadline == math.inf else max(0.0, deadline - self._elapsed)
+
+    def settle(self, timeout=10.0):
+        """Block (in real time) until every clock thread is parked or finished."""
+        with self._lock:
+            return self._lock.wait_for(lambda: not self._busy, timeout)
+
+    def advance(self, seconds):
+        if seconds < 0:
+            raise ValueError("A virtual clock only moves forward")
+        with self._lock:
+            self._elapsed += seconds
+            due = [(thread, cond) for thread, (deadline, cond) in self._waiters.items()
+                   if deadline <= self._elapsed]
+            for thread, _ in due:
+                del self._waiters[thread]
+                self._busy.add(thread)
+        for cond in {cond for _, cond in due}:
+            with cond:
+                cond.notify_all()
+
+    def advance_to(self, when):
+        """Move to a datetime; does nothing if it is already past."""
+        self.advance(max(0.0, (when - self.now()).total_seconds()))
+
+    def jump(self):
+        """Settle, go to the next deadline, settle again. False if nothing is waiting."""
+        self.settle()
+        delay = self.next_deadline()
+        if delay is None:
+            return False
+        self.advance(delay)
+        self.settle()
+        return True
+
+    def run_until(self, when):
+        """Jump deadline by deadline up to `when`; returns the number of jumps."""
+        jumps = 0
+        self.settle()
+        while True:
+            delay = self.next_deadline()
+            if delay is None or self.now() + datetime.timedelta(seconds=delay) > when:
+                break
+            self.advance(delay)
+            self.settle()
+            jumps += 1
+        self.advance_to(when)
+        self.settle()
+        return jumps
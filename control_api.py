@@ -0,0 +1,388 @@
+import asyncio
+import collections
+import itertools
+import json
+import os
+import socket
+import threading
+
+from alarm_io import next_due, parse_datetime
+from countdown import CountdownGroup
+from recurrence import EveryRule, parse_rule
+from scheduler import parse_alarm_time
+
+# Unix socket next to the config file; TCP on localhost where AF_UNIX is missing
+DEFAULT_ADDRESS = "timer_alarm.sock" if hasattr(socket, "AF_UNIX") else "127.0.0.1:8765"
+# A subscriber this far behind on its event stream is disconnected
+MAX_SUBSCRIBER_BUFFER = 1 << 20
+# Most requests accepted in one array, and the longest request line
+MAX_BATCH = 1000
+MAX_LINE = 1 << 22
+
+
+def alarm_json(alarm):
+    data = alarm.to_dict()
+    data["label"] = alarm.label
+    return data
+
+
+def parse_address(address):
+    """"host:port" or a port number for TCP, anything else is a Unix socket path."""
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit() and os.sep not in address:
+        return (host or "127.0.0.1", int(port))
+    if address.isdigit():
+        return ("127.0.0.1", int(address))
+    return address
+
+
+class ControlServer:
+    """
+    Local control endpoint for the alarm engine.
+
+    Clients send newline-delimited JSON over a Unix socket (or localhost
+    TCP). A request is an object, or an array of objects answered with an
+    array in the same order:
+
+        {"id": 1, "op": "add", "time": "07:30", "ampm": "AM", "repeat": "Weekdays"}
+        {"id": 2, "op": "add", "targets": ["2030-01-01T07:30:00", ...]}
+        {"id": 3, "op": "cancel", "ids": [4, 5]}      (or "alarm_id": 4)
+        {"id": 4, "op": "snooze", "minutes": 5}
+        {"id": 5, "op": "list", "start": 0, "count": 100}
+        {"id": 6, "op": "start_timer", "seconds": 90, "name": "tea"}
+        {"id": 7, "op": "subscribe"}
+
+    Replies are {"id": ..., "ok": true, "result": ...} or
+    {"id": ..., "ok": false, "error": "..."}. After "subscribe" the
+    connection also receives {"event": ..., ...} lines for every scheduler
+    event and finished timer.
+
+    The server runs its own asyncio loop on a daemon thread and calls the
+    thread-safe Scheduler directly, so it never waits on the Tk main loop.
+    `start_timer(seconds, name)` may be supplied by a front end; it must not
+    block (hand the work to the UI thread) and returns the timer's name.
+    Without one, timers run in a headless CountdownGroup.
+    """
+    def __init__(self, scheduler, address=DEFAULT_ADDRESS, start_timer=None):
+        self.scheduler = scheduler
+        self.address = parse_address(address)
+        self.start_timer = start_timer or self._start_countdown
+        # Headless timers never tick, so they cost nothing until they finish
+        self.timers = CountdownGroup(on_finish=self._timer_finished, clock=scheduler.clock)
+        self._timer_names = itertools.count(1)
+        self._subscribers = set()  # StreamWriters
+        self._events = collections.deque()  # filled from any thread
+        self._flush_scheduled = False
+        self._events_lock = threading.Lock()
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._ready = threading.Event()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="control-api", daemon=True)
+        self._thread.start()
+        self._ready.wait(5)
+        self.scheduler.subscribe(self.on_scheduler_event)
+
+    def stop(self):
+        self.scheduler.unsubscribe(self.on_scheduler_event)
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+        self.timers.close()
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.remove(self.address)
+
+    def on_scheduler_event(self, event, alarm):
+        if event == "cleared":
+            self.publish({"event": event})
+        elif event in ("added_many", "cancelled_many"):
+            self.publish({"event": event, "alarms": [alarm_json(a) for a in alarm]})
+        else:
+            self.publish({"event": event, "alarm": alarm_json(alarm)})
+
+    def publish(self, message):
+        """Queue an event for subscribers; safe from any thread."""
+        if self._loop is None:
+            return
+        with self._events_lock:
+            self._events.append(message)
+            if self._flush_scheduled:
+                return
+            self._flush_scheduled = True
+        # One loop wakeup per burst, however many events it holds
+        self._loop.call_soon_threadsafe(self._flush_events)
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._serve())
+        except Exception as e:
+            print(f"Control API error: {e}")
+            self._ready.set()
+            return
+        self._ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._server.close()
+            # Let open connections run their cleanup before the loop goes away
+            tasks = asyncio.all_tasks(self._loop)
+            for task in tasks:
+                task.cancel()
+            self._loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            self._loop.close()
+
+    async def _serve(self):
+        if isinstance(self.address, str):
+            if os.path.exists(self.address):
+                os.remove(self.address)  # stale socket from a crash
+            self._server = await asyncio.start_unix_server(self._handle, path=self.address, limit=MAX_LINE)
+            os.chmod(self.address, 0o600)  # only this user may control the alarms
+        else:
+            host, port = self.address
+            self._server = await asyncio.start_server(self._handle, host, port, limit=MAX_LINE)
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                writer.write(self._respond(line, writer) + b"\n")
+                # Pipelined requests are answered in one write; only wait when
+                # the client is not reading its replies
+                if writer.transport.get_write_buffer_size() > MAX_SUBSCRIBER_BUFFER:
+                    await writer.drain()
+        except (ConnectionError, ValueError):
+            pass  # client went away, or sent a line over MAX_LINE
+        except asyncio.CancelledError:
+            pass  # server shutting down
+        finally:
+            self._subscribers.discard(writer)
+            writer.close()
+
+    def _respond(self, line, writer):
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            return json.dumps({"ok": False, "error": f"Bad JSON: {e}"}).encode()
+        if isinstance(request, list):
+            if len(request) > MAX_BATCH:
+                return json.dumps({"ok": False, "error": f"Batch larger than {MAX_BATCH}"}).encode()
+            return json.dumps([self._dispatch(r, writer) for r in request]).encode()
+        return json.dumps(self._dispatch(request, writer)).encode()
+
+    def _dispatch(self, request, writer):
+        if not isinstance(request, dict):
+            return {"ok": False, "error": "Request must be an object"}
+        reply = {"id": request.get("id")}
+        if request.get("op") == "subscribe":
+            self._subscribers.add(writer)
+            reply.update(ok=True, result="subscribed")
+            return reply
+        handler = getattr(self, f"op_{request.get('op')}", None)
+        if handler is None:
+            reply.update(ok=False, error=f"Unknown op {request.get('op')!r}")
+            return reply
+        try:
+            reply.update(ok=True, result=handler(request))
+        except Exception as e:
+            # Any bad field fails this request only, not the connection or the batch
+            reply.update(ok=False, error=str(e) or type(e).__name__)
+        return reply
+
+    # Operations; each takes the request dict and returns a JSON-ready result
+
+    def op_ping(self, request):
+        return "pong"
+
+    def op_add(self, request):
+        now = self.scheduler.clock.now()
+        if "targets" in request:
+            # Same rules as a file import: past one-shot alarms are refused,
+            # recurring ones start at their next occurrence
+            entries = []
+            for item in request["targets"]:
+                target = parse_datetime(item)
+                rule = parse_rule(request.get("repeat", ""), target.time(), now=target)
+                target = next_due(target, rule, now)
+                entries.append((target, rule) if rule is not None else target)
+            return [alarm_json(a) for a in self.scheduler.add_many(entries)]
+        if "target" in request:
+            target = parse_datetime(request["target"])
+        else:
+            target = parse_alarm_time(request["time"], request.get("ampm", "AM").upper(), now=now)
+        # An interval counts from the requested time, as in the bulk path
+        rule = parse_rule(request.get("repeat", ""), target.time(), now=target)
+        if rule is not None and "target" not in request and not isinstance(rule, EveryRule):
+            # The next HH:MM may fall on a day the rule skips
+            target = rule.next_after(now)
+        target = next_due(target, rule, now)
+        return alarm_json(self.scheduler.add(target, rule=rule))
+
+    def op_cancel(self, request):
+        ids = request["ids"] if "ids" in request else [request["alarm_id"]]
+        return len(self.scheduler.cancel_many(ids))
+
+    def op_snooze(self, request):
+        return alarm_json(self.scheduler.snooze(minutes=request.get("minutes", 5)))
+
+    def op_list(self, request):
+        start = request.get("start", 0)
+        count = request.get("count", 100)
+        return {"total": len(self.scheduler), "alarms": [alarm_json(a) for a in self.scheduler.window(start, count)]}
+
+    def op_start_timer(self, request):
+        seconds = float(request["seconds"])
+        if seconds <= 0:
+            raise ValueError("seconds must be > 0")
+        return {"name": self.start_timer(seconds, request.get("name"))}
+
+    def _flush_events(self):
+        with self._events_lock:
+            events = self._events
+            self._events = collections.deque()
+            self._flush_scheduled = False
+        if not self._subscribers:
+            return
+        data = "".join(json.dumps(e) + "\n" for e in events).encode()
+        for writer in list(self._subscribers):
+            if writer.transport.get_write_buffer_size() > MAX_SUBSCRIBER_BUFFER:
+                # Never let one stalled reader grow memory without bound
+                self._subscribers.discard(writer)
+                writer.close()
+                continue
+            writer.write(data)
+
+    def _start_countdown(self, seconds, name=None):
+        if name is None:
+            name = f"timer-{next(self._timer_names)}"
+            while name in self.timers:
+                name = f"timer-{next(self._timer_names)}"
+        try:
+            self.timers.start(name, seconds)
+        except ValueError:
+            raise RuntimeError(f"Timer {name!r} is already running")
+        return name
+
+    def _timer_finished(self, name, lateness):
+        self.publish({"event": "timer_finished", "name": name, "lateness": lateness})
+
+
+def connect(address=DEFAULT_ADDRESS):
+    address = parse_address(address)
+    if isinstance(address, str):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    else:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.connect(address)
+    return sock
+
+
+def request(payload, address=DEFAULT_ADDRESS):
+    """Send one request (or a list of them) and return the reply."""
+    with connect(address) as sock:
+        sock.sendall(json.dumps(payload).encode() + b"\n")
+        return json.loads(sock.makefile('rb').readline())
+
+
+def main(argv):
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Control a running Timer & Alarm Clock")
+    parser.add_argument("--address", default=DEFAULT_ADDRESS, help="socket path or host:port")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="run a headless scheduler with the control API")
+    serve.add_argument("--journal", metavar="PATH", help="save alarms here and reload them on start")
+    serve.add_argument("--shards", metavar="N", type=int, default=0,
+                       help="time and journal alarms in N worker processes")
+    add = commands.add_parser("add", help="set an alarm")
+    add.add_argument("time", help="HH:MM (12-hour)")
+    add.add_argument("ampm", choices=["AM", "PM", "am", "pm"])
+    add.add_argument("--repeat", default="Once")
+    cancel = commands.add_parser("cancel", help="cancel alarms by ID")
+    cancel.add_argument("ids", type=int, nargs="+")
+    snooze = commands.add_parser("snooze", help="set a snoozed alarm")
+    snooze.add_argument("minutes", type=int, nargs="?", default=5)
+    commands.add_parser("list", help="list alarms")
+    timer = commands.add_parser("timer", help="start a countdown")
+    timer.add_argument("seconds", type=float)
+    timer.add_argument("name", nargs="?")
+    commands.add_parser("watch", help="print events as they happen")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        # Only the server needs these; client commands stay quick to start
+        from persistence import ConfigStore
+        from scheduler import Scheduler
+        from shards import ShardedScheduler
+
+        journal = None
+        if args.shards:
+            scheduler = ShardedScheduler(args.shards, path=args.journal)
+            scheduler.restore(scheduler.load())
+        else:
+            scheduler = Scheduler()
+            if args.journal:
+                journal = ConfigStore(args.journal, alarms_source=scheduler.list)
+                scheduler.restore(journal.load()[1])
+                scheduler.subscribe(journal.record)
+                journal.start()
+        server = ControlServer(scheduler, args.address)
+        scheduler.start()
+        server.start()
+        print(f"Listening on {args.address}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+        server.stop()
+        scheduler.stop()
+        if journal is not None:
+            journal.close()
+        return 0
+    if args.command == "watch":
+        with connect(args.address) as sock:
+            sock.sendall(b'{"op": "subscribe"}\n')
+            for line in sock.makefile('r'):
+                print(line, end="", flush=True)
+        return 0
+
+    if args.command == "add":
+        payload = {"op": "add", "time": args.time, "ampm": args.ampm, "repeat": args.repeat}
+    elif args.command == "cancel":
+        payload = {"op": "cancel", "ids": args.ids}
+    elif args.command == "snooze":
+        payload = {"op": "snooze", "minutes": args.minutes}
+    elif args.command == "list":
+        payload = {"op": "list", "count": 1000}
+    else:
+        payload = {"op": "start_timer", "seconds": args.seconds, "name": args.name}
+    reply = request(payload, args.address)
+    if not reply.get("ok"):
+        print(f"Error: {reply.get('error')}")
+        return 1
+    result = reply["result"]
+    if args.command == "list":
+        for alarm in result["alarms"]:
+            print(f"{alarm['id']:>6}  {alarm['label']}")
+        print(f"{result['total']} alarm(s) set")
+    else:
+        print(json.dumps(result))
+    return 0
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main(sys.argv[1:]))
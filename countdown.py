@@ -0,0 +1,326 @@
+import heapq
+import itertools
+import threading
+
+from clock import REAL_CLOCK
+from metrics import REGISTRY
+
+FINISH_LATENESS = REGISTRY.histogram("countdown_finish_lateness_seconds", "Time from a countdown's deadline to its finish callback")
+
+
+class CountdownTimer:
+    """
+    Countdown driven by an absolute clock.monotonic() deadline.
+
+    The worker sleeps until the next display tick or the deadline, whichever
+    comes first, and always recomputes the remaining time from the deadline,
+    so time spent in callbacks never accumulates as drift. Ticks are aligned
+    to whole multiples of tick_interval before the deadline; pass
+    tick_interval=None to wake only once, at the deadline.
+
+    Callbacks run on the timer's worker thread:
+      on_tick(remaining)    remaining seconds as a float
+      on_finish(lateness)   seconds the finish fired after the deadline
+      on_stop(remaining)    the timer was stopped before finishing
+
+    `clock` defaults to the real clock; see clock.VirtualClock for tests.
+    """
+    def __init__(self, duration, on_tick=None, on_finish=None, on_stop=None, tick_interval=1.0, clock=None):
+        if duration <= 0:
+            raise ValueError("duration must be > 0")
+        self.duration = float(duration)
+        self.on_tick = on_tick
+        self.on_finish = on_finish
+        self.on_stop = on_stop
+        self.tick_interval = tick_interval
+        self.clock = clock or REAL_CLOCK
+        self.lateness = None  # measured once the timer finishes
+        self._cond = threading.Condition()
+        self._deadline = None
+        self._paused_remaining = None  # set while paused
+        self._stopped = False
+        self._thread = None
+
+    def start(self):
+        with self._cond:
+            if self._thread is not None:
+                raise RuntimeError("Timer already started")
+            self._deadline = self.clock.monotonic() + self.duration
+        self._thread = self.clock.start_thread(self._run, name="countdown")
+
+    def pause(self):
+        with self._cond:
+            if self._paused_remaining is None and not self._stopped:
+                self._paused_remaining = max(0.0, self._deadline - self.clock.monotonic())
+                self.clock.notify(self._cond)
+
+    def resume(self):
+        with self._cond:
+            if self._paused_remaining is not None:
+                self._deadline = self.clock.monotonic() + self._paused_remaining
+                self._paused_remaining = None
+                self.clock.notify(self._cond)
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self.clock.notify(self._cond)
+
+    def is_paused(self):
+        with self._cond:
+            return self._paused_remaining is not None
+
+    def is_alive(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def remaining(self):
+        with self._cond:
+            if self._deadline is None:
+                return self.duration
+            if self._paused_remaining is not None:
+                return self._paused_remaining
+            return max(0.0, self._deadline - self.clock.monotonic())
+
+    def _next_wakeup(self, now):
+        remaining = self._deadline - now
+        if not self.tick_interval or remaining <= 0:
+            return self._deadline
+        # First tick boundary strictly after now, counting whole ticks back
+        # from the deadline (the deadline itself if under one tick is left)
+        ticks_left = int(remaining // self.tick_interval)
+        if ticks_left * self.tick_interval >= remaining:
+            ticks_left -= 1
+        return self._deadline - max(ticks_left, 0) * self.tick_interval
+
+    def _run(self):
+        last_reported = None
+        finished = False
+        while True:
+            with self._cond:
+                while self._paused_remaining is not None and not self._stopped:
+                    self.clock.wait(self._cond)
+                if self._stopped:
+                    remaining = self._paused_remaining
+                    if remaining is None:
+                        remaining = max(0.0, self._deadline - self.clock.monotonic())
+                    break
+                now = self.clock.monotonic()
+                remaining = self._deadline - now
+                if remaining <= 0:
+                    self.lateness = -remaining
+                    finished = True
+                    break
+                tick = self.on_tick is not None and remaining != last_reported
+            if tick:
+                last_reported = remaining
+                try:
+                    self.on_tick(remaining)
+                except Exception as e:
+                    print(f"Timer callback error: {e}")
+            with self._cond:
+                if self._stopped or self._paused_remaining is not None:
+                    continue
+                delay = self._next_wakeup(self.clock.monotonic()) - self.clock.monotonic()
+                if delay > 0:
+                    self.clock.wait(self._cond, delay)
+
+        if finished:
+            FINISH_LATENESS.observe(self.lateness)
+            callback, value = self.on_finish, self.lateness
+        else:
+            callback, value = self.on_stop, remaining
+        if callback:
+            try:
+                callback(value)
+            except Exception as e:
+                print(f"Timer callback error: {e}")
+
+
+class _Countdown:
+    __slots__ = ("name", "duration", "deadline", "paused_remaining", "visible", "entry")
+
+    def __init__(self, name, duration, visible):
+        self.name = name
+        self.duration = duration
+        self.deadline = None
+        self.paused_remaining = None  # set while paused
+        self.visible = visible
+        self.entry = None  # live heap entry while running
+
+
+class CountdownGroup:
+    """
+    Any number of named countdowns sharing one worker thread.
+
+    Finish deadlines live in a min-heap, so a timer costs a heap entry
+    whether or not anyone is watching it. Display ticks come from a single
+    shared tick source: every tick_interval the worker reports the
+    remaining time of the *visible* running timers in one batched call, and
+    when none are visible it sleeps until the next finish. Mark timers
+    visible or hidden with set_visible() as they scroll in and out of view.
+
+    Callbacks:
+      on_tick(remaining)          dict of name -> seconds left, worker thread
+      on_finish(name, lateness)   worker thread
+      on_stop(name, remaining)    thread that called stop()
+    """
+    def __init__(self, on_tick=None, on_finish=None, on_stop=None, tick_interval=0.25, clock=None):
+        self.on_tick = on_tick
+        self.on_finish = on_finish
+        self.on_stop = on_stop
+        self.tick_interval = tick_interval
+        self.clock = clock or REAL_CLOCK
+        self._timers = {}  # name -> _Countdown
+        self._heap = []  # [deadline, seq, name], name None once invalidated
+        self._seq = itertools.count()
+        self._ticking = set()  # names of visible running timers
+        self._next_tick = 0.0
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = None
+
+    def __contains__(self, name):
+        with self._cond:
+            return name in self._timers
+
+    def __len__(self):
+        with self._cond:
+            return len(self._timers)
+
+    def names(self):
+        with self._cond:
+            return list(self._timers)
+
+    def start(self, name, duration, visible=True):
+        if duration <= 0:
+            raise ValueError("duration must be > 0")
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("CountdownGroup is closed")
+            if name in self._timers:
+                raise ValueError(f"Timer {name!r} already exists")
+            timer = _Countdown(name, float(duration), visible)
+            self._timers[name] = timer
+            self._run_timer(timer, timer.duration)
+            if self._thread is None:
+                self._thread = self.clock.start_thread(self._run, name="countdown-group")
+            self.clock.notify(self._cond)
+
+    def pause(self, name):
+        with self._cond:
+            timer = self._timers.get(name)
+            if timer is None or timer.paused_remaining is not None:
+                return
+            timer.paused_remaining = max(0.0, timer.deadline - self.clock.monotonic())
+            timer.entry[2] = None
+            timer.entry = None
+            self._ticking.discard(name)
+
+    def resume(self, name):
+        with self._cond:
+            timer = self._timers.get(name)
+            if timer is None or timer.paused_remaining is None:
+                return
+            remaining = timer.paused_remaining
+            timer.paused_remaining = None
+            self._run_timer(timer, remaining)
+            self.clock.notify(self._cond)
+
+    def stop(self, name):
+        with self._cond:
+            timer = self._timers.pop(name, None)
+            if timer is None:
+                return None
+            remaining = self._remaining(timer)
+            if timer.entry is not None:
+                timer.entry[2] = None
+            self._ticking.discard(name)
+        if self.on_stop:
+            self.on_stop(name, remaining)
+        return remaining
+
+    def is_paused(self, name):
+        with self._cond:
+            timer = self._timers.get(name)
+            return timer is not None and timer.paused_remaining is not None
+
+    def remaining(self, name):
+        with self._cond:
+            timer = self._timers.get(name)
+            return None if timer is None else self._remaining(timer)
+
+    def duration(self, name):
+        with self._cond:
+            timer = self._timers.get(name)
+            return None if timer is None else timer.duration
+
+    def set_visible(self, names):
+        """Only these timers get ticks from now on; the rest just finish."""
+        names = set(names)
+        with self._cond:
+            for timer in self._timers.values():
+                timer.visible = timer.name in names
+            ticking = {n for n in names if n in self._timers and self._timers[n].entry is not None}
+            if ticking - self._ticking:
+                self._next_tick = 0.0  # tick now so new rows do not wait a full interval
+                self.clock.notify(self._cond)
+            self._ticking = ticking
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._timers.clear()
+            self._ticking.clear()
+            self.clock.notify(self._cond)
+
+    def _remaining(self, timer):
+        if timer.paused_remaining is not None:
+            return timer.paused_remaining
+        return max(0.0, timer.deadline - self.clock.monotonic())
+
+    def _run_timer(self, timer, remaining):
+        timer.deadline = self.clock.monotonic() + remaining
+        timer.entry = [timer.deadline, next(self._seq), timer.name]
+        heapq.heappush(self._heap, timer.entry)
+        if timer.visible:
+            self._ticking.add(timer.name)
+            self._next_tick = 0.0
+
+    def _run(self):
+        while True:
+            finished = []
+            ticks = None
+            with self._cond:
+                while not self._closed:
+                    now = self.clock.monotonic()
+                    while self._heap and (self._heap[0][2] is None or self._heap[0][0] <= now):
+                        deadline, _, name = heapq.heappop(self._heap)
+                        if name is None:
+                            continue
+                        del self._timers[name]
+                        self._ticking.discard(name)
+                        finished.append((name, now - deadline))
+                    if self._ticking and now >= self._next_tick:
+                        ticks = {name: self._timers[name].deadline - now for name in self._ticking}
+                        # Shared cadence: every visible timer is drawn in the same pass
+                        self._next_tick = (now // self.tick_interval + 1) * self.tick_interval
+                    if finished or ticks:
+                        break
+                    wake = self._heap[0][0] if self._heap else None
+                    if self._ticking:
+                        wake = self._next_tick if wake is None else min(wake, self._next_tick)
+                    self.clock.wait(self._cond, None if wake is None else wake - now)
+                if self._closed:
+                    return
+            for name, lateness in finished:
+                FINISH_LATENESS.observe(lateness)
+                if self.on_finish:
+                    try:
+                        self.on_finish(name, lateness)
+                    except Exception as e:
+                        print(f"Timer callback error: {e}")
+            if ticks and self.on_tick:
+                try:
+                    self.on_tick(ticks)
+                except Exception as e:
+                    print(f"Timer callback error: {e}")
@@ -0,0 +1,114 @@
+import threading
+
+from clock import REAL_CLOCK
+from metrics import REGISTRY
+
+ALERTS = REGISTRY.counter("alerts_total", "Alerts submitted for dispatch")
+NOTIFICATIONS = REGISTRY.counter("notifications_total", "Grouped notifications delivered")
+ALERTS_PENDING = REGISTRY.gauge("alerts_pending", "Alerts waiting for the next notification")
+NOTIFICATIONS_QUIET = REGISTRY.counter("notifications_quiet_total", "Notifications delivered without sound or raising the window")
+
+# Alerts due within this many seconds of the first share one notification
+DEFAULT_WINDOW = 0.5
+# Minimum seconds between audible notifications
+DEFAULT_MIN_INTERVAL = 5.0
+
+
+class FireDispatcher:
+    """
+    Coalesces alerts into grouped notifications.
+
+    submit() never blocks: it queues the alert and returns, so the scheduler
+    keeps firing on time whatever the front end is doing. The first alert
+    of a quiet period opens a group that stays open for `window` seconds;
+    everything submitted meanwhile is delivered with one
+    on_notify(alerts, audible) call from the dispatcher's thread. Alerts
+    are never held back beyond the window, but only one notification per
+    `min_interval` seconds is audible; the others should be shown without
+    sound or stealing focus, so a storm of due alarms rings a handful of
+    times rather than once each.
+    """
+    def __init__(self, on_notify, window=DEFAULT_WINDOW, min_interval=DEFAULT_MIN_INTERVAL, clock=None):
+        self.on_notify = on_notify
+        self.window = window
+        self.min_interval = min_interval
+        self.clock = clock or REAL_CLOCK
+        self._pending = []
+        self._group_deadline = None  # when the open group is delivered
+        self._last_audible = None  # when the last audible notification went out
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread = None
+
+    def __len__(self):
+        with self._cond:
+            return len(self._pending)
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = self.clock.start_thread(self._run, name="fire-dispatch")
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self.clock.notify(self._cond)
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1)
+        self._thread = None
+
+    def submit(self, alert):
+        with self._cond:
+            if not self._pending:
+                self._group_deadline = self.clock.monotonic() + self.window
+                self.clock.notify(self._cond)
+            self._pending.append(alert)
+            ALERTS.inc()
+            ALERTS_PENDING.set(len(self._pending))
+
+    def flush(self):
+        """Deliver whatever is pending now, on the calling thread."""
+        with self._cond:
+            alerts, audible = self._take()
+        if alerts:
+            self._deliver(alerts, audible)
+
+    def _take(self):
+        alerts = self._pending
+        self._pending = []
+        self._group_deadline = None
+        now = self.clock.monotonic()
+        audible = self._last_audible is None or now - self._last_audible >= self.min_interval
+        if audible and alerts:
+            self._last_audible = now
+        ALERTS_PENDING.set(0)
+        return alerts, audible
+
+    def _deliver(self, alerts, audible):
+        NOTIFICATIONS.inc()
+        if not audible:
+            NOTIFICATIONS_QUIET.inc()
+        try:
+            self.on_notify(alerts, audible)
+        except Exception as e:
+            print(f"Alert dispatch error: {e}")
+
+    def _run(self):
+        while True:
+            with self._cond:
+                alerts = None
+                while self._running:
+                    if not self._pending:
+                        self.clock.wait(self._cond)
+                        continue
+                    delay = self._group_deadline - self.clock.monotonic()
+                    if delay > 0:
+                        self.clock.wait(self._cond, delay)
+                        continue
+                    alerts, audible = self._take()
+                    break
+                if not self._running:
+                    return
+            self._deliver(alerts, audible)
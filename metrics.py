@@ -0,0 +1,331 @@
+import bisect
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+
+# Seconds; spans sub-millisecond timer wakeups to multi-second stalls
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help=""):
+        self.name = name
+        self.help = help
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self):
+        return self._value
+
+    def samples(self):
+        return [(self.name, self._value)]
+
+    def to_dict(self):
+        return self._value
+
+
+class Gauge:
+    """A value that goes up and down; set_function() samples it at export instead."""
+    kind = "gauge"
+
+    def __init__(self, name, help=""):
+        self.name = name
+        self.help = help
+        self._value = 0
+        self._func = None
+        self._lock = threading.Lock()
+
+    def set(self, value):
+        with self._lock:
+            self._value = value
+
+    def inc(self, amount=1):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+    def set_function(self, func):
+        self._func = func
+
+    @property
+    def value(self):
+        if self._func is not None:
+            try:
+                return self._func()
+            except Exception as e:
+                print(f"Gauge {self.name} error: {e}")
+                return None
+        return self._value
+
+    def samples(self):
+        return [(self.name, self.value)]
+
+    def to_dict(self):
+        return self.value
+
+
+class Histogram:
+    """Cumulative-bucket histogram, as Prometheus expects."""
+    kind = "histogram"
+
+    def __init__(self, name, help="", buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self._sum = 0.0
+        self._count = 0
+        self._max = None
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[i] += 1
+            self._sum += value
+            self._count += 1
+            if self._max is None or value > self._max:
+                self._max = value
+
+    @contextlib.contextmanager
+    def time(self):
+        """Observe how long the with-block takes, in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    @property
+    def count(self):
+        return self._count
+
+    def quantile(self, q):
+        """Estimate from the buckets (upper bound of the bucket holding quantile q)."""
+        with self._lock:
+            counts, total, largest = list(self._counts), self._count, self._max
+        if not total:
+            return None
+        rank = q * total
+        seen = 0
+        for bound, n in zip(self.buckets, counts):
+            seen += n
+            if seen >= rank:
+                return min(bound, largest)
+        return largest
+
+    def samples(self):
+        with self._lock:
+            counts, total, value_sum = list(self._counts), self._count, self._sum
+        out = []
+        seen = 0
+        for bound, n in zip(self.buckets, counts):
+            seen += n
+            out.append((f'{self.name}_bucket{{le="{bound}"}}', seen))
+        out.append((f'{self.name}_bucket{{le="+Inf"}}', total))
+        out.append((f"{self.name}_sum", value_sum))
+        out.append((f"{self.name}_count", total))
+        return out
+
+    def to_dict(self):
+        return {
+            "count": self._count,
+            "sum": self._sum,
+            "max": self._max,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+        }
+
+
+class Registry:
+    """
+    Named metrics, exportable as Prometheus text or a JSON-ready dict.
+
+    Engines create their metrics once at import time on the module-level
+    REGISTRY and record into them; recording is a lock and an addition,
+    cheap enough for the scheduler's fire path.
+    """
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, help, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name!r} already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name, help=""):
+        return self._get(Counter, name, help)
+
+    def gauge(self, name, help=""):
+        return self._get(Gauge, name, help)
+
+    def histogram(self, name, help="", buckets=LATENCY_BUCKETS):
+        return self._get(Histogram, name, help, buckets=buckets)
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def to_prometheus(self):
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines = []
+        for metric in metrics:
+            if metric.help:
+                lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, value in metric.samples():
+                if value is not None:
+                    lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        return {metric.name: metric.to_dict() for metric in metrics}
+
+    def write(self, path):
+        """Export to `path`: JSON for .json files, Prometheus text otherwise."""
+        if path.endswith(".json"):
+            text = json.dumps({"time": time.time(), "metrics": self.snapshot()}, indent=2)
+        else:
+            text = self.to_prometheus()
+        # Replace atomically so a scraper never reads half a file
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+
+REGISTRY = Registry()
+
+_NO_PROFILE = contextlib.nullcontext()
+# cProfile is process-wide from 3.12, when it moved to sys.monitoring
+SHARED_PROFILER = sys.version_info >= (3, 12)
+_profile_hook = None
+
+
+def set_profile_hook(hook):
+    """
+    Install hook(name) -> context manager, entered around each hot path
+    (scheduler.fire, ui_queue.drain, persistence.write, sound.play).
+    Pass None to remove it.
+    """
+    global _profile_hook
+    _profile_hook = hook
+
+
+def profile(name):
+    hook = _profile_hook
+    return _NO_PROFILE if hook is None else hook(name)
+
+
+class CProfileHook:
+    """
+    Profile hook that runs cProfile only inside the wrapped sections.
+
+        hook = CProfileHook()
+        metrics.set_profile_hook(hook)
+        ...
+        hook.dump("hot_paths.prof")   # or hook.print_stats()
+
+    From Python 3.12 a profiler sees every thread and only one may be
+    enabled per process, so all threads share one, enabled while any of
+    them is inside a section. Before 3.12 a profiler only sees the thread
+    that enabled it, so each thread gets its own. If the profiler cannot be
+    enabled (another profiling tool is active) the section runs unprofiled.
+    """
+    def __init__(self, names=None):
+        self.names = set(names) if names else None  # None profiles every section
+        self._profiles = {}  # thread id, or None for the shared one -> cProfile.Profile
+        self._active = {}  # same keys -> sections currently inside that profiler
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._warned = False
+
+    @contextlib.contextmanager
+    def __call__(self, name):
+        if (self.names is not None and name not in self.names) or getattr(self._local, "active", False):
+            yield  # filtered out, or nested inside a section already profiled
+            return
+        key = None if SHARED_PROFILER else threading.get_ident()
+        entered = self._enter(key)
+        self._local.active = True
+        try:
+            yield
+        finally:
+            self._local.active = False
+            if entered:
+                self._leave(key)
+
+    def _enter(self, key):
+        with self._lock:
+            count = self._active.get(key, 0)
+            if count == 0:
+                try:
+                    profiler = self._profiles.get(key)
+                    if profiler is None:
+                        import cProfile  # only loaded when --profile is used
+                        profiler = self._profiles[key] = cProfile.Profile()
+                    profiler.enable()
+                except Exception as e:
+                    self._warn(e)
+                    return False
+            self._active[key] = count + 1
+            return True
+
+    def _leave(self, key):
+        with self._lock:
+            count = self._active[key] - 1
+            if count:
+                self._active[key] = count
+                return
+            del self._active[key]
+            try:
+                self._profiles[key].disable()
+            except Exception as e:
+                self._warn(e)
+
+    def _warn(self, error):
+        # Once is enough; hot paths would repeat it on every call
+        if not self._warned:
+            self._warned = True
+            print(f"Profiling error: {error}")
+
+    def stats(self):
+        with self._lock:
+            profiles = list(self._profiles.values())
+            if not profiles:
+                return None
+            import pstats
+            stats = pstats.Stats(profiles[0])
+            for profiler in profiles[1:]:
+                stats.add(profiler)
+            return stats
+
+    def dump(self, path):
+        stats = self.stats()
+        if stats is not None:
+            stats.dump_stats(path)
+
+    def print_stats(self, limit=20):
+        stats = self.stats()
+        if stats is not None:
+            stats.sort_stats("cumulative").print_stats(limit)
@@ -0,0 +1,232 @@
+import json
+import os
+import threading
+import time
+
+from alarm_store import Alarm
+from metrics import REGISTRY, profile
+
+JOURNAL_WRITE = REGISTRY.histogram("config_journal_write_seconds", "Time to append and fsync a journal batch")
+SNAPSHOT_WRITE = REGISTRY.histogram("config_snapshot_write_seconds", "Time to write a compacted snapshot")
+JOURNAL_RECORDS = REGISTRY.counter("config_journal_records_total", "Changes written to the journal")
+WRITE_ERRORS = REGISTRY.counter("config_write_errors_total", "Failed config writes")
+
+
+def atomic_write_json(path, data):
+    """Write JSON to a temp file and rename it over `path`, so a crash never leaves half a file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class ConfigStore:
+    """
+    Debounced, crash-safe persistence for settings and alarms.
+
+    State is a JSON snapshot (`path`) plus an append-only journal
+    (`path` + ".journal") of changes made since the snapshot. Changes are
+    queued in memory and a background writer appends them to the journal
+    once no new change has arrived for `debounce` seconds (or after
+    `max_delay` at most), so bursts of clicks or a bulk import cost one write
+    and the UI thread never touches the disk. Once the journal holds
+    `compact_after` records, the writer folds it into a new snapshot written
+    with temp-file-and-rename.
+
+    Alarm changes come from a Scheduler subscription (pass `record` to
+    Scheduler.subscribe); `alarms_source` returns the current alarms when a
+    snapshot is taken.
+    """
+    def __init__(self, path, alarms_source=None, debounce=0.5, max_delay=2.0, compact_after=1000):
+        self.path = path
+        self.journal_path = f"{path}.journal"
+        self.alarms_source = alarms_source
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.compact_after = compact_after
+        self.settings = {}
+        self._pending = []  # journal records not yet written
+        self._journal_size = 0
+        self._first_change = None
+        self._last_change = None
+        self._cond = threading.Condition()
+        self._io_lock = threading.Lock()  # one writer at a time
+        self._running = False
+        self._thread = None
+
+    def load(self):
+        """Read the snapshot and replay the journal. Returns (settings, alarms)."""
+        settings, alarms = {}, {}
+        if os.path.isfile(self.path):
+            try:
+                with open(self.path, 'r') as f:
+                    data = json.load(f)
+                for item in data.pop("alarms", ()):
+                    # Older configs stored listbox text, which has no date
+                    if isinstance(item, dict):
+                        alarms[item["id"]] = item
+                settings.update(data)
+            except Exception as e:
+                print(f"Error loading config: {e}")
+        self._journal_size = 0
+        if os.path.isfile(self.journal_path):
+            good_lines = []
+            torn = False
+            with open(self.journal_path, 'rb') as f:
+                for line in f:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError("unterminated record")
+                        record = json.loads(line)
+                    except ValueError:
+                        torn = True  # torn line from a crash mid-append
+                        continue
+                    good_lines.append(line)
+                    op = record.get("op")
+                    if op == "settings":
+                        settings.update(record["settings"])
+                    elif op == "add":
+                        for item in record["alarms"]:
+                            alarms[item["id"]] = item
+                    elif op == "remove":
+                        for alarm_id in record["ids"]:
+                            alarms.pop(alarm_id, None)
+                    elif op == "clear":
+                        alarms.clear()
+            self._journal_size = len(good_lines)
+            if torn:
+                # Drop the fragment, or the next append would be glued onto it
+                self._rewrite_journal(good_lines)
+        self.settings = settings
+        restored = []
+        for item in alarms.values():
+            try:
+                restored.append(Alarm.from_dict(item))
+            except (KeyError, ValueError) as e:
+                print(f"Skipping unreadable alarm {item!r}: {e}")
+        return dict(settings), restored
+
+    def _rewrite_journal(self, lines):
+        tmp_path = f"{self.journal_path}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.writelines(lines)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.journal_path)
+        except OSError as e:
+            WRITE_ERRORS.inc()
+            print(f"Error repairing journal: {e}")
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        """Stop the writer and fold everything into a fresh snapshot."""
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.compact()
+
+    def update_settings(self, **settings):
+        changed = {k: v for k, v in settings.items() if self.settings.get(k) != v}
+        if changed:
+            self.settings.update(changed)
+            self._queue({"op": "settings", "settings": changed})
+
+    def record(self, event, alarm):
+        """Scheduler subscriber that journals alarm changes."""
+        if event in ("added", "rescheduled"):
+            self._queue({"op": "add", "alarms": [alarm.to_dict()]})
+        elif event == "added_many":
+            self._queue({"op": "add", "alarms": [a.to_dict() for a in alarm]})
+        elif event in ("cancelled", "fired"):
+            self._queue({"op": "remove", "ids": [alarm.alarm_id]})
+        elif event == "cancelled_many":
+            self._queue({"op": "remove", "ids": [a.alarm_id for a in alarm]})
+        elif event == "cleared":
+            self._queue({"op": "clear"})
+
+    def flush(self):
+        """Write queued changes now, on the calling thread."""
+        with self._cond:
+            records = self._pending
+            self._pending = []
+            self._first_change = None
+        if records:
+            self._append(records)
+
+    def compact(self):
+        """Replace snapshot and journal with one snapshot of the current state."""
+        if self.alarms_source is None:
+            # Without the live alarm list the journal is the only record of them
+            self.flush()
+            return
+        with self._io_lock:
+            with self._cond:
+                # Queued changes are already reflected in alarms_source
+                self._pending = []
+                self._first_change = None
+                data = dict(self.settings)
+            data["alarms"] = [alarm.to_dict() for alarm in self.alarms_source()]
+            try:
+                with profile("persistence.write"), SNAPSHOT_WRITE.time():
+                    atomic_write_json(self.path, data)
+                # Snapshot is durable, so the journal can go; replaying it
+                # again after a crash here would be harmless anyway.
+                if os.path.exists(self.journal_path):
+                    os.remove(self.journal_path)
+                self._journal_size = 0
+            except Exception as e:
+                WRITE_ERRORS.inc()
+                print(f"Error saving config: {e}")
+
+    def _queue(self, record):
+        with self._cond:
+            now = time.monotonic()
+            if self._first_change is None:
+                self._first_change = now
+            self._last_change = now
+            self._pending.append(record)
+            self._cond.notify()
+
+    def _append(self, records):
+        with self._io_lock:
+            try:
+                with profile("persistence.write"), JOURNAL_WRITE.time():
+                    with open(self.journal_path, 'a') as f:
+                        f.write("".join(json.dumps(r) + "\n" for r in records))
+                        f.flush()
+                        os.fsync(f.fileno())
+                self._journal_size += len(records)
+                JOURNAL_RECORDS.inc(len(records))
+            except Exception as e:
+                WRITE_ERRORS.inc()
+                print(f"Error saving config: {e}")
+        if self._journal_size >= self.compact_after and self.alarms_source is not None:
+            self.compact()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running and not self._pending:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                # Wait for a quiet period, but never longer than max_delay
+                now = time.monotonic()
+                due = min(self._last_change + self.debounce, self._first_change + self.max_delay)
+                if now < due:
+                    self._cond.wait(due - now)
+                    continue
+            self.flush()
@@ -0,0 +1,199 @@
+import bisect
+import datetime
+import re
+
+DAY_NAMES = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+# "Every N <unit>" intervals, in minutes; a bare number means minutes
+EVERY_PATTERN = re.compile(r"every\s+(\d+)\s*([a-z]*)")
+INTERVAL_UNITS = {
+    "": 1, "m": 1, "min": 1, "mins": 1, "minute": 1, "minutes": 1,
+    "h": 60, "hr": 60, "hrs": 60, "hour": 60, "hours": 60,
+    "d": 1440, "day": 1440, "days": 1440,
+}
+
+
+class DaysRule:
+    """Fires at a time of day on a set of weekdays (0 = Monday)."""
+    def __init__(self, at, days=range(7)):
+        self.at = at  # datetime.time
+        self.days = frozenset(days)
+        if not self.days or not self.days <= set(range(7)):
+            raise ValueError("days must be weekday numbers 0-6")
+
+    def next_after(self, after):
+        candidate = datetime.datetime.combine(after.date(), self.at)
+        if candidate <= after:
+            candidate += datetime.timedelta(days=1)
+        wd = candidate.weekday()
+        # At most 7 candidates, however far ahead the next match is
+        offset = min((d - wd) % 7 for d in self.days)
+        return candidate + datetime.timedelta(days=offset)
+
+    def describe(self):
+        if len(self.days) == 7:
+            return "Daily"
+        if self.days == frozenset(range(5)):
+            return "Weekdays"
+        if self.days == frozenset((5, 6)):
+            return "Weekends"
+        return ",".join(DAY_NAMES[d].title() for d in sorted(self.days))
+
+    def to_dict(self):
+        return {"kind": "days", "at": self.at.strftime("%H:%M"), "days": sorted(self.days)}
+
+
+class EveryRule:
+    """Fires every `minutes` minutes counted from `anchor`."""
+    def __init__(self, minutes, anchor):
+        if minutes <= 0:
+            raise ValueError("interval must be > 0 minutes")
+        self.minutes = minutes
+        self.anchor = anchor
+
+    def next_after(self, after):
+        step = datetime.timedelta(minutes=self.minutes)
+        if after < self.anchor:
+            return self.anchor
+        # Jump straight to the first step past `after`
+        return self.anchor + ((after - self.anchor) // step + 1) * step
+
+    def describe(self):
+        return f"Every {self.minutes} min"
+
+    def to_dict(self):
+        return {"kind": "every", "minutes": self.minutes, "anchor": self.anchor.isoformat()}
+
+
+def _parse_cron_field(field, lo, hi, names=None):
+    values = set()
+    for part in field.lower().split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            step = int(step_text)
+            if step <= 0:
+                raise ValueError(f"Bad step in cron field {field!r}")
+        if part == "*":
+            start, end = lo, hi
+        else:
+            bounds = part.split("-", 1)
+            numbers = [names.index(b[:3]) + lo if names and b[:3] in names else int(b) for b in bounds]
+            start = numbers[0]
+            end = numbers[-1] if len(numbers) == 2 or step == 1 else hi
+        if not lo <= start <= end <= hi:
+            raise ValueError(f"Cron field {field!r} out of range {lo}-{hi}")
+        values.update(range(start, end + 1, step))
+    return sorted(values)
+
+
+class CronRule:
+    """
+    Standard five-field cron expression: minute hour day-of-month month
+    day-of-week (0 or 7 = Sunday). Like cron, when both day fields are
+    restricted a day matches if either one does.
+    """
+    MONTH_NAMES = ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]
+    DOW_NAMES = ["sun", "mon", "tue", "wed", "thu", "fri", "sat"]
+
+    def __init__(self, expression):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError("Cron expression needs 5 fields: minute hour day month weekday")
+        self.expression = " ".join(fields)
+        self.minutes = _parse_cron_field(fields[0], 0, 59)
+        self.hours = _parse_cron_field(fields[1], 0, 23)
+        self.mdays = set(_parse_cron_field(fields[2], 1, 31))
+        self.months = _parse_cron_field(fields[3], 1, 12, self.MONTH_NAMES)
+        # Cron counts Sunday as 0 (or 7); datetime.weekday() counts Monday as 0
+        self.wdays = {(d - 1) % 7 for d in _parse_cron_field(fields[4], 0, 7, self.DOW_NAMES)}
+        self.mday_any = fields[2] == "*"
+        self.wday_any = fields[4] == "*"
+
+    def _day_matches(self, day):
+        in_month = day.day in self.mdays
+        in_week = day.weekday() in self.wdays
+        if self.mday_any or self.wday_any:
+            return in_month and in_week
+        return in_month or in_week
+
+    def next_after(self, after):
+        t = after.replace(second=0, microsecond=0) + datetime.timedelta(minutes=1)
+        # Each step jumps a whole field, so this walks days, never minutes;
+        # the bound only trips for impossible dates such as "0 0 30 2 *".
+        for _ in range(5000):
+            if t.month not in self.months:
+                i = bisect.bisect_right(self.months, t.month)
+                year = t.year + (i == len(self.months))
+                t = datetime.datetime(year, self.months[i % len(self.months)], 1)
+                continue
+            if not self._day_matches(t):
+                t = datetime.datetime(t.year, t.month, t.day) + datetime.timedelta(days=1)
+                continue
+            if t.hour not in self.hours:
+                i = bisect.bisect_right(self.hours, t.hour)
+                if i == len(self.hours):
+                    t = datetime.datetime(t.year, t.month, t.day) + datetime.timedelta(days=1)
+                else:
+                    t = t.replace(hour=self.hours[i], minute=0)
+                continue
+            if t.minute not in self.minutes:
+                i = bisect.bisect_right(self.minutes, t.minute)
+                if i == len(self.minutes):
+                    t = t.replace(minute=0) + datetime.timedelta(hours=1)
+                else:
+                    t = t.replace(minute=self.minutes[i])
+                continue
+            return t
+        raise ValueError(f"Cron expression {self.expression!r} never fires")
+
+    def describe(self):
+        return f"cron: {self.expression}"
+
+    def to_dict(self):
+        return {"kind": "cron", "expression": self.expression}
+
+
+def rule_from_dict(data):
+    kind = data["kind"]
+    if kind == "days":
+        return DaysRule(datetime.datetime.strptime(data["at"], "%H:%M").time(), data["days"])
+    if kind == "every":
+        return EveryRule(data["minutes"], datetime.datetime.fromisoformat(data["anchor"]))
+    if kind == "cron":
+        return CronRule(data["expression"])
+    raise ValueError(f"Unknown recurrence kind {kind!r}")
+
+
+def parse_rule(text, at, now=None):
+    """
+    Build a rule from the Repeat box. `at` is the alarm's time of day, used
+    by day-based rules. Accepts "Once" (returns None), "Daily", "Weekdays",
+    "Weekends", day lists like "Mon,Wed,Fri", "Every 15 min" (also hours or
+    days, converted to minutes) and "cron: */5 * * * *".
+    """
+    text = text.strip()
+    lowered = text.lower()
+    if lowered in ("", "once"):
+        return None
+    if lowered == "daily":
+        return DaysRule(at)
+    if lowered == "weekdays":
+        return DaysRule(at, range(5))
+    if lowered == "weekends":
+        return DaysRule(at, (5, 6))
+    if lowered.startswith("cron:"):
+        return CronRule(text[5:])
+    if lowered.startswith("every"):
+        match = EVERY_PATTERN.fullmatch(lowered)
+        if match is None or match.group(2) not in INTERVAL_UNITS:
+            raise ValueError("Write intervals as e.g. 'Every 15 min', 'Every 2 hours' or 'Every 3 days'")
+        if now is None:
+            now = datetime.datetime.now()
+        minutes = int(match.group(1)) * INTERVAL_UNITS[match.group(2)]
+        return EveryRule(minutes, now.replace(second=0, microsecond=0))
+    days = []
+    for name in lowered.replace(" ", "").split(","):
+        if name[:3] not in DAY_NAMES:
+            raise ValueError(f"Unknown repeat rule {text!r}")
+        days.append(DAY_NAMES.index(name[:3]))
+    return DaysRule(at, days)
@@ -0,0 +1,429 @@
+import datetime
+import heapq
+import itertools
+import threading
+
+from alarm_store import Alarm, AlarmStore, format_alarm_time
+from clock import REAL_CLOCK
+from metrics import REGISTRY, profile
+
+# Entry states kept on each heap entry
+PENDING = "pending"
+PAUSED = "paused"
+REMOVED = "removed"
+
+# Upper bound for a single wait, so wall-clock changes (NTP, DST, suspend)
+# are noticed without polling every second.
+MAX_WAIT = 30.0
+
+FIRE_LATENESS = REGISTRY.histogram("alarm_fire_lateness_seconds", "Time from an alarm's target to its fire event")
+ALARMS_ADDED = REGISTRY.counter("alarms_added_total", "Alarms scheduled")
+ALARMS_CANCELLED = REGISTRY.counter("alarms_cancelled_total", "Alarms cancelled before firing")
+ALARMS_FIRED = REGISTRY.counter("alarms_fired_total", "Alarms fired")
+ALARMS_SCHEDULED = REGISTRY.gauge("alarms_scheduled", "Alarms currently scheduled")
+
+
+class AlarmScheduler:
+    """
+    Single-threaded alarm engine.
+
+    Alarms live in a min-heap keyed by fire time. One worker thread sleeps on
+    a condition variable until the earliest deadline, so idle cost does not
+    grow with the number of scheduled alarms. Cancelled and rescheduled
+    entries are marked removed and discarded lazily when they reach the top.
+    Time comes from `clock` (see clock.py), so a VirtualClock can drive it.
+    """
+    def __init__(self, on_fire, clock=None):
+        self.on_fire = on_fire  # called as on_fire(alarm_id, target) from the worker
+        self.clock = clock or REAL_CLOCK
+        self._heap = []  # [target, seq, alarm_id, state]
+        self._entries = {}  # alarm_id -> heap entry
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._running = False
+        self._worker = None
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._worker = self.clock.start_thread(self._run, name="alarm-scheduler")
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self.clock.notify(self._cond)
+        if self._worker and self._worker is not threading.current_thread():
+            self._worker.join(timeout=1)
+        self._worker = None
+
+    def __contains__(self, alarm_id):
+        with self._cond:
+            return alarm_id in self._entries
+
+    def __len__(self):
+        with self._cond:
+            return len(self._entries)
+
+    def schedule(self, alarm_id, target):
+        """Add an alarm, or move it if alarm_id is already scheduled."""
+        with self._cond:
+            old = self._entries.get(alarm_id)
+            if old is not None:
+                old[3] = REMOVED
+            entry = [target, next(self._seq), alarm_id, PENDING]
+            self._entries[alarm_id] = entry
+            heapq.heappush(self._heap, entry)
+            # Only wake the worker if the earliest deadline changed
+            if self._heap[0] is entry:
+                self.clock.notify(self._cond)
+
+    reschedule = schedule
+
+    def schedule_many(self, items):
+        """Schedule (alarm_id, target) pairs under one lock acquisition."""
+        with self._cond:
+            entries = []
+            for alarm_id, target in items:
+                old = self._entries.get(alarm_id)
+                if old is not None:
+                    old[3] = REMOVED
+                entry = [target, next(self._seq), alarm_id, PENDING]
+                self._entries[alarm_id] = entry
+                entries.append(entry)
+            if len(entries) > len(self._heap) // 8:
+                self._heap.extend(entries)
+                heapq.heapify(self._heap)
+            else:
+                for entry in entries:
+                    heapq.heappush(self._heap, entry)
+            self.clock.notify(self._cond)
+
+    def cancel(self, alarm_id):
+        with self._cond:
+            entry = self._entries.pop(alarm_id, None)
+            if entry is None:
+                return False
+            entry[3] = REMOVED
+            self._compact()
+            return True
+
+    def cancel_many(self, alarm_ids):
+        with self._cond:
+            for alarm_id in alarm_ids:
+                entry = self._entries.pop(alarm_id, None)
+                if entry is not None:
+                    entry[3] = REMOVED
+            self._compact()
+
+    def clear(self):
+        with self._cond:
+            self._heap.clear()
+            self._entries.clear()
+            self.clock.notify(self._cond)
+
+    def pause(self, alarm_id):
+        with self._cond:
+            entry = self._entries.get(alarm_id)
+            if entry is not None and entry[3] == PENDING:
+                entry[3] = PAUSED
+
+    def resume(self, alarm_id):
+        with self._cond:
+            entry = self._entries.get(alarm_id)
+            if entry is None or entry[3] != PAUSED:
+                return
+            # Re-push so an overdue alarm fires as soon as it is resumed
+            entry[3] = REMOVED
+            new_entry = [entry[0], next(self._seq), alarm_id, PENDING]
+            self._entries[alarm_id] = new_entry
+            heapq.heappush(self._heap, new_entry)
+            self.clock.notify(self._cond)
+
+    def target_of(self, alarm_id):
+        with self._cond:
+            entry = self._entries.get(alarm_id)
+            return entry[0] if entry is not None else None
+
+    def _compact(self):
+        # Rebuild the heap once removed entries dominate it
+        if len(self._heap) > 64 and len(self._heap) > 2 * len(self._entries):
+            self._heap = [e for e in self._heap if e[3] != REMOVED]
+            heapq.heapify(self._heap)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                fired = None
+                while self._running:
+                    # Drop cancelled entries sitting at the top of the heap
+                    while self._heap and self._heap[0][3] == REMOVED:
+                        heapq.heappop(self._heap)
+                    if not self._heap:
+                        self.clock.wait(self._cond)
+                        continue
+                    entry = self._heap[0]
+                    delay = (entry[0] - self.clock.now()).total_seconds()
+                    if delay > 0:
+                        self.clock.wait(self._cond, min(delay, MAX_WAIT))
+                        continue
+                    heapq.heappop(self._heap)
+                    if entry[3] == PAUSED:
+                        # Paused alarms stay known but leave the heap until resumed
+                        continue
+                    entry[3] = REMOVED
+                    del self._entries[entry[2]]
+                    fired = entry
+                    break
+                if not self._running:
+                    return
+            try:
+                self.on_fire(fired[2], fired[0])
+            except Exception as e:
+                print(f"Alarm callback error: {e}")
+
+
+def parse_alarm_time(alarm_time, ampm, now=None):
+    """Next datetime matching a 12-hour "HH:MM" time and "AM"/"PM"."""
+    t = datetime.datetime.strptime(alarm_time.strip(), "%I:%M")
+    hour = t.hour
+    if ampm == "PM" and hour != 12:
+        hour += 12
+    if ampm == "AM" and hour == 12:
+        hour = 0
+    if now is None:
+        now = datetime.datetime.now()
+    target = now.replace(hour=hour, minute=t.minute, second=0, microsecond=0)
+    if target <= now:
+        target += datetime.timedelta(days=1)
+    return target
+
+
+class Scheduler:
+    """
+    Headless alarm scheduler.
+
+    Owns an AlarmStore of alarm records and an AlarmScheduler engine keyed
+    by the store's alarm IDs, and has no Tk dependency, so it can run as a
+    daemon or inside tests. Front ends subscribe to changes instead of
+    polling:
+
+        subscriber(event, alarm)
+
+    where event is one of "added", "cancelled", "fired", "rescheduled" or
+    "cleared" (alarm is None for "cleared"). A recurring alarm is moved to
+    its next occurrence in place when it fires: "fired" carries a copy with
+    the time that just fired, then "rescheduled" the live alarm. Bulk
+    operations send a single "added_many" or "cancelled_many" event whose
+    second argument is the list of alarms, so front ends can apply them as
+    one update. Subscribers are called on the thread that caused the
+    change; "fired" comes from the engine's worker thread.
+
+    Pass a clock.VirtualClock as `clock` to run a schedule in simulated time.
+    """
+    def __init__(self, clock=None):
+        self.clock = clock or REAL_CLOCK
+        self._store = AlarmStore()
+        self._subscribers = []
+        self._lock = threading.RLock()
+        self._engine = AlarmScheduler(on_fire=self._on_fire, clock=self.clock)
+
+    def start(self):
+        self._engine.start()
+
+    def stop(self):
+        self._engine.stop()
+
+    def subscribe(self, callback):
+        with self._lock:
+            self._subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def __contains__(self, alarm_id):
+        with self._lock:
+            return alarm_id in self._store
+
+    def __len__(self):
+        with self._lock:
+            return len(self._store)
+
+    def get(self, alarm_id):
+        with self._lock:
+            return self._store.get(alarm_id)
+
+    def find(self, target):
+        with self._lock:
+            return self._store.find(target)
+
+    def list(self):
+        """Scheduled alarms ordered by fire time."""
+        with self._lock:
+            return self._store.list()
+
+    def window(self, start, count):
+        """Up to `count` alarms from position `start` in fire-time order."""
+        with self._lock:
+            return self._store.slice(start, start + count)
+
+    def window_after(self, key, count):
+        """Up to `count` alarms after `key` in fire-time order, and the key to resume from."""
+        with self._lock:
+            return self._store.slice_after(key, count)
+
+    def index_of(self, alarm_id):
+        with self._lock:
+            return self._store.index_of(alarm_id)
+
+    def add(self, target, snoozed=False, alarm_id=None, rule=None):
+        """Schedule an alarm; raises ValueError if one is already set for `target`."""
+        with self._lock:
+            if self._store.find(target) is not None:
+                raise ValueError(f"Alarm for {format_alarm_time(target)} already set")
+            alarm = self._store.add(target, snoozed, alarm_id, rule)
+            self._engine.schedule(alarm.alarm_id, target)
+        ALARMS_ADDED.inc()
+        ALARMS_SCHEDULED.inc()
+        self._notify("added", alarm)
+        return alarm
+
+    def add_many(self, targets, snoozed=False):
+        """
+        Schedule many alarms as one operation. Each entry is a datetime or a
+        (datetime, rule) pair. Times that are already set, or repeated within
+        `targets`, are skipped. Returns the new alarms.
+        """
+        with self._lock:
+            seen = set()
+            items = []
+            for target in targets:
+                rule = None
+                if isinstance(target, tuple):
+                    target, rule = target
+                if target in seen or self._store.find(target) is not None:
+                    continue
+                seen.add(target)
+                items.append((target, snoozed, rule))
+            alarms = self._store.add_many(items)
+            self._engine.schedule_many((alarm.alarm_id, alarm.target) for alarm in alarms)
+        if alarms:
+            ALARMS_ADDED.inc(len(alarms))
+            ALARMS_SCHEDULED.inc(len(alarms))
+            self._notify("added_many", alarms)
+        return alarms
+
+    def restore(self, alarms):
+        """Schedule saved Alarm records, keeping their IDs, as one bulk add."""
+        alarms = list(alarms)
+        with self._lock:
+            self._store.restore(alarms)
+            self._engine.schedule_many((alarm.alarm_id, alarm.target) for alarm in alarms)
+        if alarms:
+            ALARMS_SCHEDULED.inc(len(alarms))
+            self._notify("added_many", alarms)
+        return alarms
+
+    def cancel_many(self, alarm_ids):
+        with self._lock:
+            alarms = self._store.remove_many(alarm_ids)
+            self._engine.cancel_many(alarm.alarm_id for alarm in alarms)
+        if alarms:
+            ALARMS_CANCELLED.inc(len(alarms))
+            ALARMS_SCHEDULED.dec(len(alarms))
+            self._notify("cancelled_many", alarms)
+        return alarms
+
+    def cancel(self, alarm_id):
+        with self._lock:
+            alarm = self._store.remove(alarm_id)
+            if alarm is None:
+                return None
+            self._engine.cancel(alarm_id)
+        ALARMS_CANCELLED.inc()
+        ALARMS_SCHEDULED.dec()
+        self._notify("cancelled", alarm)
+        return alarm
+
+    def clear(self):
+        with self._lock:
+            removed = len(self._store)
+            self._store.clear()
+            self._engine.clear()
+        ALARMS_CANCELLED.inc(removed)
+        ALARMS_SCHEDULED.dec(removed)
+        self._notify("cleared", None)
+
+    def snooze(self, minutes=5, now=None):
+        """Schedule a snoozed alarm `minutes` from now."""
+        if now is None:
+            now = self.clock.now()
+        return self.add(now + datetime.timedelta(minutes=minutes), snoozed=True)
+
+    def _on_fire(self, alarm_id, target):
+        with profile("scheduler.fire"):
+            self._fire(alarm_id, target)
+
+    def _fire(self, alarm_id, target):
+        rescheduled = None
+        with self._lock:
+            alarm = self._store.get(alarm_id)
+            if alarm is None:
+                return
+            FIRE_LATENESS.observe(max(0.0, (self.clock.now() - target).total_seconds()))
+            ALARMS_FIRED.inc()
+            if alarm.rule is None:
+                self._store.remove(alarm_id)
+                ALARMS_SCHEDULED.dec()
+                fired = alarm
+            else:
+                fired = Alarm(alarm_id, target, alarm.snoozed, alarm.rule)
+                try:
+                    # Skip occurrences missed while asleep rather than replaying them
+                    next_target = alarm.rule.next_after(max(target, self.clock.now()))
+                except ValueError as e:
+                    print(f"Dropping recurring alarm {alarm_id}: {e}")
+                    self._store.remove(alarm_id)
+                    ALARMS_SCHEDULED.dec()
+                else:
+                    self._store.move(alarm_id, next_target)
+                    self._engine.schedule(alarm_id, next_target)
+                    rescheduled = alarm
+        self._notify("fired", fired)
+        if rescheduled is not None:
+            self._notify("rescheduled", rescheduled)
+
+    def _notify(self, event, alarm):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(event, alarm)
+            except Exception as e:
+                print(f"Scheduler subscriber error: {e}")
+
+
+if __name__ == "__main__":
+    # Headless use: python scheduler.py 07:30 AM 06:15 PM ...
+    import sys
+    import time
+
+    args = sys.argv[1:]
+    if not args or len(args) % 2:
+        print("Usage: python scheduler.py HH:MM AM|PM [HH:MM AM|PM ...]")
+        sys.exit(2)
+    scheduler = Scheduler()
+    scheduler.subscribe(lambda event, alarm: print(f"{event}: {alarm}"))
+    for alarm_time, ampm in zip(args[::2], args[1::2]):
+        scheduler.add(parse_alarm_time(alarm_time, ampm.upper()))
+    scheduler.start()
+    try:
+        while len(scheduler):
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    scheduler.stop()
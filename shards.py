@@ -0,0 +1,409 @@
+import glob
+import multiprocessing
+import multiprocessing.connection
+import os
+import re
+import signal
+import threading
+import zlib
+
+from metrics import REGISTRY
+from persistence import ConfigStore
+from scheduler import AlarmScheduler, Scheduler
+
+# Matches "<path>.shard3" and "<path>.shard3.journal"
+SHARD_FILE = re.compile(r"\.shard(\d+)(?:\.journal)?$")
+# How long stop() waits for a shard to save and exit before killing it
+SHARD_STOP_TIMEOUT = 10.0
+# A shard that dies is restarted from the coordinator's alarms this many times
+SHARD_MAX_RESTARTS = 5
+
+SHARD_BATCHES = REGISTRY.counter("shard_fire_batches_total", "Batches of fire events received from shard processes")
+SHARDS_ALIVE = REGISTRY.gauge("scheduler_shards_alive", "Shard processes running")
+SHARD_RESTARTS = REGISTRY.counter("shard_restarts_total", "Shard processes restarted after dying")
+
+
+def shard_of(alarm_id, shards):
+    """Home shard of an alarm ID; the same in every process and every run."""
+    return zlib.crc32(str(alarm_id).encode()) % shards
+
+
+def shard_path(path, index):
+    return f"{path}.shard{index}"
+
+
+def saved_shards(path):
+    """Indexes of the shards that have a snapshot or journal next to `path`."""
+    indexes = set()
+    for name in glob.glob(glob.escape(path) + ".shard*"):
+        match = SHARD_FILE.search(name)
+        if match:
+            indexes.add(int(match.group(1)))
+    return indexes
+
+
+def load_shards(path):
+    """Alarms saved in the shard files next to `path`, from any shard count."""
+    alarms = {}
+    for index in sorted(saved_shards(path)):
+        _, saved = ConfigStore(shard_path(path, index)).load()
+        for alarm in saved:
+            alarms[alarm.alarm_id] = alarm
+    return list(alarms.values())
+
+
+def remove_shards(path, keep=0):
+    """Delete the files of shards numbered `keep` and up."""
+    for index in saved_shards(path):
+        if index >= keep:
+            for name in (shard_path(path, index), shard_path(path, index) + ".journal"):
+                try:
+                    os.remove(name)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    print(f"Error removing old shard file {name}: {e}")
+
+
+class ShardWorker:
+    """
+    One shard process: an AlarmScheduler for the alarms it owns and,
+    with `path`, its own ConfigStore journal.
+
+    The first message on `commands` is the shard's initial alarms; once they
+    are scheduled the journal is compacted to exactly those, so files left
+    by an earlier run (perhaps with another shard count) are replaced
+    atomically. Fired alarms are sent back on `events` in batches, as many
+    as have come due since the last send, and `on_fire(alarm)` then runs
+    here, in parallel with the other shards.
+    """
+    def __init__(self, index, path, commands, events, on_fire=None):
+        self.index = index
+        self.commands = commands
+        self.events = events
+        self.on_fire = on_fire
+        self.alarms = {}  # alarm_id -> Alarm owned by this shard
+        self._lock = threading.Lock()
+        self.journal = ConfigStore(path, alarms_source=self.owned) if path else None
+        self.engine = AlarmScheduler(on_fire=self.fired)
+        self._outbox = []
+        self._cond = threading.Condition()
+        self._running = True
+
+    def owned(self):
+        with self._lock:
+            return list(self.alarms.values())
+
+    def run(self):
+        # The coordinator decides when shards stop. Ctrl+C or a kill sent to
+        # the whole process group is its to handle; if it dies, the closed
+        # pipe stops the shard and the journal is still saved.
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        try:
+            _, initial = self.commands.recv()
+        except EOFError:
+            return
+        self.op_schedule(initial, record=False)
+        if self.journal is not None:
+            self.journal.compact()
+            self.journal.start()
+        self.engine.start()
+        self.events.send(("ready", self.index))
+        sender = threading.Thread(target=self._send, daemon=True)
+        sender.start()
+        try:
+            while True:
+                try:
+                    op, payload = self.commands.recv()
+                except EOFError:
+                    break  # coordinator went away
+                if op == "stop":
+                    break
+                getattr(self, f"op_{op}")(payload)
+        finally:
+            self.engine.stop()
+            with self._cond:
+                self._running = False
+                self._cond.notify()
+            sender.join(timeout=5)
+            if self.journal is not None:
+                self.journal.close()
+
+    def op_schedule(self, alarms, record=True):
+        with self._lock:
+            for alarm in alarms:
+                self.alarms[alarm.alarm_id] = alarm
+        self.engine.schedule_many((alarm.alarm_id, alarm.target) for alarm in alarms)
+        if record and self.journal is not None and alarms:
+            self.journal.record("added_many", alarms)
+
+    def op_cancel(self, alarm_ids):
+        with self._lock:
+            removed = [a for a in (self.alarms.pop(i, None) for i in alarm_ids) if a is not None]
+        self.engine.cancel_many(alarm.alarm_id for alarm in removed)
+        if self.journal is not None and removed:
+            self.journal.record("cancelled_many", removed)
+
+    def op_clear(self, payload):
+        with self._lock:
+            self.alarms.clear()
+        self.engine.clear()
+        if self.journal is not None:
+            self.journal.record("cleared", None)
+
+    def fired(self, alarm_id, target):
+        # A recurring alarm comes back from the coordinator with its next time
+        with self._lock:
+            alarm = self.alarms.pop(alarm_id, None)
+        if alarm is None:
+            return
+        with self._cond:
+            self._outbox.append((alarm_id, target))
+            self._cond.notify()
+        if self.journal is not None:
+            self.journal.record("fired", alarm)
+        if self.on_fire is not None:
+            try:
+                self.on_fire(alarm)
+            except Exception as e:
+                print(f"Shard {self.index} callback error: {e}")
+
+    def _send(self):
+        while True:
+            with self._cond:
+                while self._running and not self._outbox:
+                    self._cond.wait()
+                batch = self._outbox
+                self._outbox = []
+            if batch:
+                try:
+                    self.events.send(("fired", batch))
+                except OSError:
+                    return  # coordinator went away
+            elif not self._running:
+                return
+
+
+def run_shard(index, path, commands, events, on_fire=None):
+    """Entry point of a shard process."""
+    ShardWorker(index, path, commands, events, on_fire).run()
+
+
+class ShardPool:
+    """
+    Engine for ShardedScheduler with the AlarmScheduler interface.
+
+    Each alarm is routed by shard_of(alarm_id) to one of `shards` worker
+    processes, which time it and send it back when it fires; one listener
+    thread merges those events and passes them to on_fire(alarm_id, target)
+    like an AlarmScheduler would. Full alarm records are taken from `store`,
+    so shards can journal them and run `shard_callback` with them; `lock`
+    is the lock the owner holds while changing `store`.
+
+    A shard that dies is restarted with its alarms from `store` (alarms it
+    had fired but not yet reported fire late rather than never), up to
+    SHARD_MAX_RESTARTS times, after which the error is printed.
+    """
+    def __init__(self, shards, store, on_fire, path=None, shard_callback=None, lock=None):
+        if shards < 1:
+            raise ValueError("A shard pool needs at least one shard")
+        self.shards = shards
+        self.store = store
+        self.on_fire = on_fire
+        self.path = path
+        self.shard_callback = shard_callback
+        self.lock = lock or threading.RLock()
+        self._context = None
+        self._restarts = [0] * shards
+        self._processes = []
+        self._commands = []  # per shard, the coordinator's sending end
+        self._events = []  # per shard, the coordinator's receiving end
+        self._send_lock = threading.Lock()
+        self._ready = set()
+        self.ready = threading.Event()
+        self._stopping = False
+        self._listener = None
+
+    def start(self, alarms):
+        """Start the shard processes and give each its share of `alarms`."""
+        if self._processes:
+            return
+        # spawn rather than fork: the coordinator usually has Tk and other threads running
+        self._context = multiprocessing.get_context("spawn")
+        for index in range(self.shards):
+            process, commands, events = self._spawn(index)
+            self._processes.append(process)
+            self._commands.append(commands)
+            self._events.append(events)
+        SHARDS_ALIVE.set(self.shards)
+        for index, part in enumerate(self._partition(alarms)):
+            self._send(index, "schedule", part)
+        self._listener = threading.Thread(target=self._listen, name="shard-listener", daemon=True)
+        self._listener.start()
+
+    def _spawn(self, index):
+        command_out, command_in = self._context.Pipe(duplex=False)
+        event_out, event_in = self._context.Pipe(duplex=False)
+        path = shard_path(self.path, index) if self.path else None
+        process = self._context.Process(
+            target=run_shard,
+            args=(index, path, command_out, event_in, self.shard_callback),
+            name=f"alarm-shard-{index}",
+            daemon=True,
+        )
+        process.start()
+        command_out.close()
+        event_in.close()
+        return process, command_in, event_out
+
+    def _restart(self, index):
+        """Replace a dead shard; returns its new event connection, or None."""
+        if self._restarts[index] >= SHARD_MAX_RESTARTS:
+            print(f"ERROR: alarm shard {index} keeps dying; its alarms will not fire until restart")
+            return None
+        self._restarts[index] += 1
+        SHARD_RESTARTS.inc()
+        # Hold the owner's lock so no change slips between the snapshot and the new pipe
+        with self.lock:
+            alarms = [alarm for alarm in self.store if shard_of(alarm.alarm_id, self.shards) == index]
+            process, commands, events = self._spawn(index)
+            with self._send_lock:
+                self._commands[index].close()
+                self._processes[index] = process
+                self._commands[index] = commands
+                self._events[index] = events
+            self._send(index, "schedule", alarms)
+        print(f"Alarm shard {index} exited unexpectedly; restarted with {len(alarms)} alarm(s)")
+        return events
+
+    def stop(self):
+        if not self._processes:
+            return
+        self._stopping = True
+        for index in range(self.shards):
+            self._send(index, "stop", None)
+        for process in self._processes:
+            process.join(SHARD_STOP_TIMEOUT)
+            if process.is_alive():
+                print(f"Alarm shard {process.name} did not stop; killing it")
+                process.kill()
+        if self._listener is not None:
+            self._listener.join(timeout=5)
+        with self._send_lock:
+            for conn in self._commands:
+                conn.close()
+            self._processes, self._commands, self._events = [], [], []
+        SHARDS_ALIVE.set(0)
+
+    def schedule(self, alarm_id, target):
+        """Add an alarm, or move it; the store already holds its new target."""
+        alarm = self.store.get(alarm_id)
+        if alarm is not None:
+            self._send(shard_of(alarm_id, self.shards), "schedule", [alarm])
+
+    reschedule = schedule
+
+    def schedule_many(self, items):
+        alarms = [self.store.get(alarm_id) for alarm_id, _ in items]
+        for index, part in enumerate(self._partition(a for a in alarms if a is not None)):
+            if part:
+                self._send(index, "schedule", part)
+
+    def cancel(self, alarm_id):
+        self._send(shard_of(alarm_id, self.shards), "cancel", [alarm_id])
+
+    def cancel_many(self, alarm_ids):
+        parts = [[] for _ in range(self.shards)]
+        for alarm_id in alarm_ids:
+            parts[shard_of(alarm_id, self.shards)].append(alarm_id)
+        for index, part in enumerate(parts):
+            if part:
+                self._send(index, "cancel", part)
+
+    def clear(self):
+        for index in range(self.shards):
+            self._send(index, "clear", None)
+
+    def _partition(self, alarms):
+        parts = [[] for _ in range(self.shards)]
+        for alarm in alarms:
+            parts[shard_of(alarm.alarm_id, self.shards)].append(alarm)
+        return parts
+
+    def _send(self, index, op, payload):
+        # Before start() the store is the only record; start() sends it all
+        with self._send_lock:
+            if not self._commands:
+                return
+            try:
+                self._commands[index].send((op, payload))
+            except OSError as e:
+                print(f"Alarm shard {index} error: {e}")
+
+    def _listen(self):
+        events = {conn: index for index, conn in enumerate(self._events)}
+        while events:
+            for conn in multiprocessing.connection.wait(list(events)):
+                try:
+                    kind, payload = conn.recv()
+                except (EOFError, OSError):
+                    index = events.pop(conn)
+                    conn.close()
+                    replacement = None if self._stopping else self._restart(index)
+                    if replacement is not None:
+                        events[replacement] = index
+                    else:
+                        SHARDS_ALIVE.dec()
+                    continue
+                if kind == "fired":
+                    SHARD_BATCHES.inc()
+                    for alarm_id, target in payload:
+                        try:
+                            self.on_fire(alarm_id, target)
+                        except Exception as e:
+                            print(f"Alarm callback error: {e}")
+                elif kind == "ready":
+                    self._ready.add(payload)
+                    if len(self._ready) == self.shards and not self.ready.is_set():
+                        # Alarms from shards beyond the current count now live in the new shards' snapshots
+                        if self.path:
+                            remove_shards(self.path, keep=self.shards)
+                        self.ready.set()
+
+
+class ShardedScheduler(Scheduler):
+    """
+    Scheduler whose alarms are timed in `shards` worker processes.
+
+    The coordinator (this object) keeps the full AlarmStore, so listing,
+    lookups, duplicate checks and subscriber events behave exactly as in
+    Scheduler. Timing, journaling and `shard_callback` run in the shards,
+    with each alarm owned by one shard chosen by a hash of its ID, so the
+    per-alarm work spreads over the cores. With `path`, shard i journals to
+    `path`.shard<i> via ConfigStore; load() reads those files back.
+
+    `shard_callback(alarm)` is called in the owning shard's process for each
+    fired alarm; it must be picklable (a module-level function or a
+    functools.partial of one). Shards use the real clock.
+    """
+    def __init__(self, shards, path=None, shard_callback=None):
+        super().__init__()
+        self.path = path
+        self._engine = ShardPool(shards, self._store, self._on_fire, path, shard_callback, lock=self._lock)
+
+    @property
+    def shards(self):
+        return self._engine.shards
+
+    def load(self):
+        """Alarms saved by an earlier run's shards, for restore() before start()."""
+        return load_shards(self.path) if self.path else []
+
+    def start(self):
+        with self._lock:
+            self._engine.start(self._store.list())
+
+    def wait_ready(self, timeout=None):
+        """Block until every shard has scheduled its initial alarms."""
+        return self._engine.ready.wait(timeout)
@@ -0,0 +1,16 @@
+import datetime
+
+import alarm_io
+from scheduler import Scheduler
+
+
+def test_export_walk_survives_cancel_midway():
+    scheduler = Scheduler()
+    base = datetime.datetime.now() + datetime.timedelta(days=1)
+    alarms = scheduler.add_many([base + datetime.timedelta(minutes=i) for i in range(3000)])
+    walked = []
+    for alarm in alarm_io.iter_alarms(scheduler):
+        walked.append(alarm.alarm_id)
+        if len(walked) == 10:
+            scheduler.cancel(alarms[0].alarm_id)
+    assert walked == [a.alarm_id for a in alarms]
@@ -0,0 +1,46 @@
+import datetime
+
+import pytest
+
+from alarm_store import AlarmStore
+
+BASE = datetime.datetime(2030, 1, 1, 7, 0)
+
+
+def at(minutes):
+    return BASE + datetime.timedelta(minutes=minutes)
+
+
+def test_ids_are_stable_and_never_reused():
+    store = AlarmStore()
+    a, b, c = (store.add(at(m)) for m in (30, 10, 20))
+    assert [a.alarm_id, b.alarm_id, c.alarm_id] == [1, 2, 3]
+    store.remove(b.alarm_id)
+    d = store.add(at(10))
+    assert d.alarm_id == 4
+    assert store.get(a.alarm_id) is a
+    assert b.alarm_id not in store
+
+
+def test_index_follows_fire_time_order():
+    store = AlarmStore()
+    alarms = [store.add(at(m)) for m in (50, 10, 40, 20, 30)]
+    ordered = sorted(alarms, key=lambda alarm: alarm.target)
+    assert store.list() == ordered
+    assert [store.index_of(alarm.alarm_id) for alarm in ordered] == list(range(5))
+    assert [store.at(i) for i in range(5)] == ordered
+    assert store.find(at(40)) is alarms[2]
+    assert store.find(at(45)) is None
+
+    moved = store.move(alarms[1].alarm_id, at(60))
+    assert moved.alarm_id == alarms[1].alarm_id
+    assert store.index_of(moved.alarm_id) == 4
+    assert store.find(at(10)) is None
+
+
+def test_explicit_ids_are_reserved():
+    store = AlarmStore()
+    store.add(at(0), alarm_id=7)
+    with pytest.raises(ValueError):
+        store.add(at(1), alarm_id=7)
+    assert store.add(at(2)).alarm_id == 8
@@ -0,0 +1,79 @@
+import asyncio
+import datetime
+
+import pytest
+
+from async_scheduler import AsyncScheduler
+from clock import VirtualClock
+from recurrence import EveryRule
+
+START = datetime.datetime(2030, 1, 1, 7, 0)
+
+
+def minutes(n):
+    return START + datetime.timedelta(minutes=n)
+
+
+@pytest.fixture
+def clock():
+    return VirtualClock(START)
+
+
+@pytest.fixture
+def scheduler(clock):
+    scheduler = AsyncScheduler(clock=clock)
+    yield scheduler
+    scheduler.close()
+
+
+def test_add_outside_a_running_loop(scheduler):
+    # e.g. from a Tk callback before the loop is pumped
+    alarm = scheduler.add(minutes(5))
+    assert scheduler.list() == [alarm]
+
+
+def test_sleep_until_a_recurring_alarm(clock, scheduler):
+    alarm = scheduler.add(minutes(10), rule=EveryRule(10, minutes(10)))
+
+    async def main():
+        waiter = asyncio.ensure_future(scheduler.sleep_until(alarm))
+        await asyncio.sleep(0)
+        clock.run_until(minutes(10))
+        return await asyncio.wait_for(waiter, 5)
+
+    fired = asyncio.run(main())
+    assert (fired.alarm_id, fired.target) == (alarm.alarm_id, minutes(10))
+    assert scheduler.get(alarm.alarm_id).target == minutes(20)
+
+
+def test_fired_iterator_and_cancel(clock, scheduler):
+    async def main():
+        first = scheduler.add(minutes(2))
+        cancelled = scheduler.add(minutes(3))
+        second = scheduler.add(minutes(1))
+        waiter = asyncio.ensure_future(scheduler.sleep_until(cancelled))
+        fired = scheduler.fired()
+        pending = asyncio.ensure_future(fired.__anext__())
+        await asyncio.sleep(0)
+        scheduler.cancel(cancelled.alarm_id)
+        clock.run_until(minutes(5))
+        seen = [await asyncio.wait_for(pending, 5), await asyncio.wait_for(fired.__anext__(), 5)]
+        await fired.aclose()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        return seen == [second, first]
+
+    assert asyncio.run(main())
+
+
+def test_sleep_until_a_datetime_cleans_up_when_cancelled(scheduler):
+    async def main():
+        task = asyncio.ensure_future(scheduler.sleep_until(minutes(30)))
+        await asyncio.sleep(0)
+        assert len(scheduler) == 1
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    assert len(scheduler) == 0
@@ -0,0 +1,83 @@
+import datetime
+import threading
+
+import pytest
+
+from clock import VirtualClock
+from countdown import CountdownTimer
+from scheduler import MAX_WAIT, Scheduler
+
+START = datetime.datetime(2030, 1, 1, 7, 0)
+
+
+def test_time_only_moves_when_told():
+    clock = VirtualClock(START)
+    assert clock.now() == START and clock.monotonic() == 0.0
+    clock.advance(90)
+    assert clock.now() == START + datetime.timedelta(seconds=90)
+    assert clock.monotonic() == 90.0
+    with pytest.raises(ValueError):
+        clock.advance(-1)
+    assert not clock.jump()  # nothing is waiting
+
+
+def test_run_until_jumps_from_deadline_to_deadline():
+    clock = VirtualClock(START)
+    scheduler = Scheduler(clock=clock)
+    seen = []
+    scheduler.subscribe(lambda event, alarm: event == "fired" and seen.append(clock.now()))
+    scheduler.start()
+    try:
+        targets = [START + datetime.timedelta(hours=h) for h in (1, 2, 24)]
+        scheduler.add_many(targets)
+        end = START + datetime.timedelta(hours=3)
+        # The engine never sleeps longer than MAX_WAIT, so that is the longest jump
+        assert clock.run_until(end) == 3 * 3600 / MAX_WAIT
+        assert clock.now() == end
+        assert seen == targets[:2]
+        assert clock.next_deadline() == MAX_WAIT
+    finally:
+        scheduler.stop()
+
+
+def test_settle_waits_for_ticks_and_finish():
+    clock = VirtualClock(START)
+    ticks, finished = [], []
+    timer = CountdownTimer(5, on_tick=ticks.append, on_finish=finished.append, clock=clock)
+    timer.start()
+    clock.settle()
+    assert ticks == [5.0]
+    clock.run_until(START + datetime.timedelta(seconds=10))
+    assert ticks == [5.0, 4.0, 3.0, 2.0, 1.0]
+    assert finished == [0.0]
+
+
+def test_settle_waits_for_a_thread_woken_by_notify():
+    clock = VirtualClock(START)
+    cond = threading.Condition()
+    work = []
+    done = []
+
+    def worker():
+        with cond:
+            while True:
+                while not work:
+                    clock.wait(cond)
+                item = work.pop()
+                if item is None:
+                    return
+                done.append(item)
+
+    clock.start_thread(worker)
+    clock.settle()
+    for item in range(50):
+        with cond:
+            work.append(item)
+            clock.notify(cond)
+        # settle() must not return before the woken worker has run
+        assert clock.settle()
+        assert done[-1] == item
+    with cond:
+        work.append(None)
+        clock.notify(cond)
+    assert clock.settle()
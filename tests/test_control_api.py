@@ -0,0 +1,36 @@
+import datetime
+
+import pytest
+
+from clock import VirtualClock
+from control_api import ControlServer
+from scheduler import Scheduler
+
+
+@pytest.fixture
+def server():
+    clock = VirtualClock(datetime.datetime(2030, 1, 1, 23, 56))
+    server = ControlServer(Scheduler(clock=clock), "127.0.0.1:0")
+    yield server
+    server.timers.close()
+
+
+def added(server, request):
+    alarm = server.scheduler.get(server.op_add(dict(request, op="add"))["id"])
+    return alarm.target, alarm.rule.next_after(alarm.target)
+
+
+def test_interval_counts_from_the_requested_target(server):
+    assert added(server, {"target": "2030-01-02T00:00", "repeat": "Every 15 min"}) == (
+        datetime.datetime(2030, 1, 2, 0, 0), datetime.datetime(2030, 1, 2, 0, 15))
+
+
+def test_interval_counts_from_the_requested_time(server):
+    assert added(server, {"time": "07:30", "ampm": "PM", "repeat": "Every 2 hours"}) == (
+        datetime.datetime(2030, 1, 2, 19, 30), datetime.datetime(2030, 1, 2, 21, 30))
+
+
+def test_day_rule_skips_to_a_matching_day(server):
+    # 2030-01-02 is a Wednesday, so the first weekend 07:30 is Saturday's
+    assert added(server, {"time": "07:30", "ampm": "AM", "repeat": "Weekends"}) == (
+        datetime.datetime(2030, 1, 5, 7, 30), datetime.datetime(2030, 1, 6, 7, 30))
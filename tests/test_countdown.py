@@ -0,0 +1,91 @@
+import datetime
+
+import pytest
+
+from clock import VirtualClock
+from countdown import CountdownGroup, CountdownTimer
+
+START = datetime.datetime(2030, 1, 1, 7, 0)
+
+
+def seconds(n):
+    return START + datetime.timedelta(seconds=n)
+
+
+@pytest.fixture
+def clock():
+    return VirtualClock(START)
+
+
+@pytest.fixture
+def group(clock):
+    group = CountdownGroup(on_tick=lambda remaining: group.ticks.append(remaining),
+                           on_finish=lambda name, lateness: group.finished.append((name, clock.monotonic(), lateness)),
+                           on_stop=lambda name, remaining: group.stopped.append((name, remaining)),
+                           tick_interval=1.0, clock=clock)
+    group.ticks, group.finished, group.stopped = [], [], []
+    yield group
+    group.close()
+
+
+def test_only_visible_timers_tick(clock, group):
+    group.start("shown", 10)
+    group.start("hidden", 20, visible=False)
+    clock.settle()
+    clock.advance(1)
+    clock.settle()
+    assert group.ticks == [{"shown": 10.0}, {"shown": 9.0}]
+    group.set_visible(["hidden"])
+    clock.settle()
+    # A timer that scrolls into view is drawn at once, not on the next tick
+    assert group.ticks[-1] == {"hidden": 19.0}
+    clock.advance(1)
+    clock.settle()
+    assert group.ticks[-1] == {"hidden": 18.0}
+
+
+def test_hidden_timers_finish_without_ticking(clock, group):
+    group.start("b", 20, visible=False)
+    group.start("a", 10, visible=False)
+    clock.run_until(seconds(30))
+    assert group.ticks == []
+    assert group.finished == [("a", 10.0, 0.0), ("b", 20.0, 0.0)]
+    assert len(group) == 0
+
+
+def test_pause_and_resume(clock, group):
+    group.start("tea", 10, visible=False)
+    clock.run_until(seconds(3))
+    group.pause("tea")
+    assert group.is_paused("tea")
+    clock.run_until(seconds(100))
+    assert group.finished == []
+    assert group.remaining("tea") == 7.0
+    group.resume("tea")
+    assert not group.is_paused("tea")
+    clock.run_until(seconds(200))
+    assert group.finished == [("tea", 107.0, 0.0)]
+
+
+def test_stop_reports_remaining(clock, group):
+    group.start("egg", 10, visible=False)
+    clock.run_until(seconds(4))
+    assert group.stop("egg") == 6.0
+    assert group.stopped == [("egg", 6.0)]
+    assert group.stop("egg") is None
+    with pytest.raises(ValueError):
+        group.start("egg", 0)
+
+
+def test_timer_survives_a_failing_tick_callback(clock, capsys):
+    finished = []
+
+    def on_tick(remaining):
+        raise RuntimeError("redraw failed")
+
+    timer = CountdownTimer(3, on_tick=on_tick, on_finish=finished.append, clock=clock)
+    timer.start()
+    assert not timer.is_paused()
+    clock.run_until(seconds(5))
+    assert finished == [0.0]
+    assert "Timer callback error: redraw failed" in capsys.readouterr().out
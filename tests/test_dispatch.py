@@ -0,0 +1,32 @@
+from clock import VirtualClock
+from dispatch import FireDispatcher
+
+
+def test_alerts_are_grouped_and_never_held_past_the_window():
+    clock = VirtualClock()
+    delivered = []
+    dispatcher = FireDispatcher(lambda alerts, audible: delivered.append((clock.monotonic(), alerts, audible)),
+                                window=0.5, min_interval=5.0, clock=clock)
+    dispatcher.start()
+    try:
+        clock.settle()
+        for alert in ("a", "b", "c"):
+            dispatcher.submit(alert)
+        clock.advance(0.5)
+        clock.settle()
+        dispatcher.submit("d")
+        clock.advance(1.0)
+        clock.settle()
+        clock.advance(5.0)
+        clock.settle()
+        dispatcher.submit("e")
+        clock.advance(0.5)
+        clock.settle()
+    finally:
+        dispatcher.stop()
+    assert [(alerts, audible) for _, alerts, audible in delivered] == [
+        (["a", "b", "c"], True),
+        (["d"], False),  # within min_interval: shown at once, but quietly
+        (["e"], True),
+    ]
+    assert delivered[1][0] <= 1.5
@@ -0,0 +1,62 @@
+import cProfile
+import threading
+
+import pytest
+
+import metrics
+from metrics import CProfileHook
+
+
+class OneAtATimeProfile:
+    """Stands in for cProfile.Profile on 3.12+, where only one may be enabled."""
+    enabled = 0
+    created = 0
+
+    def __init__(self):
+        type(self).created += 1
+
+    def enable(self):
+        if type(self).enabled:
+            raise ValueError("Another profiling tool is already active")
+        type(self).enabled += 1
+
+    def disable(self):
+        type(self).enabled -= 1
+
+
+@pytest.fixture
+def one_profiler(monkeypatch):
+    OneAtATimeProfile.enabled = OneAtATimeProfile.created = 0
+    monkeypatch.setattr(cProfile, "Profile", OneAtATimeProfile)
+    monkeypatch.setattr(metrics, "SHARED_PROFILER", True)
+
+
+def test_overlapping_sections_share_one_profiler(one_profiler):
+    hook = CProfileHook()
+    inside = threading.Barrier(2)
+    ran = []
+
+    def section(name):
+        with hook(name):
+            inside.wait(5)  # both threads are in a section at once
+            ran.append(name)
+
+    threads = [threading.Thread(target=section, args=(name,)) for name in ("a", "b")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert sorted(ran) == ["a", "b"]
+    assert OneAtATimeProfile.created == 1
+    assert OneAtATimeProfile.enabled == 0
+
+
+def test_profiler_errors_never_reach_the_section(one_profiler, capsys):
+    OneAtATimeProfile.enabled = 1  # some other tool holds the profiler
+    hook = CProfileHook()
+    ran = []
+    for _ in range(3):
+        with hook("scheduler.fire"):
+            ran.append(True)
+    assert ran == [True] * 3
+    assert capsys.readouterr().out.count("Profiling error") == 1
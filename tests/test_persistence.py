@@ -0,0 +1,34 @@
+import datetime
+
+from alarm_store import Alarm
+from persistence import ConfigStore
+
+
+def crash_mid_append(store):
+    # What a crash part way through _append leaves behind
+    with open(store.journal_path, 'a') as f:
+        f.write('{"op": "add", "alarms": [{"id": 9')
+
+
+def test_torn_journal_survives_repeated_crashes(tmp_path):
+    path = str(tmp_path / "config.json")
+    target = datetime.datetime(2030, 1, 1, 7, 30)
+
+    store = ConfigStore(path)
+    store.load()
+    store.record("added", Alarm(1, target))
+    store.flush()
+    crash_mid_append(store)
+
+    store = ConfigStore(path)
+    assert [a.alarm_id for a in store.load()[1]] == [1]
+    store.record("added", Alarm(2, target + datetime.timedelta(hours=1)))
+    store.flush()
+    crash_mid_append(store)
+
+    store = ConfigStore(path)
+    assert sorted(a.alarm_id for a in store.load()[1]) == [1, 2]
+    store.record("cancelled", Alarm(1, target))
+    store.flush()
+
+    assert [a.alarm_id for a in ConfigStore(path).load()[1]] == [2]
@@ -0,0 +1,53 @@
+import datetime
+
+import pytest
+
+from recurrence import CronRule, DaysRule, parse_rule
+
+# 2030-01-01 is a Tuesday
+TUE = datetime.datetime(2030, 1, 1, 10, 0)
+
+
+def dt(day, hour, minute=0):
+    return datetime.datetime(2030, 1, day, hour, minute)
+
+
+def test_cron_with_both_day_fields_matches_either():
+    rule = CronRule("0 9 15 * 1")  # the 15th, or any Monday
+    assert rule.next_after(TUE) == dt(7, 9)
+    assert rule.next_after(dt(7, 9)) == dt(14, 9)
+    assert rule.next_after(dt(14, 9)) == dt(15, 9)
+
+
+@pytest.mark.parametrize("weekday", ["0", "7", "sun", "SUN"])
+def test_cron_sunday_spellings(weekday):
+    assert CronRule(f"30 8 * * {weekday}").next_after(TUE) == dt(6, 8, 30)
+
+
+def test_cron_that_never_fires_raises():
+    with pytest.raises(ValueError):
+        CronRule("0 0 30 2 *").next_after(TUE)
+
+
+@pytest.mark.parametrize("days, after, expected", [
+    (range(5), dt(4, 8), dt(7, 7)),  # Friday after 07:00 -> Monday
+    ([0], dt(7, 7), dt(14, 7)),  # exactly at the time -> a week later
+    ((5, 6), dt(6, 23), dt(12, 7)),  # Sunday night -> next Saturday
+])
+def test_days_rule_wraps_round_the_week(days, after, expected):
+    assert DaysRule(datetime.time(7, 0), days).next_after(after) == expected
+
+
+@pytest.mark.parametrize("text, minutes", [
+    ("Every 15 min", 15),
+    ("every 2 hours", 120),
+    ("Every 3 days", 3 * 1440),
+    ("every 45", 45),
+])
+def test_every_converts_units_to_minutes(text, minutes):
+    assert parse_rule(text, None).minutes == minutes
+
+
+def test_every_rejects_unknown_units():
+    with pytest.raises(ValueError):
+        parse_rule("Every 2 weeks", None)
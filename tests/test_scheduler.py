@@ -0,0 +1,100 @@
+import datetime
+
+import pytest
+
+from clock import VirtualClock
+from scheduler import AlarmScheduler, Scheduler
+
+START = datetime.datetime(2030, 1, 1, 7, 0)
+
+
+def minutes(n):
+    return START + datetime.timedelta(minutes=n)
+
+
+@pytest.fixture
+def clock():
+    return VirtualClock(START)
+
+
+@pytest.fixture
+def engine(clock):
+    fired = []
+    engine = AlarmScheduler(lambda alarm_id, target: fired.append((alarm_id, clock.now())), clock=clock)
+    engine.fired = fired
+    engine.start()
+    yield engine
+    engine.stop()
+
+
+def test_alarms_fire_in_target_order_and_on_time(clock, engine):
+    for alarm_id, n in (("c", 3), ("a", 1), ("d", 4), ("b", 2)):
+        engine.schedule(alarm_id, minutes(n))
+    clock.run_until(minutes(10))
+    assert engine.fired == [("a", minutes(1)), ("b", minutes(2)), ("c", minutes(3)), ("d", minutes(4))]
+    assert len(engine) == 0
+
+
+def test_cancelled_and_moved_alarms(clock, engine):
+    for i in range(5):
+        engine.schedule(i, minutes(i + 1))
+    assert engine.cancel(1)
+    assert not engine.cancel(1)
+    engine.reschedule(0, minutes(10))
+    clock.run_until(minutes(5))
+    assert [alarm_id for alarm_id, _ in engine.fired] == [2, 3, 4]
+    assert engine.target_of(0) == minutes(10)
+    clock.run_until(minutes(10))
+    assert engine.fired[-1] == (0, minutes(10))
+
+
+def test_paused_alarm_waits_for_resume(clock, engine):
+    engine.schedule("x", minutes(1))
+    engine.pause("x")
+    clock.run_until(minutes(5))
+    assert engine.fired == []
+    assert "x" in engine
+    engine.resume("x")
+    clock.settle()
+    # Overdue by now, so it fires as soon as it is resumed
+    assert engine.fired == [("x", minutes(5))]
+
+
+@pytest.fixture
+def scheduler(clock):
+    scheduler = Scheduler(clock=clock)
+    scheduler.events = []
+    scheduler.subscribe(lambda event, alarm: scheduler.events.append((event, alarm)))
+    scheduler.start()
+    yield scheduler
+    scheduler.stop()
+
+
+def fired(scheduler):
+    return [alarm for event, alarm in scheduler.events if event == "fired"]
+
+
+def test_scheduler_fires_in_order_and_skips_cancelled(clock, scheduler):
+    late = scheduler.add(minutes(30))
+    cancelled = scheduler.add(minutes(10))
+    early = scheduler.add(minutes(20))
+    assert scheduler.list() == [cancelled, early, late]
+    assert scheduler.cancel(cancelled.alarm_id) is cancelled
+    assert scheduler.cancel(cancelled.alarm_id) is None
+    with pytest.raises(ValueError):
+        scheduler.add(late.target)
+    clock.run_until(minutes(60))
+    assert fired(scheduler) == [early, late]
+    assert len(scheduler) == 0
+
+
+def test_snooze_uses_the_scheduler_clock(clock, scheduler):
+    clock.advance(60)
+    alarm = scheduler.snooze(5)
+    assert alarm.snoozed
+    assert alarm.target == minutes(6)
+    assert scheduler.events == [("added", alarm)]
+    clock.run_until(minutes(5))
+    assert fired(scheduler) == []
+    clock.run_until(minutes(6))
+    assert fired(scheduler) == [alarm]
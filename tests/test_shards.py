@@ -0,0 +1,41 @@
+import datetime
+import threading
+
+from shards import ShardedScheduler, load_shards, remove_shards, saved_shards, shard_of
+
+
+def test_dead_shard_is_restarted_with_its_alarms(tmp_path):
+    scheduler = ShardedScheduler(2, path=str(tmp_path / "config.json"))
+    fired = []
+    done = threading.Event()
+
+    def on_event(event, alarm):
+        if event == "fired":
+            fired.append(alarm.alarm_id)
+            if len(fired) == 20:
+                done.set()
+
+    scheduler.subscribe(on_event)
+    scheduler.start()
+    try:
+        assert scheduler.wait_ready(30)
+        due = datetime.datetime.now() + datetime.timedelta(seconds=2)
+        alarms = scheduler.add_many([due + datetime.timedelta(milliseconds=i) for i in range(20)])
+        victim = shard_of(alarms[0].alarm_id, 2)
+        scheduler._engine._processes[victim].kill()
+        assert done.wait(30)
+        assert sorted(fired) == sorted(a.alarm_id for a in alarms)
+    finally:
+        scheduler.stop()
+
+
+def test_shard_files_load_and_remove(tmp_path):
+    path = str(tmp_path / "config.json")
+    scheduler = ShardedScheduler(3, path=path)
+    scheduler.start()
+    target = datetime.datetime.now() + datetime.timedelta(days=1)
+    scheduler.add_many([target + datetime.timedelta(minutes=i) for i in range(10)])
+    scheduler.stop()
+    assert len(load_shards(path)) == 10
+    remove_shards(path)
+    assert saved_shards(path) == set()
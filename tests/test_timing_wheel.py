@@ -0,0 +1,75 @@
+import datetime
+import math
+
+import pytest
+
+from clock import VirtualClock
+from timing_wheel import TimingWheel
+
+# 4 slots per level and 3 levels: spans of 1, 4 and 16 ticks, 64 in all
+DELAYS = [1, 3, 4, 5, 15, 16, 17, 40, 63, 64, 100, 250]
+
+
+def make_wheel():
+    clock = VirtualClock()
+    return TimingWheel(tick=1.0, wheel_size=4, levels=3, clock=clock), clock
+
+
+def test_timers_cascade_down_and_fire_on_their_tick():
+    wheel, clock = make_wheel()
+    fired = []
+    for delay in DELAYS:
+        wheel.schedule(delay, lambda d: fired.append((clock.monotonic(), d)), delay)
+    assert len(wheel) == len(DELAYS)
+    for _ in range(300):
+        clock.advance(1)
+        wheel.advance()
+    assert fired == [(math.ceil(d), d) for d in DELAYS]
+    assert len(wheel) == 0
+
+
+def test_one_advance_fires_everything_in_order():
+    wheel, clock = make_wheel()
+    fired = []
+    for delay in reversed(DELAYS):
+        wheel.schedule(delay, fired.append, delay)
+    clock.advance(1000)
+    assert wheel.advance() == len(DELAYS)
+    assert fired == DELAYS
+
+
+def test_cancel_after_cascade():
+    wheel, clock = make_wheel()
+    fired = []
+    keep = wheel.schedule(40, fired.append, "keep")
+    drop = wheel.schedule(41, fired.append, "drop")
+    for _ in range(32):
+        clock.advance(1)
+        wheel.advance()
+    # Both have moved down out of the top level by now
+    assert drop.cancel()
+    assert not drop.active and keep.active
+    clock.advance(100)
+    wheel.advance()
+    assert fired == ["keep"]
+    assert len(wheel) == 0
+
+
+def test_background_thread_on_a_virtual_clock():
+    wheel, clock = make_wheel()
+    fired = []
+    wheel.start()
+    try:
+        for delay in DELAYS:
+            wheel.schedule(delay, lambda d: fired.append((clock.monotonic(), d)), delay)
+        clock.run_until(clock.now() + datetime.timedelta(seconds=300))
+    finally:
+        wheel.stop()
+    assert fired == [(math.ceil(d), d) for d in DELAYS]
+
+
+def test_rejects_bad_geometry():
+    with pytest.raises(ValueError):
+        TimingWheel(tick=0)
+    with pytest.raises(ValueError):
+        TimingWheel(wheel_size=1)
@@ -1,17 +1,44 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import threading
-import time
+import argparse
+import collections
 import datetime
-import json
+import glob
+import itertools
+import math
 import os
-import pygame
+import sys
+import threading
+import time
 
-# Initialize pygame mixer for sound playback
-pygame.mixer.init()
+import alarm_io
+import metrics
+from clock import REAL_CLOCK
+from countdown import CountdownGroup
+from dispatch import DEFAULT_MIN_INTERVAL, DEFAULT_WINDOW, FireDispatcher
+from metrics import REGISTRY
+from persistence import ConfigStore
+from recurrence import DaysRule, EveryRule, parse_rule
+from scheduler import Scheduler, format_alarm_time, parse_alarm_time
+from ui_queue import UIUpdateQueue
+
+# pygame is imported and its mixer started on first use, see load_audio()
+pygame = None
+_audio_lock = threading.Lock()
+AUDIO_CHANNELS = 8
+# Delay after the window is shown before warming up audio in the background
+AUDIO_PREWARM_MS = 200
 
 CONFIG_FILE = "timer_alarm_config.json"
 DEFAULT_SOUND = "alarm.wav"
+# Saved alarms that came due less than this long before startup still ring
+MISSED_ALARM_GRACE = datetime.timedelta(hours=1)
+# How often --metrics rewrites its export file
+METRICS_INTERVAL = 10.0
+
+SOUND_LATENCY = REGISTRY.histogram("sound_start_latency_seconds", "Time from an alarm firing to its sound starting")
+CONFIG_SAVE = REGISTRY.histogram("config_save_seconds", "Time save_config blocks the Tk thread")
+REGISTRY.gauge("threads_alive", "Live Python threads").set_function(threading.active_count)
 
 # Helper functions for tooltips
 class CreateToolTip(object):
@@ -58,29 +85,273 @@ class CreateToolTip(object):
         if tw:
             tw.destroy()
 
+def load_audio():
+    """Import pygame and start the mixer once; later calls return it immediately."""
+    global pygame
+    if pygame is None:
+        with _audio_lock:
+            if pygame is None:
+                os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+                import pygame as pg
+                pg.mixer.init()
+                # Channel pool so overlapping alarms mix instead of cutting each other off
+                pg.mixer.set_num_channels(AUDIO_CHANNELS)
+                pygame = pg
+    return pygame
+
+# Decoded sounds kept in memory
+class SoundCache:
+    """
+    pygame Sounds decoded once and kept in memory, least recently used
+    evicted first, so playing never waits on disk I/O or decoding.
+    """
+    def __init__(self, max_sounds=8):
+        self.max_sounds = max_sounds
+        self._sounds = collections.OrderedDict()  # path -> pygame.mixer.Sound
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        with self._lock:
+            sound = self._sounds.get(path)
+            if sound is not None:
+                self._sounds.move_to_end(path)
+                return sound
+        # Decode outside the lock; a racing load of the same file is harmless
+        sound = load_audio().mixer.Sound(path)
+        with self._lock:
+            self._sounds[path] = sound
+            self._sounds.move_to_end(path)
+            while len(self._sounds) > self.max_sounds:
+                self._sounds.popitem(last=False)
+        return sound
+
+    def preload(self, path):
+        """Decode `path` on a background thread so the first alarm plays instantly."""
+        def load():
+            try:
+                self.get(path)
+            except Exception as e:
+                print(f"Sound preload error: {e}")
+        threading.Thread(target=load, daemon=True).start()
+
 # Sound playback helper
 class SoundPlayer:
     def __init__(self):
-        self.sound_path = DEFAULT_SOUND
+        self._sound_path = DEFAULT_SOUND
         self.volume = 1.0  # Max volume
+        self.cache = SoundCache()
+        self.last_latency = None  # seconds from fire to audio start
+
+    @property
+    def sound_path(self):
+        return self._sound_path
+
+    @sound_path.setter
+    def sound_path(self, path):
+        self._sound_path = path
+        # Until audio is warmed up, decoding waits for prewarm() or the first alarm
+        if pygame is not None:
+            self.cache.preload(path)
+
+    def prewarm(self):
+        """Start the mixer and decode the current sound on a background thread."""
+        def warm():
+            try:
+                load_audio()
+                self.cache.get(self.sound_path)
+            except Exception as e:
+                print(f"Sound preload error: {e}")
+        threading.Thread(target=warm, daemon=True).start()
 
-    def play(self):
+    def play(self, fired_at=None):
+        """Start the alarm sound; fired_at is the time.monotonic() the alarm fired."""
+        with metrics.profile("sound.play"):
+            self._play(fired_at)
+
+    def _play(self, fired_at):
         try:
-            pygame.mixer.music.load(self.sound_path)
-            pygame.mixer.music.set_volume(self.volume)
-            pygame.mixer.music.play()
+            pg = load_audio()
+            try:
+                sound = self.cache.get(self.sound_path)
+            except pg.error:
+                # Formats Sound cannot decode still play through the music stream
+                pg.mixer.music.load(self.sound_path)
+                pg.mixer.music.set_volume(self.volume)
+                pg.mixer.music.play()
+            else:
+                channel = pg.mixer.find_channel(True)  # steal the oldest if all are busy
+                channel.set_volume(self.volume)
+                channel.play(sound)
+            if fired_at is not None:
+                self.last_latency = time.monotonic() - fired_at
+                SOUND_LATENCY.observe(self.last_latency)
         except Exception as e:
             print(f"Sound playback error: {e}")
 
+    def is_playing(self):
+        if pygame is None:
+            return False
+        try:
+            return pygame.mixer.get_busy() or pygame.mixer.music.get_busy()
+        except Exception:
+            return False
+
     def stop(self):
+        if pygame is None:
+            return  # nothing has played yet
+        pygame.mixer.stop()
         pygame.mixer.music.stop()
 
+# Virtualized list of scheduled alarms
+class VirtualAlarmList(ttk.Frame):
+    """
+    Listbox that only ever holds the visible rows of a sorted alarm list.
+
+    `source` must provide len() and window(start, count) returning alarms in
+    fire-time order (the Scheduler does). The listbox is refilled from the
+    visible window on refresh() and the scrollbar is driven by hand, so
+    drawing and scrolling cost the same for 10 alarms or 50k. Selection is
+    kept as a set of alarm IDs so it survives scrolling and inserts.
+    """
+    def __init__(self, parent, source, height=6, **listbox_options):
+        super().__init__(parent)
+        self.source = source
+        self.height = height
+        self.top = 0  # index of the first visible alarm
+        self.visible_ids = []
+        self.selected = set()
+        self.anchor = None  # alarm id where a shift-click range starts
+        self.listbox = tk.Listbox(self, height=height, activestyle='none', exportselection=False,
+            selectmode='multiple', **listbox_options)
+        self.listbox.pack(side='left', fill='both', expand=True)
+        self.scrollbar = ttk.Scrollbar(self, orient='vertical', command=self.yview)
+        self.scrollbar.pack(side='right', fill='y')
+        self.listbox.bind("<Button-1>", self.on_click)
+        self.listbox.bind("<Control-Button-1>", lambda e: self.on_click(e, toggle=True))
+        self.listbox.bind("<Shift-Button-1>", lambda e: self.on_click(e, extend=True))
+        self.listbox.bind("<MouseWheel>", lambda e: self.scroll(-1 if e.delta > 0 else 1))
+        self.listbox.bind("<Button-4>", lambda e: self.scroll(-1))
+        self.listbox.bind("<Button-5>", lambda e: self.scroll(1))
+        self.listbox.bind("<Up>", lambda e: self.scroll(-1))
+        self.listbox.bind("<Down>", lambda e: self.scroll(1))
+        self.listbox.bind("<Prior>", lambda e: self.scroll(-self.height))
+        self.listbox.bind("<Next>", lambda e: self.scroll(self.height))
+
+    def refresh(self):
+        total = len(self.source)
+        self.top = max(0, min(self.top, total - self.height))
+        rows = self.source.window(self.top, self.height)
+        self.visible_ids = [alarm.alarm_id for alarm in rows]
+        self.listbox.delete(0, tk.END)
+        if rows:
+            self.listbox.insert(tk.END, *(alarm.label for alarm in rows))
+        for row, alarm_id in enumerate(self.visible_ids):
+            if alarm_id in self.selected:
+                self.listbox.selection_set(row)
+        if total:
+            self.scrollbar.set(self.top / total, (self.top + len(rows)) / total)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def forget(self, alarm_ids):
+        """Drop removed alarms from the selection."""
+        self.selected.difference_update(alarm_ids)
+        if self.anchor in alarm_ids:
+            self.anchor = None
+
+    def selection(self):
+        return list(self.selected)
+
+    def clear_selection(self):
+        self.selected.clear()
+        self.anchor = None
+
+    def yview(self, *args):
+        total = len(self.source)
+        if args[0] == "moveto":
+            self.top = int(float(args[1]) * total)
+        elif args[0] == "scroll":
+            step = int(args[1]) * (self.height if args[2] == "pages" else 1)
+            self.top += step
+        self.refresh()
+
+    def scroll(self, rows):
+        self.top += rows
+        self.refresh()
+        return "break"
+
+    def on_click(self, event, toggle=False, extend=False):
+        self.listbox.focus_set()
+        row = self.listbox.nearest(event.y)
+        if not 0 <= row < len(self.visible_ids):
+            return "break"
+        alarm_id = self.visible_ids[row]
+        if extend and self.anchor in self.source:
+            lo, hi = sorted((self.source.index_of(self.anchor), self.top + row))
+            self.selected = {alarm.alarm_id for alarm in self.source.window(lo, hi - lo + 1)}
+        elif toggle:
+            self.selected.symmetric_difference_update({alarm_id})
+            self.anchor = alarm_id
+        else:
+            self.selected = {alarm_id}
+            self.anchor = alarm_id
+        self.refresh()
+        return "break"
+
+# Non-modal alert
+class AlertWindow(tk.Toplevel):
+    """
+    One window listing everything that rang since it was last dismissed.
+
+    Unlike messagebox.showinfo it does not block the Tk thread, so timers,
+    the alarm list and further alerts keep updating while it is open; new
+    alerts are appended to it rather than opening another window.
+    """
+    MAX_LINES = 8
+
+    def __init__(self, parent, on_snooze, on_dismiss):
+        super().__init__(parent)
+        self.title("Alert")
+        self.configure(bg="#eaf1fb")
+        self.resizable(False, False)
+        self.transient(parent)
+        self.messages = []
+        self.summary_var = tk.StringVar()
+        self.body_var = tk.StringVar()
+        tk.Label(self, textvariable=self.summary_var, font=("Segoe UI", 12, "bold"), fg="#1a73e8", bg="#eaf1fb").pack(padx=16, pady=(12, 4))
+        tk.Label(self, textvariable=self.body_var, font=("Segoe UI", 11), bg="#eaf1fb", justify='left').pack(padx=16, pady=(0, 12))
+        buttons = tk.Frame(self, bg="#eaf1fb")
+        buttons.pack(fill='x', padx=16, pady=(0, 12))
+        self.snooze_button = ttk.Button(buttons, text="Snooze (5 min)", command=on_snooze, state=tk.DISABLED)
+        self.snooze_button.pack(side='left', expand=True, fill='x', padx=(0, 4))
+        dismiss_button = ttk.Button(buttons, text="Dismiss", command=on_dismiss)
+        dismiss_button.pack(side='left', expand=True, fill='x', padx=(4, 0))
+        dismiss_button.focus_set()
+        self.protocol("WM_DELETE_WINDOW", on_dismiss)
+
+    def add(self, messages, can_snooze=False, raise_window=True):
+        self.messages.extend(messages)
+        count = len(self.messages)
+        self.summary_var.set("Alert" if count == 1 else f"{count} alerts")
+        lines = self.messages[-self.MAX_LINES:]
+        if count > len(lines):
+            lines = [f"...and {count - len(lines)} earlier"] + lines
+        self.body_var.set("\n".join(lines))
+        if can_snooze:
+            self.snooze_button.config(state=tk.NORMAL)
+        if raise_window:
+            self.deiconify()
+            self.lift()
+
 class TimerAlarmApp(tk.Tk):
-    def __init__(self):
+    def __init__(self, lazy_audio=False, clock=None, metrics_path=None, control_address=None,
+                 alert_window=DEFAULT_WINDOW, alert_interval=DEFAULT_MIN_INTERVAL, shards=0):
         super().__init__()
+        # Source of "now" for the clock label, alarms, snooze and the countdown
+        self.clock = clock or REAL_CLOCK
         self.title("Timer & Alarm Clock")
         self.configure(bg="#eaf1fb")
-        self.geometry("430x520")
+        self.geometry("430x600")
         self.resizable(False, False)
         self.configure_window_rounding()
 
@@ -88,25 +359,81 @@ class TimerAlarmApp(tk.Tk):
 
         self.protocol("WM_DELETE_WINDOW", self.on_close)
 
-        self.load_config()
-
-        self.active_timer_thread = None
-        self.active_alarm_threads = {}
-        self.timer_paused = threading.Event()
-        self.timer_stopped = threading.Event()
-        self.alarm_paused = {}  # alarm_id -> paused state
-        self.alarm_stopped = {} # alarm_id -> stopped state
+        # Worker threads post UI work here; the main loop applies it every 50 ms
+        self.ui_queue = UIUpdateQueue(self, interval_ms=50)
+        # All countdowns share one thread; only rows on screen get ticks
+        self.timers = CountdownGroup(
+            on_tick=lambda remaining: self.ui_queue.set("timer_ticks", self.show_timer_ticks, remaining),
+            on_finish=lambda name, lateness: self.ui_queue.call(self.timer_finished, name, time.monotonic()),
+            on_stop=lambda name, remaining: self.ui_queue.call(self.remove_timer_row, name),
+            clock=self.clock,
+        )
+        self.timer_rows = []  # timer names in list order
+        self.timer_descriptions = {}  # name -> e.g. "5 minutes"
+        self.selected_timer = None
+        self.timer_numbers = itertools.count(1)
+        # Alerts due together become one notification with one sound
+        self.dispatcher = FireDispatcher(
+            on_notify=lambda alerts, audible: self.ui_queue.call(self.show_alerts, alerts, audible),
+            window=alert_window,
+            min_interval=alert_interval,
+            clock=self.clock,
+        )
+        self.alert_window = None
+        self.blinking = False
+        # Headless scheduler core; the UI only renders its events
+        self.shards = shards
+        if shards:
+            # Alarms are timed and journaled by worker processes, one file
+            # each; multiprocessing loads only in this mode
+            from shards import ShardedScheduler
+            self.scheduler = ShardedScheduler(shards, path=CONFIG_FILE)
+        else:
+            self.scheduler = Scheduler(clock=self.clock)
+        self.scheduler.subscribe(self.on_scheduler_event)
+        # Saves are debounced and written off the Tk thread; with shards
+        # the main file keeps only the settings
+        self.config_store = ConfigStore(CONFIG_FILE, alarms_source=(lambda: []) if shards else self.scheduler.list)
 
         self.build_ui()
+        self.load_config()
+        if not shards:
+            self.scheduler.subscribe(self.config_store.record)
+        self.config_store.start()
+        self.scheduler.start()
+        self.dispatcher.start()
+        # Audio is not needed to draw the window; warm it up once it is shown,
+        # or with lazy_audio leave it until the first alarm rings.
+        if not lazy_audio:
+            self.after(AUDIO_PREWARM_MS, self.sound_player.prewarm)
+        self.ui_queue.start()
+        # Export metrics periodically off the Tk thread (Prometheus text, or JSON for .json)
+        self.metrics_path = metrics_path
+        self.metrics_stop = threading.Event()
+        if metrics_path:
+            threading.Thread(target=self.export_metrics, daemon=True).start()
+        # Optional local socket so scripts can drive the same scheduler
+        self.control_server = None
+        if control_address is not None:
+            # asyncio and the socket code load only when the API is wanted
+            from control_api import DEFAULT_ADDRESS, ControlServer
+            control_address = control_address or DEFAULT_ADDRESS
+            self.control_server = ControlServer(self.scheduler, control_address, start_timer=self.control_start_timer)
+            self.control_server.start()
         self.bind("<Return>", lambda e: self.start_timer())
         self.bind("<Escape>", lambda e: self.reset_all())
+        # A minimized window shows no timers, so none of them need ticks
+        self.bind("<Unmap>", lambda e: e.widget is self and self.timers.set_visible(()))
+        self.bind("<Map>", lambda e: e.widget is self and self.update_visible_timers())
 
     def configure_window_rounding(self):
+        if sys.platform != "win32":
+            return  # ctypes.windll only exists on Windows
         try:
             import ctypes
             hwnd = ctypes.windll.user32.GetParent(self.winfo_id())
             ctypes.windll.user32.SetWindowRgn(hwnd, ctypes.windll.gdi32.CreateRoundRectRgn(
-                0, 0, 430, 520, 30, 30), True)
+                0, 0, 430, 600, 30, 30), True)
         except Exception:
             pass
 
@@ -129,6 +456,8 @@ class TimerAlarmApp(tk.Tk):
         ttk.Label(self.main_frame, text="Countdown Timer:", font=("Segoe UI", 13, "bold"), anchor='w').pack(anchor="w")
         timer_row = ttk.Frame(self.main_frame)
         timer_row.pack(fill='x', pady=6)
+        self.timer_name_entry = ttk.Entry(timer_row, width=8, font=("Segoe UI", 12))
+        self.timer_name_entry.pack(side='left', padx=(0, 6))
         self.timer_entry = ttk.Entry(timer_row, width=10, font=("Segoe UI", 12))
         self.timer_entry.pack(side='left', fill='x', expand=True)
         self.timer_unit_var = tk.StringVar(value="Minutes")
@@ -141,11 +470,26 @@ class TimerAlarmApp(tk.Tk):
         self.timer_pause_button.pack(fill='x', pady=(0, 8))
         self.timer_stop_button = ttk.Button(self.main_frame, text="Stop Timer", command=self.stop_timer, state=tk.DISABLED)
         self.timer_stop_button.pack(fill='x', pady=(0, 12))
+        CreateToolTip(self.timer_name_entry, "Timer name (optional); each running timer needs its own")
         CreateToolTip(self.timer_entry, "Enter a positive number for the countdown")
         CreateToolTip(self.timer_unit_combo, "Select time unit")
         CreateToolTip(self.timer_start_button, "Start the countdown timer")
-        CreateToolTip(self.timer_pause_button, "Pause/Resume the timer")
-        CreateToolTip(self.timer_stop_button, "Stop and reset the timer")
+        CreateToolTip(self.timer_pause_button, "Pause/Resume the selected timer")
+        CreateToolTip(self.timer_stop_button, "Stop the selected timer")
+
+        timers_frame = ttk.Frame(self.main_frame)
+        timers_frame.pack(fill='x', pady=(0, 8))
+        self.timer_list = tk.Listbox(timers_frame, height=3, activestyle='none', exportselection=False,
+            font=("Segoe UI", 10))
+        self.timer_list.pack(side='left', fill='x', expand=True)
+        timer_scrollbar = ttk.Scrollbar(timers_frame, orient='vertical', command=self.timer_list.yview)
+        timer_scrollbar.pack(side='right', fill='y')
+
+        def on_timer_scroll(first, last):
+            timer_scrollbar.set(first, last)
+            self.update_visible_timers()
+        self.timer_list.config(yscrollcommand=on_timer_scroll)
+        self.timer_list.bind("<<ListboxSelect>>", self.on_timer_select)
 
         self.timer_progress = ttk.Progressbar(self.main_frame, orient='horizontal', length=400, mode='determinate')
         self.timer_progress.pack(pady=(0, 12))
@@ -173,12 +517,30 @@ class TimerAlarmApp(tk.Tk):
         self.set_alarm_button.pack(side='left', padx=6)
         CreateToolTip(self.set_alarm_button, "Set/add this alarm time")
 
+        repeat_frame = ttk.Frame(self.main_frame)
+        repeat_frame.pack(fill='x', pady=(0, 6))
+        ttk.Label(repeat_frame, text="Repeat:", font=("Segoe UI", 10)).pack(side='left')
+        self.repeat_var = tk.StringVar(value="Once")
+        self.repeat_combo = ttk.Combobox(repeat_frame, textvariable=self.repeat_var,
+            values=["Once", "Daily", "Weekdays", "Weekends", "Mon,Wed,Fri", "Every 15 min", "cron: 0 7 * * 1-5"])
+        self.repeat_combo.pack(side='left', fill='x', expand=True, padx=6)
+        CreateToolTip(self.repeat_combo, "Pick or type a rule: Daily, Weekdays, Mon,Wed,Fri, Every N min, or cron: M H D Mon DoW")
+
 
         self.alarm_sound_button = ttk.Button(self.main_frame, text="Choose Sound", command=self.choose_sound)
         self.alarm_sound_button.pack(fill='x', pady=(0,6))
         self.alarm_sound_label_var = tk.StringVar(value=DEFAULT_SOUND)
         ttk.Label(self.main_frame, textvariable=self.alarm_sound_label_var, font=("Segoe UI", 10)).pack(anchor='w', pady=(0,12))
 
+        io_frame = ttk.Frame(self.main_frame)
+        io_frame.pack(fill='x', pady=(0, 6))
+        self.import_button = ttk.Button(io_frame, text="Import Alarms", command=self.import_alarms)
+        self.import_button.pack(side='left', fill='x', expand=True)
+        self.export_button = ttk.Button(io_frame, text="Export Alarms", command=self.export_alarms)
+        self.export_button.pack(side='left', fill='x', expand=True, padx=(6, 0))
+        CreateToolTip(self.import_button, "Load alarms from a CSV, JSON Lines or iCalendar file")
+        CreateToolTip(self.export_button, "Save all scheduled alarms to a CSV, JSON Lines or iCalendar file")
+
         alarm_button_frame = ttk.Frame(self.main_frame)
         alarm_button_frame.pack(fill='x')
         self.alarm_add_button = ttk.Button(alarm_button_frame, text="Add Alarm", command=self.add_alarm)
@@ -191,13 +553,10 @@ class TimerAlarmApp(tk.Tk):
         self.alarms_frame = ttk.LabelFrame(self.main_frame, 
         text="Scheduled Alarms")
         self.alarms_frame.pack(fill='both', pady=8)
-        self.alarms_listbox = tk.Listbox(self.alarms_frame, height=6, 
-        font=("Segoe UI", 11), selectmode='extended')
-        self.alarms_listbox.pack(side='left', fill='both', expand=True)
-        scrollbar = ttk.Scrollbar(self.alarms_frame, orient='vertical', 
-        command=self.alarms_listbox.yview)
-        scrollbar.pack(side='right', fill='y')
-        self.alarms_listbox.config(yscrollcommand=scrollbar.set)
+        self.alarm_list = VirtualAlarmList(self.alarms_frame, self.scheduler, height=6,
+        font=("Segoe UI", 11))
+        self.alarm_list.pack(fill='both', expand=True)
+        self.alarms_listbox = self.alarm_list.listbox
         CreateToolTip(self.alarms_listbox, "Select multiple alarms with Shift/Ctrl + click. Press DELETE or use Delete button to remove.")
         self.delete_alarm_button = ttk.Button(self.main_frame, text="Delete Selected Alarm", command=self.delete_selected_alarm)
         self.delete_alarm_button.pack(fill='x', padx=10, pady=(0, 10))
@@ -216,12 +575,20 @@ class TimerAlarmApp(tk.Tk):
         ttk.Label(self.main_frame, text="Created by: Shital Singh", font=("Segoe UI", 9), foreground="#888").pack(side='bottom', pady=(10,0))
     
     def update_clock(self):
-        now = datetime.datetime.now()
+        now = self.clock.now()
         self.current_time_var.set(now.strftime("%I:%M:%S %p"))
         self.after(1000, self.update_clock)
 
-    def alert(self, msg, alarm_id=None):
-        # Visual blink of label
+    def alert(self, msg, alarm_id=None, fired_at=None):
+        # Returns at once; the dispatcher groups alerts and calls show_alerts
+        self.dispatcher.submit((msg, alarm_id, fired_at))
+
+    def show_alerts(self, alerts, audible=True):
+        messages = [msg for msg, _, _ in alerts]
+        alarm_ids = [alarm_id for _, alarm_id, _ in alerts if alarm_id is not None]
+        fired = [fired_at for _, _, fired_at in alerts if fired_at is not None]
+
+        # Visual blink of label, unless one is still running
         def blink(times=6):
             def toggle(count):
                 if count > 0:
@@ -230,38 +597,62 @@ class TimerAlarmApp(tk.Tk):
                     self.after(300, toggle, count-1)
                 else:
                     self.alarm_status_label.config(foreground="#1a73e8")
+                    self.blinking = False
+            self.blinking = True
             toggle(times)
-        blink()
+        if not self.blinking:
+            blink()
 
-        messagebox.showinfo("Alert", msg)
-        self.sound_player.play()
-        # Enable snooze only if alarm_id is given
-        if alarm_id is not None:
+        # The text is always added; sound and raising the window are rate
+        # limited, and a sound still playing is left alone
+        if audible and not self.sound_player.is_playing():
+            self.sound_player.play(min(fired) if fired else None)
+        if len(alerts) > 1:
+            self.alarm_status_var.set(f"{len(alerts)} alerts ringing")
+        if self.alert_window is None:
+            self.alert_window = AlertWindow(self, on_snooze=self.snooze_alarm, on_dismiss=self.dismiss_alerts)
+        self.alert_window.add(messages, can_snooze=bool(alarm_ids), raise_window=audible)
+        # Enable snooze only if an alarm rang
+        if alarm_ids:
             self.snooze_button.config(state=tk.NORMAL)
-            self.current_ringing_alarm = alarm_id
+            self.current_ringing_alarm = alarm_ids[-1]
+
+    def dismiss_alerts(self):
+        if self.alert_window is not None:
+            self.alert_window.destroy()
+            self.alert_window = None
+        self.sound_player.stop()
 
     def pause_timer(self):
-        if self.timer_paused.is_set():
-            self.timer_paused.clear()
+        name = self.selected_timer
+        if name is None or name not in self.timers:
+            return
+        if self.timers.is_paused(name):
+            self.timers.resume(name)
             self.timer_pause_button.config(text="Pause Timer")
-            self.timer_status_var.set(f"⏳ Timer resumed")
+            self.timer_status_var.set(f"⏳ {name} resumed")
         else:
-            self.timer_paused.set()
+            self.timers.pause(name)
             self.timer_pause_button.config(text="Resume Timer")
-            self.timer_status_var.set(f"⏸ Timer paused")
+            self.timer_status_var.set(f"⏸ {name} paused")
+            # Paused timers get no ticks, so draw the frozen time once here
+            self.draw_timer_row(self.timer_rows.index(name), name, self.timers.remaining(name))
 
     def stop_timer(self):
-        if messagebox.askyesno("Confirm", "Are you sure you want to stop the timer?"):
-            self.timer_stopped.set()
-            self.timer_paused.clear()
-            self.timer_status_var.set("Timer stopped.")
-            self.timer_start_button.config(state=tk.NORMAL)
-            self.timer_pause_button.config(state=tk.DISABLED, text="Pause Timer")
-            self.timer_stop_button.config(state=tk.DISABLED)
-            self.timer_progress['value'] = 0
+        name = self.selected_timer
+        if name is None:
+            return
+        if messagebox.askyesno("Confirm", f"Are you sure you want to stop {name}?"):
+            self.timers.stop(name)
+            self.timer_status_var.set(f"{name} stopped.")
+
+    def stop_all_timers(self):
+        for name in self.timers.names():
+            self.timers.stop(name)
 
     def reset_all(self):
-        self.stop_timer()
+        if self.timer_rows and messagebox.askyesno("Confirm", "Stop all timers?"):
+            self.stop_all_timers()
         self.reset_alarms()
         self.timer_entry.delete(0, tk.END)
         self.alarm_entry.delete(0, tk.END)
@@ -270,9 +661,6 @@ class TimerAlarmApp(tk.Tk):
         self.snooze_button.config(state=tk.DISABLED)
 
     def start_timer(self):
-        if self.active_timer_thread and self.active_timer_thread.is_alive():
-            messagebox.showwarning("Timer Running", "A timer is already running. Please stop it first.")
-            return
         try:
             value = float(self.timer_entry.get())
             if value <= 0:
@@ -283,55 +671,128 @@ class TimerAlarmApp(tk.Tk):
 
         unit = self.timer_unit_var.get()
         if unit == "Seconds":
-            total_seconds = int(value)
+            total_seconds = value
         elif unit == "Minutes":
-            total_seconds = int(value * 60)
+            total_seconds = value * 60
         else:  # Hours
-            total_seconds = int(value * 3600)
+            total_seconds = value * 3600
 
-        self.timer_start_button.config(state=tk.DISABLED)
-        self.timer_pause_button.config(state=tk.NORMAL, text="Pause Timer")
-        self.timer_stop_button.config(state=tk.NORMAL)
-        self.timer_paused.clear()
-        self.timer_stopped.clear()
-
-        self.timer_progress.config(maximum=total_seconds, value=total_seconds)
-        self.timer_status_var.set(f"⏳ Time left: {value} {unit.lower()}")
-
-        def run_timer():
-            remaining = total_seconds
-            while remaining >= 0:
-                if self.timer_stopped.is_set():
-                    break
-                if self.timer_paused.is_set():
-                    time.sleep(0.5)
-                    continue
-                mins, secs = divmod(remaining, 60)
-                hours, mins = divmod(mins, 60)
-                if hours > 0:
-                    time_str = f"{hours:02}:{mins:02}:{secs:02}"
-                else:
-                    time_str = f"{mins:02}:{secs:02}"
-                self.timer_status_var.set(f"⏳ Time left: {time_str}")
-                self.timer_progress['value'] = remaining
-                if remaining == 0:
-                    break
-                time.sleep(1)
-                remaining -= 1
-
-            if not self.timer_stopped.is_set():
-                self.timer_status_var.set("Timer finished!")
-                self.alert(f"⏰ Time is up! {value} {unit.lower()} have passed.")
-            else:
-                self.timer_status_var.set("Timer stopped.")
-            self.timer_start_button.config(state=tk.NORMAL)
+        name = self.timer_name_entry.get().strip() or self.next_timer_name()
+        try:
+            self.start_countdown(total_seconds, f"{value:g} {unit.lower()}", name)
+        except ValueError:
+            messagebox.showwarning("Timer Running", f"A timer named {name!r} is already running.")
+            return
+        self.timer_name_entry.delete(0, tk.END)
+        self.save_config()
+
+    def next_timer_name(self):
+        while True:
+            name = f"Timer {next(self.timer_numbers)}"
+            if name not in self.timers:
+                return name
+
+    def start_countdown(self, total_seconds, description, name):
+        """Start a named countdown; safe from any thread. Raises ValueError if the name is taken."""
+        # Hidden until its row exists; the row then makes it visible
+        self.timers.start(name, total_seconds, visible=False)
+        self.ui_queue.call(self.add_timer_row, name, description)
+        return name
+
+    def control_start_timer(self, seconds, name=None):
+        # Called on the control API thread; the row is added on the Tk thread
+        return self.start_countdown(seconds, f"{seconds:g} seconds", name or self.next_timer_name())
+
+    def add_timer_row(self, name, description):
+        if name not in self.timers:
+            return  # finished or stopped before its row was drawn
+        self.timer_rows.append(name)
+        self.timer_descriptions[name] = description
+        self.timer_list.insert(tk.END, f"{name}  {description}")
+        self.select_timer(len(self.timer_rows) - 1)
+        self.timer_list.see(tk.END)
+        self.update_visible_timers()
+
+    def remove_timer_row(self, name):
+        if name not in self.timer_descriptions:
+            return
+        index = self.timer_rows.index(name)
+        del self.timer_rows[index]
+        self.timer_descriptions.pop(name)
+        self.timer_list.delete(index)
+        if self.selected_timer == name:
+            self.select_timer(min(index, len(self.timer_rows) - 1))
+        self.update_visible_timers()
+
+    def select_timer(self, index):
+        self.timer_list.selection_clear(0, tk.END)
+        if index < 0:
+            self.selected_timer = None
+            self.timer_progress['value'] = 0
             self.timer_pause_button.config(state=tk.DISABLED, text="Pause Timer")
             self.timer_stop_button.config(state=tk.DISABLED)
+            return
+        self.timer_list.selection_set(index)
+        name = self.selected_timer = self.timer_rows[index]
+        remaining = self.timers.remaining(name) or 0
+        self.timer_progress.config(maximum=self.timers.duration(name) or 1, value=remaining)
+        paused = self.timers.is_paused(name)
+        self.timer_pause_button.config(state=tk.NORMAL, text="Resume Timer" if paused else "Pause Timer")
+        self.timer_stop_button.config(state=tk.NORMAL)
+        self.timer_status_var.set(f"⏳ {name}: {self.format_remaining(remaining)}")
 
-        self.active_timer_thread = threading.Thread(target=run_timer, daemon=True)
-        self.active_timer_thread.start()
+    def on_timer_select(self, event=None):
+        selection = self.timer_list.curselection()
+        if selection:
+            self.select_timer(selection[0])
 
-        self.save_config()
+    def visible_timer_range(self):
+        if not self.timer_rows:
+            return range(0)
+        first = self.timer_list.nearest(0)
+        last = self.timer_list.nearest(self.timer_list.winfo_height())
+        return range(first, min(last, len(self.timer_rows) - 1) + 1)
+
+    def update_visible_timers(self):
+        # Called on scroll, resize and row changes; the shared tick only covers these
+        self.timers.set_visible(self.timer_rows[i] for i in self.visible_timer_range())
+
+    @staticmethod
+    def format_remaining(remaining):
+        # Show whole seconds, rounded up so "00:00" only appears at the end
+        mins, secs = divmod(math.ceil(remaining), 60)
+        hours, mins = divmod(mins, 60)
+        if hours > 0:
+            return f"{hours:02}:{mins:02}:{secs:02}"
+        return f"{mins:02}:{secs:02}"
+
+    def draw_timer_row(self, index, name, remaining):
+        if name not in self.timer_descriptions:
+            return
+        paused = "  (paused)" if self.timers.is_paused(name) else ""
+        self.timer_list.delete(index)
+        self.timer_list.insert(index, f"{name}  {self.format_remaining(remaining)}{paused}")
+        if name == self.selected_timer:
+            self.timer_list.selection_set(index)
+
+    def show_timer_ticks(self, remaining):
+        # One pass over the visible rows per frame, however many timers run
+        for index in self.visible_timer_range():
+            name = self.timer_rows[index]
+            if name in remaining:
+                self.draw_timer_row(index, name, remaining[name])
+        if self.selected_timer in remaining:
+            left = remaining[self.selected_timer]
+            self.timer_progress['value'] = left
+            self.timer_status_var.set(f"⏳ {self.selected_timer}: {self.format_remaining(left)}")
+
+    def timer_finished(self, name, fired_at):
+        description = self.timer_descriptions.get(name, "")
+        self.remove_timer_row(name)
+        self.timer_status_var.set(f"{name} finished!")
+        if self.control_server is not None:
+            self.control_server.publish({"event": "timer_finished", "name": name})
+        self.alert(f"⏰ Time is up! {name} ({description}) has finished.", fired_at=fired_at)
 
     def choose_sound(self):
         filetypes = (("Audio Files", "*.wav *.mp3"), ("All files", "*.*"))
@@ -341,167 +802,212 @@ class TimerAlarmApp(tk.Tk):
             self.alarm_sound_label_var.set(os.path.basename(filename))
             self.save_config()
 
+    def import_alarms(self):
+        filetypes = (("Alarm files", "*.csv *.jsonl *.ndjson *.ics"), ("All files", "*.*"))
+        filename = filedialog.askopenfilename(title="Import Alarms", filetypes=filetypes)
+        if not filename:
+            return
+        self.import_button.config(state=tk.DISABLED)
+
+        # Parse off the Tk thread; the scheduler publishes one bulk event when done
+        def run():
+            try:
+                result = alarm_io.import_alarms(self.scheduler, filename, now=self.clock.now())
+            except Exception as e:
+                self.ui_queue.call(messagebox.showerror, "Import Failed", str(e))
+            else:
+                msg = f"Imported {result.added} alarm(s)."
+                if result.duplicates:
+                    msg += f"\n{result.duplicates} already set."
+                if result.error_count:
+                    details = "\n".join(f"line {line}: {error}" for line, error in result.errors[:5])
+                    msg += f"\n{result.error_count} row(s) skipped:\n{details}"
+                self.ui_queue.call(messagebox.showinfo, "Import Alarms", msg)
+            self.ui_queue.call(self.import_button.config, state=tk.NORMAL)
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def export_alarms(self):
+        filetypes = (("CSV", "*.csv"), ("JSON Lines", "*.jsonl"), ("iCalendar", "*.ics"))
+        filename = filedialog.asksaveasfilename(title="Export Alarms", filetypes=filetypes, defaultextension=".csv")
+        if not filename:
+            return
+
+        def run():
+            try:
+                count = alarm_io.export_alarms(self.scheduler, filename)
+            except Exception as e:
+                self.ui_queue.call(messagebox.showerror, "Export Failed", str(e))
+            else:
+                self.ui_queue.call(messagebox.showinfo, "Export Alarms", f"Exported {count} alarm(s).")
+
+        threading.Thread(target=run, daemon=True).start()
+
     def add_alarm(self):
-        alarm_time = self.alarm_entry.get().strip()
-        ampm = self.ampm_var.get()
-        # Validate time
+        now = self.clock.now()
         try:
-            t = datetime.datetime.strptime(alarm_time, "%I:%M")
-            hour = t.hour
-            minute = t.minute
-            if ampm == "PM" and hour != 12:
-                hour += 12
-            if ampm == "AM" and hour == 12:
-                hour = 0
-            now = datetime.datetime.now()
-            target = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
-            if target <= now:
-                target += datetime.timedelta(days=1)
+            target = parse_alarm_time(self.alarm_entry.get(), self.ampm_var.get(), now=now)
         except Exception:
+            target = None
+        try:
+            # An interval given a time counts from it; without one, from now
+            rule = parse_rule(self.repeat_var.get(), target.time() if target else None, now=target or now)
+        except ValueError as e:
+            messagebox.showerror("Invalid Repeat", str(e))
+            return
+        # Interval and cron rules carry their own times; the others need HH:MM
+        if target is None and (rule is None or isinstance(rule, DaysRule)):
             messagebox.showerror("Invalid Input", "Enter time as HH:MM (12-hour) format")
             return
+        # The entered time is an interval's first fire; other rules find their next match
+        if rule is not None and (target is None or not isinstance(rule, EveryRule)):
+            try:
+                target = rule.next_after(now)
+            except ValueError as e:
+                messagebox.showerror("Invalid Repeat", str(e))
+                return
 
-        # Add to listbox and threads dict
-        alarm_str = target.strftime("%I:%M %p")
-        if alarm_str in self.active_alarm_threads:
-            messagebox.showwarning("Duplicate Alarm", f"Alarm for {alarm_str} already set")
+        try:
+            self.scheduler.add(target, rule=rule)
+        except ValueError:
+            messagebox.showwarning("Duplicate Alarm", f"Alarm for {format_alarm_time(target)} already set")
             return
 
-        self.alarms_listbox.insert(tk.END, alarm_str)
-        self.alarm_status_var.set(f"{self.alarms_listbox.size()} alarm(s) set")
-        self.alarm_reset_button.config(state=tk.NORMAL)
         self.alarm_entry.delete(0, tk.END)
-
-        self.alarm_paused[alarm_str] = threading.Event()
-        self.alarm_stopped[alarm_str] = threading.Event()
         self.alarm_entry.focus_set()
 
-        def alarm_thread(alarm_id, alarm_target):
-            while not self.alarm_stopped[alarm_id].is_set():
-                if self.alarm_paused[alarm_id].is_set():
-                    time.sleep(0.5)
-                    continue
-                if datetime.datetime.now() >= alarm_target:
-                    self.alarm_status_var.set(f"Alarm ringing: {alarm_id}")
-                    self.alert(f"⏰ Alarm for {alarm_id} is ringing!", alarm_id=alarm_id)
-                    break
-                time.sleep(1)
-            # Remove from active alarms and update UI
-            if alarm_id in self.active_alarm_threads:
-                del self.active_alarm_threads[alarm_id]
-            # Remove from alarms listbox (in main thread)
-            self.after(0, lambda: self.remove_alarm_from_listbox(alarm_id))
-            self.alarm_status_var.set(f"{self.alarms_listbox.size()} alarm(s) set")
-
-        t = threading.Thread(target=alarm_thread, args=(alarm_str, target), daemon=True)
-        self.active_alarm_threads[alarm_str] = t
-        t.start()
-
         self.save_config()
 
-    def remove_alarm_from_listbox(self, alarm_id):
-        items = self.alarms_listbox.get(0, tk.END)
-        if alarm_id in items:
-            idx = items.index(alarm_id)
-            self.alarms_listbox.delete(idx)
+    def on_scheduler_event(self, event, alarm):
+        # Called from whichever thread changed the scheduler; hand off to
+        # the Tk thread so drawing never delays the next alarm.
+        fired_at = time.monotonic() if event == "fired" else None
+        self.ui_queue.call(self.apply_scheduler_event, event, alarm, fired_at)
+
+    def apply_scheduler_event(self, event, alarm, fired_at=None):
+        if event in ("added", "added_many"):
+            self.alarm_reset_button.config(state=tk.NORMAL)
+        elif event == "cancelled_many":
+            self.alarm_list.forget({a.alarm_id for a in alarm})
+        elif event == "cancelled" or (event == "fired" and alarm.rule is None):
+            self.alarm_list.forget({alarm.alarm_id})
+        elif event == "cleared":
+            self.alarm_list.clear_selection()
+        if event == "fired":
+            self.ring_alarm(alarm, fired_at)
+        # Redraw the visible rows and count once per frame however many events arrived
+        self.ui_queue.set("alarm_list", self.render_alarm_list)
+
+    def render_alarm_list(self):
+        # The scheduler's store is the source of truth; the list only shows a window of it
+        self.alarm_list.refresh()
+        count = len(self.scheduler)
+        self.alarm_status_var.set(f"{count} alarm(s) set" if count else "No alarms set")
+
+    def ring_alarm(self, alarm, fired_at=None):
+        alarm_str = format_alarm_time(alarm.target)
+        self.alarm_status_var.set(f"Alarm ringing: {alarm_str}")
+        if alarm.snoozed:
+            self.alert(f"⏰ Snoozed alarm for {alarm_str} is ringing!", alarm_id=alarm.alarm_id, fired_at=fired_at)
+        else:
+            self.alert(f"⏰ Alarm for {alarm_str} is ringing!", alarm_id=alarm.alarm_id, fired_at=fired_at)
 
     def delete_selected_alarm(self, event=None):
-        selection = self.alarms_listbox.curselection()
-        if not selection:
+        alarms_to_delete = self.alarm_list.selection()
+        if not alarms_to_delete:
             return
-        alarms_to_delete = [self.alarms_listbox.get(i) for i in selection]
         if messagebox.askyesno("Delete Alarm(s)", f"Delete {len(alarms_to_delete)} selected alarm(s)?"):
-            for alarm_id in alarms_to_delete:
-                if alarm_id in self.alarm_stopped:
-                    self.alarm_stopped[alarm_id].set()
-                # Remove alarm from active alarms dict safely
-                self.active_alarm_threads.pop(alarm_id, None)
-            # Delete from the listbox, remove from end to start to keep indices valid
-            for i in reversed(selection):
-                self.alarms_listbox.delete(i)
-            self.alarm_status_var.set(f"{self.alarms_listbox.size()} alarm(s) set")
+            # One scheduler operation and one redraw however many are selected
+            self.scheduler.cancel_many(alarms_to_delete)
             self.save_config()
 
 
     def reset_alarms(self):
         if messagebox.askyesno("Reset All", "Delete all alarms?"):
-            # Stop all threads
-            for alarm_id in list(self.alarm_stopped.keys()):
-                self.alarm_stopped[alarm_id].set()
-            self.active_alarm_threads.clear()
-            self.alarm_paused.clear()
-            self.alarm_stopped.clear()
-            self.alarms_listbox.delete(0, tk.END)
-            self.alarm_status_var.set("No alarms set")
+            self.scheduler.clear()
             self.alarm_reset_button.config(state=tk.DISABLED)
             self.snooze_button.config(state=tk.DISABLED)
             self.save_config()
 
     def snooze_alarm(self):
         if hasattr(self, "current_ringing_alarm") and self.current_ringing_alarm:
-            alarm_id = self.current_ringing_alarm
-            self.sound_player.stop()
+            self.dismiss_alerts()
             self.snooze_button.config(state=tk.DISABLED)
-            # Add 5 minutes to alarm (new thread)
-            now = datetime.datetime.now()
-            new_time = now + datetime.timedelta(minutes=5)
-            alarm_str = new_time.strftime("%I:%M %p")
-            if alarm_str in self.active_alarm_threads:
+            # Add 5 minutes to alarm
+            now = self.clock.now()
+            try:
+                self.scheduler.snooze(minutes=5, now=now)
+            except ValueError:
+                alarm_str = format_alarm_time(now + datetime.timedelta(minutes=5))
                 messagebox.showwarning("Duplicate Alarm", f"Snooze alarm for {alarm_str} already exists")
                 return
-            self.alarms_listbox.insert(tk.END, alarm_str)
-            self.alarm_status_var.set(f"{self.alarms_listbox.size()} alarm(s) set")
-            self.alarm_reset_button.config(state=tk.NORMAL)
-            self.alarm_paused[alarm_str] = threading.Event()
-            self.alarm_stopped[alarm_str] = threading.Event()
-
-            def alarm_thread(alarm_id_snooze, alarm_target):
-                while not self.alarm_stopped[alarm_id_snooze].is_set():
-                    if self.alarm_paused[alarm_id_snooze].is_set():
-                        time.sleep(0.5)
-                        continue
-                    if datetime.datetime.now() >= alarm_target:
-                        self.alarm_status_var.set(f"Alarm ringing: {alarm_id_snooze}")
-                        self.alert(f"⏰ Snoozed alarm for {alarm_id_snooze} is ringing!", alarm_id=alarm_id_snooze)
-                        break
-                    time.sleep(1)
-                if alarm_id_snooze in self.active_alarm_threads:
-                    del self.active_alarm_threads[alarm_id_snooze]
-                self.after(0, lambda: self.remove_alarm_from_listbox(alarm_id_snooze))
-                self.alarm_status_var.set(f"{self.alarms_listbox.size()} alarm(s) set")
-
-            t = threading.Thread(target=alarm_thread, args=(alarm_str, new_time), daemon=True)
-            self.active_alarm_threads[alarm_str] = t
-            t.start()
             self.current_ringing_alarm = None
         else:
             messagebox.showinfo("No Alarm", "No alarm is currently ringing to snooze.")
 
     def save_config(self):
-        config = {
-            "sound_path": self.sound_player.sound_path,
-            "alarms": self.alarms_listbox.get(0, tk.END),
-            "timer_entry": self.timer_entry.get(),
-            "timer_unit": self.timer_unit_var.get(),
-        }
-        try:
-            with open(CONFIG_FILE, 'w') as f:
-                json.dump(config, f)
-        except Exception as e:
-            print(f"Error saving config: {e}")
+        # Alarms are journaled from scheduler events; only settings go here
+        with CONFIG_SAVE.time():
+            self.config_store.update_settings(
+                sound_path=self.sound_player.sound_path,
+                timer_entry=self.timer_entry.get(),
+                timer_unit=self.timer_unit_var.get(),
+            )
+
+    def export_metrics(self):
+        while not self.metrics_stop.wait(METRICS_INTERVAL):
+            try:
+                REGISTRY.write(self.metrics_path)
+            except Exception as e:
+                print(f"Error writing metrics: {e}")
 
     def load_config(self):
-        if not os.path.isfile(CONFIG_FILE):
-            return
-        try:
-            with open(CONFIG_FILE, 'r') as f:
-                config = json.load(f)
-            self.sound_player.sound_path = config.get("sound_path", DEFAULT_SOUND)
-        except Exception as e:
-            print(f"Error loading config: {e}")
+        settings, alarms = self.config_store.load()
+        from_shards = []
+        if self.shards or glob.glob(glob.escape(CONFIG_FILE) + ".shard*"):
+            # Alarms move between the main file and the shard files when
+            # --shards is turned on or off
+            from shards import load_shards
+            from_shards = load_shards(CONFIG_FILE)
+            alarms = list({a.alarm_id: a for a in alarms + from_shards}.values())
+        self.sound_player.sound_path = settings.get("sound_path", DEFAULT_SOUND)
+        self.alarm_sound_label_var.set(os.path.basename(self.sound_player.sound_path))
+        now = self.clock.now()
+        cutoff = now - MISSED_ALARM_GRACE
+        restored = []
+        for alarm in alarms:
+            if alarm.target < cutoff:
+                if alarm.rule is None:
+                    continue
+                # Long-missed recurring alarms resume at their next occurrence
+                try:
+                    alarm.target = alarm.rule.next_after(now)
+                except ValueError as e:
+                    print(f"Dropping recurring alarm {alarm.alarm_id}: {e}")
+                    continue
+            restored.append(alarm)
+        self.scheduler.restore(restored)
+        if from_shards and not self.shards:
+            # Save them in the main file before the shard files go
+            from shards import remove_shards
+            self.config_store.compact()
+            remove_shards(CONFIG_FILE)
 
     def on_close(self):
         """Handle cleanup and close the app."""
+        if self.control_server is not None:
+            self.control_server.stop()
+        self.timers.close()
+        self.scheduler.stop()
+        self.dispatcher.stop()
+        self.ui_queue.stop()
+        self.config_store.close()
+        self.metrics_stop.set()
+        if self.metrics_path:
+            try:
+                REGISTRY.write(self.metrics_path)
+            except Exception as e:
+                print(f"Error writing metrics: {e}")
         try:
             self.sound_player.stop()
         except Exception:
@@ -509,5 +1015,29 @@ class TimerAlarmApp(tk.Tk):
         self.destroy()
 
 if __name__ == "__main__":
-    app = TimerAlarmApp()
+    parser = argparse.ArgumentParser(description="Timer & Alarm Clock")
+    parser.add_argument("--lazy-audio", action="store_true",
+                        help="skip the background audio warm-up; pygame loads on the first alarm")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="write metrics here every few seconds (Prometheus text, or JSON for .json)")
+    parser.add_argument("--profile", metavar="PATH",
+                        help="cProfile the scheduler, UI queue, persistence and sound paths; stats are saved here on exit")
+    parser.add_argument("--control", metavar="ADDRESS", nargs="?", const="",
+                        help="accept commands from control_api.py on a Unix socket path or host:port "
+                             "(control_api.py's default address if omitted)")
+    parser.add_argument("--alert-window", metavar="SECONDS", type=float, default=DEFAULT_WINDOW,
+                        help="group alerts due within this many seconds into one notification")
+    parser.add_argument("--alert-interval", metavar="SECONDS", type=float, default=DEFAULT_MIN_INTERVAL,
+                        help="minimum time between alert sounds; alerts in between are only added to the open window")
+    parser.add_argument("--shards", metavar="N", type=int, default=0,
+                        help="time and journal alarms in N worker processes, for very large alarm lists")
+    args = parser.parse_args()
+    profile_hook = None
+    if args.profile:
+        profile_hook = metrics.CProfileHook()
+        metrics.set_profile_hook(profile_hook)
+    app = TimerAlarmApp(lazy_audio=args.lazy_audio, metrics_path=args.metrics, control_address=args.control,
+                        alert_window=args.alert_window, alert_interval=args.alert_interval, shards=args.shards)
     app.mainloop()
+    if profile_hook is not None:
+        profile_hook.dump(args.profile)
@@ -0,0 +1,172 @@
+import math
+import threading
+
+from clock import REAL_CLOCK
+
+
+class TimerHandle:
+    """Returned by TimingWheel.schedule; call cancel() to drop the timer."""
+    __slots__ = ("expires", "callback", "args", "_wheel", "_bucket")
+
+    def __init__(self, wheel, expires, callback, args):
+        self.expires = expires  # absolute tick number
+        self.callback = callback
+        self.args = args
+        self._wheel = wheel
+        self._bucket = None
+
+    def cancel(self):
+        return self._wheel.cancel(self)
+
+    @property
+    def active(self):
+        return self._bucket is not None
+
+
+class TimingWheel:
+    """
+    Hierarchical timing wheel for large numbers of short timeouts.
+
+    Time is cut into ticks of `tick` seconds. Level 0 has one slot per tick,
+    and each higher level covers wheel_size times the span of the level below
+    it. A timer is placed in the lowest level whose span reaches its expiry
+    and cascades down as the wheel turns, so insert and cancel are O(1) and
+    each timer moves at most `levels` times. Timers further out than the
+    whole wheel wait in an overflow bucket until the top level comes round.
+
+    The wheel does nothing on its own: call advance() from your own loop, or
+    start() a background thread that advances it once per tick while timers
+    are pending. Callbacks run on whichever thread advances the wheel. Time
+    comes from `clock` (see clock.py), as for the other engines.
+    """
+    def __init__(self, tick=0.01, wheel_size=256, levels=4, clock=None):
+        if tick <= 0:
+            raise ValueError("tick must be > 0")
+        if wheel_size < 2 or levels < 1:
+            raise ValueError("wheel_size must be >= 2 and levels >= 1")
+        self.tick = tick
+        self.wheel_size = wheel_size
+        self.levels = levels
+        self.clock = clock or REAL_CLOCK
+        self._origin = self.clock.monotonic()
+        self._current = 0  # last tick processed
+        self._wheels = [[set() for _ in range(wheel_size)] for _ in range(levels)]
+        self._spans = [wheel_size ** level for level in range(levels + 1)]
+        self._overflow = set()
+        self._count = 0
+        self._lock = threading.Condition()
+        self._running = False
+        self._thread = None
+
+    def __len__(self):
+        return self._count
+
+    def schedule(self, delay, callback, *args):
+        """Run callback(*args) after `delay` seconds, rounded up to a tick."""
+        with self._lock:
+            expires = math.ceil((self.clock.monotonic() + delay - self._origin) / self.tick)
+            handle = TimerHandle(self, max(expires, self._current + 1), callback, args)
+            self._place(handle)
+            self._count += 1
+            if self._count == 1:
+                self.clock.notify(self._lock)
+            return handle
+
+    def cancel(self, handle):
+        with self._lock:
+            if handle._bucket is None:
+                return False
+            handle._bucket.discard(handle)
+            handle._bucket = None
+            self._count -= 1
+            return True
+
+    def advance(self, now=None):
+        """Process every tick up to `now` and fire expired timers. Returns the count fired."""
+        if now is None:
+            now = self.clock.monotonic()
+        target = int((now - self._origin) / self.tick)
+        expired = []
+        with self._lock:
+            if self._count == 0:
+                # Nothing can expire, so skip the idle ticks entirely
+                self._current = max(self._current, target)
+            while self._current < target and self._count:
+                self._current += 1
+                self._cascade()
+                bucket = self._wheels[0][self._current % self.wheel_size]
+                if bucket:
+                    for handle in bucket:
+                        handle._bucket = None
+                    expired.extend(bucket)
+                    self._count -= len(bucket)
+                    bucket.clear()
+            if self._count == 0:
+                self._current = max(self._current, target)
+        for handle in expired:
+            try:
+                handle.callback(*handle.args)
+            except Exception as e:
+                print(f"Timer callback error: {e}")
+        return len(expired)
+
+    def start(self):
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+        self._thread = self.clock.start_thread(self._run, name="timing-wheel")
+
+    def stop(self):
+        with self._lock:
+            self._running = False
+            self.clock.notify(self._lock)
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1)
+        self._thread = None
+
+    def _place(self, handle):
+        diff = handle.expires - self._current
+        for level in range(self.levels):
+            if diff < self._spans[level + 1]:
+                slot = (handle.expires // self._spans[level]) % self.wheel_size
+                bucket = self._wheels[level][slot]
+                break
+        else:
+            bucket = self._overflow
+        bucket.add(handle)
+        handle._bucket = bucket
+
+    def _cascade(self):
+        # When a level's span boundary is reached, redistribute the slot that
+        # has just come due into the levels below it.
+        for level in range(1, self.levels):
+            if self._current % self._spans[level]:
+                break
+            slot = (self._current // self._spans[level]) % self.wheel_size
+            bucket = self._wheels[level][slot]
+            if bucket:
+                handles = list(bucket)
+                bucket.clear()
+                for handle in handles:
+                    self._place(handle)
+        else:
+            if self._overflow and self._current % self._spans[self.levels - 1] == 0:
+                handles = list(self._overflow)
+                self._overflow.clear()
+                for handle in handles:
+                    self._place(handle)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while self._running and self._count == 0:
+                    self.clock.wait(self._lock)
+                if not self._running:
+                    return
+                next_tick = self._origin + (self._current + 1) * self.tick
+                delay = next_tick - self.clock.monotonic()
+                if delay > 0:
+                    self.clock.wait(self._lock, delay)
+                    continue
+            self.advance()
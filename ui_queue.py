@@ -0,0 +1,94 @@
+import collections
+import threading
+import time
+
+from metrics import REGISTRY, profile
+
+QUEUE_DEPTH = REGISTRY.gauge("ui_queue_depth", "UI updates and calls waiting at the start of the last frame")
+DRAIN_TIME = REGISTRY.histogram("ui_queue_drain_seconds", "Time the Tk thread spent applying one frame of updates")
+
+
+class UIUpdateQueue:
+    """
+    Marshal UI work from worker threads onto the Tk main loop.
+
+    Worker threads never touch widgets directly. They post to this queue and
+    the main loop drains it once per frame (every interval_ms):
+
+      set(key, func, *args)   coalesced: only the latest update per key is
+                              applied, e.g. a progress bar value
+      call(func, *args)       ordered one-shot work that must not be dropped,
+                              e.g. dialogs and sound
+
+    Coalesced updates are applied before one-shot calls in each frame, and
+    one-shot calls stop once budget_ms of the frame is used (at least one
+    runs per frame), so a burst is spread out instead of freezing the window.
+    """
+    def __init__(self, root, interval_ms=50, budget_ms=25):
+        self.root = root
+        self.interval_ms = interval_ms
+        self.budget_ms = budget_ms
+        self._updates = {}  # key -> (func, args, kwargs), latest wins
+        self._calls = collections.deque()
+        self._lock = threading.Lock()
+        self._after_id = None
+
+    def __len__(self):
+        with self._lock:
+            return len(self._updates) + len(self._calls)
+
+    def set(self, key, func, *args, **kwargs):
+        with self._lock:
+            # Re-insert so the dict keeps keys in order of their latest update
+            self._updates.pop(key, None)
+            self._updates[key] = (func, args, kwargs)
+
+    def call(self, func, *args, **kwargs):
+        with self._lock:
+            self._calls.append((func, args, kwargs))
+
+    def start(self):
+        # Must be called from the Tk thread
+        if self._after_id is None:
+            self._after_id = self.root.after(self.interval_ms, self._drain)
+
+    def stop(self):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+    def drain(self):
+        """Apply queued updates, then one-shot calls until the frame budget is used."""
+        start = time.perf_counter()
+        deadline = start + self.budget_ms / 1000
+        with self._lock:
+            updates = self._updates
+            self._updates = {}
+            QUEUE_DEPTH.set(len(updates) + len(self._calls))
+        if not updates and not self._calls:
+            return  # idle frame; keep it out of the drain histogram
+        with profile("ui_queue.drain"):
+            for func, args, kwargs in updates.values():
+                self._apply(func, args, kwargs)
+            while True:
+                with self._lock:
+                    if not self._calls:
+                        break
+                    func, args, kwargs = self._calls.popleft()
+                self._apply(func, args, kwargs)
+                if time.perf_counter() >= deadline:
+                    break
+        DRAIN_TIME.observe(time.perf_counter() - start)
+
+    def _drain(self):
+        self._after_id = None
+        try:
+            self.drain()
+        finally:
+            self._after_id = self.root.after(self.interval_ms, self._drain)
+
+    def _apply(self, func, args, kwargs):
+        try:
+            func(*args, **kwargs)
+        except Exception as e:
+            print(f"UI update error: {e}")